@@ -1,17 +1,20 @@
 # authenticate.py
 import asyncio
 from telethon import TelegramClient
-from core.config import API_ID, API_HASH, SESSION_NAME # Імпортуємо з конфігу
+from core.config import API_ID, API_HASH, SESSION_NAMES, validate_config # Імпортуємо з конфігу
 
 async def run_auth():
-    print("Starting Telethon authentication...")
-    client = TelegramClient(SESSION_NAME, API_ID, API_HASH)
-    await client.start() # Це запустить інтерактивний вхід у консолі
-    print(f"Authentication successful! Session file '{SESSION_NAME}.session' should be created/updated.")
-    me = await client.get_me()
-    print(f"Logged in as: {me.first_name} {me.last_name or ''} (@{me.username or ''})")
-    await client.disconnect()
-    print("Client disconnected.")
+    # Проходимо вхід для кожного акаунта з пулу (TELETHON_SESSION_NAMES)
+    for session_name in SESSION_NAMES:
+        print(f"Starting Telethon authentication for session '{session_name}'...")
+        client = TelegramClient(session_name, API_ID, API_HASH)
+        await client.start() # Це запустить інтерактивний вхід у консолі
+        print(f"Authentication successful! Session file '{session_name}.session' should be created/updated.")
+        me = await client.get_me()
+        print(f"Logged in as: {me.first_name} {me.last_name or ''} (@{me.username or ''})")
+        await client.disconnect()
+        print("Client disconnected.")
 
 if __name__ == "__main__":
-     asyncio.run(run_auth())
\ No newline at end of file
+     validate_config(require_bot=False)
+     asyncio.run(run_auth())
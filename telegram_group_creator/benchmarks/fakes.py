@@ -0,0 +1,235 @@
+"""
+Фейкові Telethon-клієнт і PTB Bot для офлайн-бенчмарків.
+
+Обидва працюють у процесі, без мережі: відповідають з налаштовуваною затримкою,
+можуть повертати FloodWait та помилки із заданою ймовірністю і рахують виклики.
+"""
+import asyncio
+import itertools
+import random
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+
+from telethon import errors, functions, types
+from telethon.tl.types.messages import InvitedUsers
+
+from core.client_manager import TelethonClientManager
+
+
+@dataclass
+class FakeBackendConfig:
+    """Поведінка фейкового бекенду."""
+    latency: float = 0.02          # середня затримка одного запиту (с)
+    jitter: float = 0.5            # розкид затримки, частка від latency
+    flood_rate: float = 0.0        # ймовірність FloodWait на запит
+    flood_seconds: int = 1         # тривалість FloodWait
+    failure_rate: float = 0.0      # ймовірність помилки на запит
+    bot_latency: float = 0.01      # затримка одного виклику Bot API
+    seed: int = 42
+
+
+class FakeBackendStats:
+    """Лічильники викликів, спільні для всіх фейкових клієнтів одного прогону."""
+
+    def __init__(self):
+        self.mtproto_calls: Counter[str] = Counter()
+        self.bot_calls: Counter[str] = Counter()
+        self.injected: Counter[str] = Counter()
+
+    @property
+    def mtproto_total(self) -> int:
+        return sum(self.mtproto_calls.values())
+
+    @property
+    def bot_total(self) -> int:
+        return sum(self.bot_calls.values())
+
+
+def _empty_updates(chats: list | None = None) -> types.Updates:
+    return types.Updates(updates=[], users=[], chats=chats or [], date=None, seq=0)
+
+
+class FakeTelegramClient:
+    """Підмножина API TelegramClient, яку використовує create_telegram_group."""
+
+    _ids = itertools.count(10_000)
+
+    def __init__(self, config: FakeBackendConfig, stats: FakeBackendStats, rng: random.Random):
+        self.config = config
+        self.stats = stats
+        self.rng = rng
+        self._connected = False
+        self._handlers = []
+
+    # --- Підключення ---
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self) -> None:
+        self._connected = True
+
+    async def disconnect(self) -> None:
+        self._connected = False
+
+    async def is_user_authorized(self) -> bool:
+        return True
+
+    def add_event_handler(self, callback, event=None) -> None:
+        self._handlers.append(callback)
+
+    def remove_event_handler(self, callback, event=None) -> None:
+        self._handlers.remove(callback)
+
+    # --- Запити ---
+    async def _delay(self) -> None:
+        spread = self.config.latency * self.config.jitter
+        await asyncio.sleep(max(0.0, self.rng.uniform(self.config.latency - spread, self.config.latency + spread)))
+
+    def _maybe_fail(self, request) -> Exception | None:
+        if self.rng.random() < self.config.flood_rate:
+            self.stats.injected["FloodWaitError"] += 1
+            return errors.FloodWaitError(request=request, capture=self.config.flood_seconds)
+        if self.rng.random() < self.config.failure_rate:
+            if isinstance(request, (functions.channels.InviteToChannelRequest, functions.messages.AddChatUserRequest)):
+                error = errors.UserPrivacyRestrictedError(request=request)
+            else:
+                error = errors.RPCError(request, "FAKE_FAILURE", 400)
+            self.stats.injected[type(error).__name__] += 1
+            return error
+        return None
+
+    def _respond(self, request):
+        if isinstance(request, functions.channels.CreateChannelRequest):
+            channel = types.Channel(
+                id=next(self._ids), title=request.title, photo=types.ChatPhotoEmpty(), date=None,
+                access_hash=self.rng.getrandbits(32), megagroup=request.megagroup
+            )
+            return _empty_updates([channel])
+        if isinstance(request, functions.messages.CreateChatRequest):
+            chat = types.Chat(
+                id=next(self._ids), title=request.title, photo=types.ChatPhotoEmpty(),
+                participants_count=len(request.users) + 1, date=None, version=1
+            )
+            return InvitedUsers(updates=_empty_updates([chat]), missing_invitees=[])
+        if isinstance(request, functions.channels.InviteToChannelRequest):
+            return InvitedUsers(updates=_empty_updates(), missing_invitees=[])
+        return _empty_updates()
+
+    async def __call__(self, request, ordered: bool = False):
+        if isinstance(request, list):
+            # Контейнер: одна затримка на весь пакет, результат — окремо для кожного запиту
+            await self._delay()
+            results, exceptions = [], []
+            for single in request:
+                self.stats.mtproto_calls[type(single).__name__] += 1
+                error = self._maybe_fail(single)
+                results.append(None if error else self._respond(single))
+                exceptions.append(error)
+            if any(exceptions):
+                raise errors.MultiError(exceptions, results, request)
+            return results
+
+        self.stats.mtproto_calls[type(request).__name__] += 1
+        await self._delay()
+        error = self._maybe_fail(request)
+        if error:
+            raise error
+        return self._respond(request)
+
+    async def get_entity(self, username: str):
+        self.stats.mtproto_calls["ResolveUsernameRequest"] += 1
+        await self._delay()
+        error = self._maybe_fail(None)
+        if error:
+            raise error
+        name = username.lstrip("@")
+        return types.User(
+            id=zlib.crc32(name.encode()), access_hash=zlib.crc32(name.encode()[::-1]),
+            username=name, bot=name.lower().endswith("bot")
+        )
+
+    async def get_input_entity(self, peer):
+        return peer
+
+    async def send_message(self, entity, message: str):
+        self.stats.mtproto_calls["SendMessageRequest"] += 1
+        await self._delay()
+        error = self._maybe_fail(None)
+        if error:
+            raise error
+        return None
+
+
+class FakeAccount(TelethonClientManager):
+    """Справжній TelethonClientManager, що замість мережевого клієнта створює фейковий."""
+
+    def __init__(self, session_name: str, config: FakeBackendConfig, stats: FakeBackendStats,
+                 limits: dict[str, tuple[float, int]] | None = None):
+        super().__init__(0, "", session_name)
+        self._fake = FakeTelegramClient(config, stats, random.Random(f"{config.seed}:{session_name}"))
+        if limits is not None:
+            self.rate_limiter.limits = limits
+
+    def _build_client(self):
+        return self._fake
+
+
+class FakeMessage:
+    def __init__(self, bot: "FakeBot", chat_id: int, text: str):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.text = text
+
+    async def edit_text(self, text: str, **kwargs) -> "FakeMessage":
+        await self.bot._call("editMessageText")
+        self.text = text
+        return self
+
+
+class FakeBot:
+    """Фейковий PTB Bot: лише методи, які викликають обробники та виконавець батчів."""
+
+    def __init__(self, config: FakeBackendConfig, stats: FakeBackendStats):
+        self.config = config
+        self.stats = stats
+        self.messages: list[FakeMessage] = []
+
+    async def _call(self, endpoint: str) -> None:
+        self.stats.bot_calls[endpoint] += 1
+        await asyncio.sleep(self.config.bot_latency)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> FakeMessage:
+        await self._call("sendMessage")
+        message = FakeMessage(self, chat_id, text)
+        self.messages.append(message)
+        return message
+
+
+class FakeCallbackQuery:
+    def __init__(self, bot: FakeBot, data: str):
+        self.bot = bot
+        self.data = data
+
+    async def answer(self, *args, **kwargs) -> None:
+        await self.bot._call("answerCallbackQuery")
+
+    async def edit_message_text(self, text: str, **kwargs) -> None:
+        await self.bot._call("editMessageText")
+
+
+class Timer:
+    """Збирає тривалість окремих викликів (для p50/p95)."""
+
+    def __init__(self):
+        self.samples: list[float] = []
+
+    def wrap(self, func):
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.samples.append(time.perf_counter() - started)
+        return timed
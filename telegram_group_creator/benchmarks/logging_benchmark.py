@@ -0,0 +1,142 @@
+"""
+Бенчмарк логування в циклі подій: скільки часу циклу займає запис логів гарячого шляху
+при паралельному створенні груп.
+
+Порівнює попереднє налаштування (basicConfig: f-рядки, синхронний запис у потік з
+циклу подій) з конвеєром core.logging_config (%-аргументи, черга, запис у потоці
+QueueListener). Кожна "група" пише кілька INFO/DEBUG-рядків на крок і на користувача
+та одне трасування винятку, як create_telegram_group. Вивід іде у тимчасовий файл.
+
+Запуск з каталогу telegram_group_creator:
+    python -m benchmarks.logging_benchmark
+    python -m benchmarks.logging_benchmark --groups 500 --users 8 --level DEBUG --sample-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from core.logging_config import TEXT_FORMAT, JsonFormatter, TextFormatter, create_queue_logging
+from core.request_accounting import current_batch, current_group
+
+logger = logging.getLogger("benchmarks.hot_path")
+BOT_USERNAME = "@bench_bot"
+
+
+async def _group_sync(index: int, users: int) -> None:
+    """Група з логами в старому стилі: f-рядки форматуються завжди, навіть для вимкненого DEBUG."""
+    current_group.set(index)
+    name = f"BENCH VENUE {index}"
+    logger.debug(f"Resolving bot entity: {BOT_USERNAME}")
+    for user in range(users):
+        logger.debug(f"Manager entity resolved: @bench_user_{user} -> ID={100000 + user}")
+    logger.info(f"Creating group '{name}' with initial user ID: 100000")
+    await asyncio.sleep(0)
+    logger.info(f"Group '{name}' created with ID: {-index}")
+    for user in range(users):
+        logger.info(f"User ID {100000 + user} promoted successfully in supergroup.")
+    try:
+        raise ConnectionError(f"simulated failure in group {index}")
+    except ConnectionError as e:
+        logger.exception(f"Failed to send UID code to group {-index}: {e}")
+
+
+async def _group_lazy(index: int, users: int) -> None:
+    """Та сама група з %-аргументами: вимкнені рівні не форматуються, решта — у потоці слухача."""
+    current_group.set(index)
+    name = f"BENCH VENUE {index}"
+    logger.debug("Resolving bot entity: %s", BOT_USERNAME)
+    for user in range(users):
+        logger.debug("Manager entity resolved: %s -> ID=%s", f"@bench_user_{user}", 100000 + user)
+    logger.info("Creating group '%s' with initial user ID: %s", name, 100000)
+    await asyncio.sleep(0)
+    logger.info("Group '%s' created with ID: %s", name, -index)
+    for user in range(users):
+        logger.info("User ID %s promoted successfully in %s.", 100000 + user, "supergroup")
+    try:
+        raise ConnectionError(f"simulated failure in group {index}")
+    except ConnectionError as e:
+        logger.exception("Failed to send UID code to group %s: %s", -index, e)
+
+
+async def _run_groups(group, groups: int, users: int) -> float:
+    """Секунди циклу подій на groups паралельних груп."""
+    current_batch.set("bench")
+    started = time.perf_counter()
+    await asyncio.gather(*(group(index, users) for index in range(groups)))
+    return time.perf_counter() - started
+
+
+def _configure(handler: logging.Handler, level: int) -> None:
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def run(groups: int, users: int, level: int, sample_rate: float, log_format: str) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        # Попереднє налаштування: форматування й запис у файл прямо в циклі подій
+        sync_path = os.path.join(directory, "sync.log")
+        sync_handler = logging.FileHandler(sync_path, encoding="utf-8")
+        sync_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        _configure(sync_handler, level)
+        loop_seconds = asyncio.run(_run_groups(_group_sync, groups, users))
+        sync_handler.close()
+        results["sync"] = {"loop_ms": round(loop_seconds * 1000, 1), "total_ms": round(loop_seconds * 1000, 1),
+                           "lines": _count_lines(sync_path)}
+
+        # Черга: у циклі подій лише створення запису й put(), решта — у потоці слухача
+        queue_path = os.path.join(directory, "queue.log")
+        output = logging.FileHandler(queue_path, encoding="utf-8")
+        output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter(TEXT_FORMAT))
+        queue_handler, listener = create_queue_logging(output, sample_rate)
+        _configure(queue_handler, level)
+        listener.start()
+        started = time.perf_counter()
+        loop_seconds = asyncio.run(_run_groups(_group_lazy, groups, users))
+        listener.stop()
+        total_seconds = time.perf_counter() - started
+        output.close()
+        results["queue"] = {"loop_ms": round(loop_seconds * 1000, 1), "total_ms": round(total_seconds * 1000, 1),
+                            "lines": _count_lines(queue_path)}
+    _configure(logging.NullHandler(), logging.WARNING)
+    results["loop_speedup"] = round(results["sync"]["loop_ms"] / max(results["queue"]["loop_ms"], 0.001), 2)
+    return results
+
+
+def _count_lines(path: str) -> int:
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare event loop time spent on logging: sync vs queue pipeline.")
+    parser.add_argument("--groups", type=int, default=300, help="concurrent groups")
+    parser.add_argument("--users", type=int, default=6, help="managers per group (per-user log lines)")
+    parser.add_argument("--level", default="INFO", choices=["DEBUG", "INFO", "WARNING"], help="root log level")
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="share of groups with DEBUG logs")
+    parser.add_argument("--format", default="text", choices=["text", "json"], help="output format of the queue pipeline")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    measured = run(arguments.groups, arguments.users, logging.getLevelName(arguments.level),
+                   arguments.sample_rate, arguments.format)
+    if arguments.json:
+        json.dump(measured, sys.stdout, indent=2)
+        print()
+    else:
+        for name in ("sync", "queue"):
+            entry = measured[name]
+            print(f"{name:>6}: event loop {entry['loop_ms']:>8.1f} ms, "
+                  f"until written {entry['total_ms']:>8.1f} ms, {entry['lines']} lines")
+        print(f"event loop time speedup: {measured['loop_speedup']}x")
@@ -0,0 +1,104 @@
+"""
+Мікробенчмарк парсера масового повідомлення: однопрохідний core.parser проти
+попередньої реалізації (benchmarks/legacy_parser.py).
+
+Запуск з каталогу telegram_group_creator:
+    python -m benchmarks.parser_benchmark
+    python -m benchmarks.parser_benchmark --sizes 1000 10000 50000 --legacy-max-lines 20000
+"""
+import argparse
+import json
+import sys
+import timeit
+
+from core.parser import parse_bulk_message, BulkParseError
+
+from .legacy_parser import parse_bulk_message as legacy_parse_bulk_message
+
+
+def make_message(venues: int, invalid_every: int = 0) -> str:
+    """
+    Повідомлення з venues закладами (приблизно 2 * venues рядків).
+    invalid_every > 0 робить кожну invalid_every-ту назву порожньою, щоб виміряти звітування помилок.
+    """
+    lines = ["Користувачі:", "1, 3, 5", "Додаткові: @bench_user_1 @bench_user_2", "", "Назви:"]
+    for i in range(1, venues + 1):
+        name = "" if invalid_every and i % invalid_every == 0 else f"BENCH VENUE {i} | вул. Тестова, {i}"
+        lines.append(f"{i}. {name}")
+    lines.append("UID:")
+    lines.extend(f"{i}. {100000 + i}" for i in range(1, venues + 1))
+    return "\n".join(lines)
+
+
+def _best_time(func, text: str, repeat: int) -> float:
+    """Найкращий час одного виклику (с) з repeat спроб."""
+    def call():
+        try:
+            func(text)
+        except ValueError:
+            pass
+    return min(timeit.repeat(call, number=1, repeat=repeat))
+
+
+def run(sizes: list[int], repeat: int, legacy_max_lines: int) -> list[dict]:
+    results = []
+    for venues in sizes:
+        text = make_message(venues)
+        line_count = text.count("\n") + 1
+        new_seconds = _best_time(parse_bulk_message, text, repeat)
+        result = {
+            "venues": venues,
+            "lines": line_count,
+            "new_ms": round(new_seconds * 1000, 3),
+            "new_us_per_line": round(new_seconds / line_count * 1e6, 3),
+            "legacy_ms": None,
+            "speedup": None,
+        }
+        if line_count <= legacy_max_lines:
+            # Обидва парсери мають повертати однаковий результат на коректному вводі
+            if parse_bulk_message(text) != legacy_parse_bulk_message(text):
+                raise AssertionError(f"Parsers disagree on a {venues}-venue message")
+            legacy_seconds = _best_time(legacy_parse_bulk_message, text, repeat)
+            result["legacy_ms"] = round(legacy_seconds * 1000, 3)
+            result["speedup"] = round(legacy_seconds / new_seconds, 2) if new_seconds else None
+
+        # Той самий розмір, але з помилкою в кожній 10-й назві: звітування не повинно ламати лінійність
+        invalid_text = make_message(venues, invalid_every=10)
+        try:
+            parse_bulk_message(invalid_text)
+        except BulkParseError as e:
+            result["invalid_errors"] = len(e.errors)
+        result["invalid_ms"] = round(_best_time(parse_bulk_message, invalid_text, repeat) * 1000, 3)
+        results.append(result)
+    return results
+
+
+def _print_results(results: list[dict]) -> None:
+    print(f"{'venues':>7} {'lines':>7} {'new ms':>9} {'us/line':>8} {'legacy ms':>10} {'speedup':>8} {'errors ms':>10}")
+    for r in results:
+        legacy = f"{r['legacy_ms']:>10.2f}" if r["legacy_ms"] is not None else f"{'skipped':>10}"
+        speedup = f"{r['speedup']:>7.1f}x" if r["speedup"] is not None else f"{'-':>8}"
+        print(
+            f"{r['venues']:>7} {r['lines']:>7} {r['new_ms']:>9.2f} {r['new_us_per_line']:>8.3f} "
+            f"{legacy} {speedup} {r['invalid_ms']:>10.2f}"
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Microbenchmark of the bulk message parser.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000], help="venues per message")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (best one is reported)")
+    parser.add_argument("--legacy-max-lines", type=int, default=50000,
+                        help="skip the legacy parser above this many lines (it grows quadratically)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    measured = run(arguments.sizes, arguments.repeat, arguments.legacy_max_lines)
+    if arguments.json:
+        json.dump(measured, sys.stdout, indent=2)
+        print()
+    else:
+        _print_results(measured)
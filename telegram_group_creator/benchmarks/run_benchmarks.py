@@ -0,0 +1,215 @@
+"""
+Офлайн-бенчмарк створення груп.
+
+Проганяє повні батчі через справжній код (confirm_creation_callback -> JobRunner ->
+run_creation_job -> create_telegram_group) з фейковими Telethon-клієнтом і Bot API.
+
+Запуск з каталогу telegram_group_creator:
+    python -m benchmarks.run_benchmarks --sizes 10 100 1000
+    python -m benchmarks.run_benchmarks --flood-rate 0.01 --failure-rate 0.02
+    python -m benchmarks.run_benchmarks --save-baseline
+
+Без --save-baseline результати порівнюються зі збереженим baseline.json.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Облікові дані та дозволений користувач для офлайн-прогону (підходять будь-які значення)
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:benchmark")
+os.environ.setdefault("TELEGRAM_API_ID", "1")
+os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+os.environ.setdefault("ALLOWED_USER_IDS", "1")
+
+import core.telethon_client as telethon_client
+from bot_logic.handlers import confirm_creation_callback
+from bot_logic.job_runner import JobRunner, BOT_DATA_KEY as JOB_RUNNER_KEY
+from bot_logic.keyboards import CALLBACK_CONFIRM_CREATE
+from core.config import BOT_TO_ADD, GROUP_CREATION_CONCURRENCY
+from core.job_store import JobStore, BOT_DATA_KEY as JOB_STORE_KEY, JOB_DONE
+from core.metrics import REGISTRY
+from core.rate_limiter import FAMILY_LIMITS
+from core.session_pool import SessionPool, BOT_DATA_KEY as SESSION_POOL_KEY
+
+from .fakes import FakeAccount, FakeBackendConfig, FakeBackendStats, FakeBot, FakeCallbackQuery, Timer
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+USER_ID = 1
+MANAGERS = ["@bench_manager_1", "@bench_manager_2"]
+
+# Без пауз лімітера вимірюється швидкість самого коду, а не лімітів Telegram
+UNPACED_LIMITS = {family: (1000.0, 1000) for family in FAMILY_LIMITS}
+
+
+async def run_batch(size: int, accounts: int, config: FakeBackendConfig, real_limits: bool) -> dict:
+    """Проганяє один батч із size закладів і повертає метрики."""
+    stats = FakeBackendStats()
+    bot = FakeBot(config, stats)
+    limits = None if real_limits else UNPACED_LIMITS
+    session_names = [f"bench_{i}" for i in range(accounts)]
+    # Кожен сценарій починає з порожнього добового ліміту: пул зберігає час створення груп у <session>.groups.json
+    for name in session_names:
+        if os.path.exists(f"{name}.groups.json"):
+            os.remove(f"{name}.groups.json")
+
+    pool = SessionPool(
+        [FakeAccount(name, config, stats, limits) for name in session_names],
+        daily_group_limit=size, max_wait=config.flood_seconds * 10
+    )
+    await pool.start()
+    await pool.warm_entities([BOT_TO_ADD] + MANAGERS)
+    warmup_calls = stats.mtproto_total
+
+    job_store = JobStore(f"bench_{size}.sqlite3")
+    runner = JobRunner(bot, pool, job_store, workers=1)
+    runner.start()
+
+    timer = Timer()
+    # run_creation_job імпортує create_telegram_group з модуля під час виклику
+    original = telethon_client.create_telegram_group
+    telethon_client.create_telegram_group = timer.wrap(original)
+    update = SimpleNamespace(
+        callback_query=FakeCallbackQuery(bot, CALLBACK_CONFIRM_CREATE),
+        effective_user=SimpleNamespace(id=USER_ID)
+    )
+    context = SimpleNamespace(
+        bot=bot,
+        bot_data={SESSION_POOL_KEY: pool, JOB_STORE_KEY: job_store, JOB_RUNNER_KEY: runner},
+        user_data={
+            "managers": MANAGERS,
+            "names": [f"BENCH VENUE {i} | вул. Тестова, {i}" for i in range(size)],
+            "uids": [str(100000 + i) for i in range(size)],
+        },
+    )
+    try:
+        started = time.perf_counter()
+        await confirm_creation_callback(update, context)
+        handler_latency = time.perf_counter() - started
+        await runner.wait_idle()
+        elapsed = time.perf_counter() - started
+        job = job_store.recent_jobs(USER_ID, 1)[0]
+        counts = job_store.count_items(job.id)
+    finally:
+        telethon_client.create_telegram_group = original
+        await runner.stop()
+        await pool.stop()
+        job_store.close()
+
+    latencies = sorted(timer.samples)
+    return {
+        "size": size,
+        "accounts": accounts,
+        "elapsed_s": round(elapsed, 3),
+        "groups_per_min": round(counts["done"] / elapsed * 60, 1) if elapsed else 0.0,
+        "p50_s": round(_percentile(latencies, 50), 4),
+        "p95_s": round(_percentile(latencies, 95), 4),
+        "handler_latency_s": round(handler_latency, 4),
+        "created": counts["done"],
+        "failed": counts["failed"],
+        "job_finished": job.status == JOB_DONE,
+        "mtproto_calls_per_group": round((stats.mtproto_total - warmup_calls) / size, 2),
+        "bot_calls_per_group": round(stats.bot_total / size, 3),
+        "mtproto_calls": dict(stats.mtproto_calls),
+        "bot_calls": dict(stats.bot_calls),
+        "injected_errors": dict(stats.injected),
+    }
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def _scenario_key(result: dict, args: argparse.Namespace) -> str:
+    return (
+        f"n={result['size']} accounts={args.accounts} latency={args.latency} "
+        f"flood={args.flood_rate} failure={args.failure_rate} limits={'real' if args.real_limits else 'unpaced'}"
+    )
+
+
+def _print_result(result: dict, baseline: dict | None) -> None:
+    line = (
+        f"n={result['size']:>5}  {result['groups_per_min']:>8.1f} groups/min  "
+        f"p50={result['p50_s']:.3f}s  p95={result['p95_s']:.3f}s  "
+        f"mtproto/group={result['mtproto_calls_per_group']:.2f}  bot/group={result['bot_calls_per_group']:.3f}  "
+        f"created={result['created']} failed={result['failed']}  handler={result['handler_latency_s'] * 1000:.1f}ms"
+    )
+    print(line)
+    if baseline:
+        for metric, higher_is_better in (("groups_per_min", True), ("p95_s", False), ("mtproto_calls_per_group", False)):
+            old, new = baseline[metric], result[metric]
+            if not old:
+                continue
+            change = (new - old) / old * 100
+            regressed = change < -5 if higher_is_better else change > 5
+            print(f"        {metric}: {old} -> {new} ({change:+.1f}%){'  REGRESSION' if regressed else ''}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    config = FakeBackendConfig(
+        latency=args.latency, flood_rate=args.flood_rate, flood_seconds=args.flood_seconds,
+        failure_rate=args.failure_rate, seed=args.seed
+    )
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"Concurrency per batch: {GROUP_CREATION_CONCURRENCY}, accounts: {args.accounts}")
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for size in args.sizes:
+                result = await run_batch(size, args.accounts, config, args.real_limits)
+                key = _scenario_key(result, args)
+                results[key] = result
+                _print_result(result, None if args.save_baseline else baseline.get(key))
+        finally:
+            os.chdir(cwd)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    if args.metrics:
+        # Метрики процесу накопичуються за всі прогони
+        print(REGISTRY.render_prometheus())
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the group creation pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="batch sizes to run")
+    parser.add_argument("--accounts", type=int, default=1, help="number of fake Telethon accounts in the pool")
+    parser.add_argument("--latency", type=float, default=0.02, help="mean MTProto request latency, seconds")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="probability of FloodWait per request")
+    parser.add_argument("--flood-seconds", type=int, default=1, help="FloodWait duration, seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability of an RPC error per request")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--real-limits", action="store_true", help="keep the production rate limiter pacing")
+    parser.add_argument("--save-baseline", action="store_true", help=f"store results in {BASELINE_PATH}")
+    parser.add_argument("--json", action="store_true", help="print full results as JSON")
+    parser.add_argument("--metrics", action="store_true", help="print collected metrics in Prometheus format")
+    parser.add_argument("--verbose", action="store_true", help="show application logs")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    logging.basicConfig(level=logging.INFO if arguments.verbose else logging.CRITICAL, stream=sys.stdout)
+    logging.getLogger().setLevel(logging.INFO if arguments.verbose else logging.CRITICAL)
+    asyncio.run(main(arguments))
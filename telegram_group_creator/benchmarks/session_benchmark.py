@@ -0,0 +1,107 @@
+"""
+Бенчмарк сесії Telethon: стандартна SQLiteSession проти BufferedSession (core.session_storage).
+
+Імітує навантаження довгоживучого клієнта під час батчу: кожна "група" приносить нові
+сутності (process_entities, як після ResolveUsername та CreateChannel), Telethon зберігає
+сесію (save(), як після оновлень) і бере сутності з сесії за юзернеймом та ID.
+Файл сесії готується так само, як його створює authenticate.py.
+
+Запуск з каталогу telegram_group_creator:
+    python -m benchmarks.session_benchmark
+    python -m benchmarks.session_benchmark --groups 2000 --entities 20000
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from telethon.crypto import AuthKey
+from telethon.sessions import SQLiteSession
+from telethon.tl import types
+
+from core.session_storage import BufferedSession
+
+# Скільки нових користувачів приносить одна група (бот і менеджери)
+USERS_PER_GROUP = 4
+
+
+def _user(user_id: int) -> types.User:
+    return types.User(id=user_id, access_hash=user_id * 7, username=f"bench_user_{user_id}", first_name="Bench")
+
+
+def prepare_session(path: str, entities: int) -> None:
+    """Файл сесії з авторизаційним ключем і entities уже відомими сутностями."""
+    session = SQLiteSession(path)
+    session.set_dc(2, "149.154.167.51", 443)
+    session.auth_key = AuthKey(os.urandom(256))
+    session.process_entities([_user(user_id) for user_id in range(1, entities + 1)])
+    session.save()
+    session.close()
+
+
+def workload(session, groups: int, known: int) -> float:
+    """Секунди на groups груп: нові сутності, save() і пошук за юзернеймом та ID."""
+    started = time.perf_counter()
+    for group in range(groups):
+        first = known + group * USERS_PER_GROUP + 1
+        users = [_user(user_id) for user_id in range(first, first + USERS_PER_GROUP)]
+        session.process_entities(users)
+        session.process_entities(types.Channel(
+            id=10**9 + group, title=f"Group {group}", photo=types.ChatPhotoEmpty(), date=None, access_hash=group
+        ))
+        session.save()
+        for user in users:
+            session.get_input_entity(user.username)
+            session.get_input_entity(user.id)
+    session.close()
+    return time.perf_counter() - started
+
+
+def run(groups: int, entities: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        template = os.path.join(directory, "template.session")
+        prepare_session(template, entities)
+        for name, factory in (("sqlite", SQLiteSession), ("buffered", BufferedSession)):
+            path = os.path.join(directory, f"{name}.session")
+            shutil.copy(template, path)
+            load_started = time.perf_counter()
+            session = factory(path)
+            load_seconds = time.perf_counter() - load_started
+            seconds = workload(session, groups, entities)
+            check = SQLiteSession(path)
+            stored = check.get_entity_rows_by_username(f"bench_user_{entities + groups * USERS_PER_GROUP}")
+            check.close()
+            results[name] = {
+                "load_ms": round(load_seconds * 1000, 1),
+                "workload_ms": round(seconds * 1000, 1),
+                "us_per_group": round(seconds / groups * 1e6, 1),
+                "persisted": stored is not None,
+            }
+    results["speedup"] = round(results["sqlite"]["workload_ms"] / max(results["buffered"]["workload_ms"], 0.001), 1)
+    return results
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare Telethon SQLiteSession with the buffered in-memory session.")
+    parser.add_argument("--groups", type=int, default=500, help="groups in the simulated batch")
+    parser.add_argument("--entities", type=int, default=5000, help="entities already stored in the session file")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    measured = run(arguments.groups, arguments.entities)
+    if arguments.json:
+        json.dump(measured, sys.stdout, indent=2)
+        print()
+    else:
+        for name in ("sqlite", "buffered"):
+            entry = measured[name]
+            print(f"{name:>9}: load {entry['load_ms']:>7.1f} ms, batch {entry['workload_ms']:>8.1f} ms "
+                  f"({entry['us_per_group']} us/group), persisted={entry['persisted']}")
+        print(f"speedup: {measured['speedup']}x")
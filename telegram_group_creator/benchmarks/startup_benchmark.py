@@ -0,0 +1,157 @@
+"""
+Бенчмарк старту бота: сумарний час імпорту модулів (python -X importtime) і час до
+першої відповіді на оновлення (time-to-first-update) у свіжому процесі.
+
+Time-to-first-update вимірюється від запуску дочірнього інтерпретатора до першого
+запиту бота до Bot API у відповідь на /start: імпорт main, побудова Application
+з обробниками бота (main.register_handlers) і фейковим Bot API з webhook_replay,
+initialize() та обробка оновлення. Мережа й токен не потрібні.
+
+Запуск з каталогу telegram_group_creator:
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --repeat 10 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Модулі, імпорт яких вимірюється: від найлегшого (парсер) до всього бота
+MODULES = ["core.parser", "core.config", "bot_logic.handlers", "main"]
+# Скільки найповільніших імпортів показувати для кожного модуля
+SLOWEST_SHOWN = 5
+# Рядок, яким дочірній процес повідомляє про першу відповідь бота
+READY_MARKER = "FIRST_UPDATE_REPLIED"
+CHILD_TIMEOUT = 60
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHILD_ENV = {
+    **os.environ,
+    # Облікові дані та дозволений користувач для офлайн-прогону (підходять будь-які значення)
+    "TELEGRAM_BOT_TOKEN": os.environ.get("TELEGRAM_BOT_TOKEN", "0:benchmark"),
+    "TELEGRAM_API_ID": os.environ.get("TELEGRAM_API_ID", "1"),
+    "TELEGRAM_API_HASH": os.environ.get("TELEGRAM_API_HASH", "benchmark"),
+    "ALLOWED_USER_IDS": "1",
+}
+
+START_UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 1760000000,
+        "chat": {"id": 1, "type": "private", "first_name": "Startup"},
+        "from": {"id": 1, "is_bot": False, "first_name": "Startup"},
+        "text": "/start",
+        "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+    },
+}
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Рядки -X importtime як (модуль, власний час, сумарний час) у мікросекундах."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_import(module: str) -> dict:
+    """Імпортує module у свіжому інтерпретаторі з -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PACKAGE_DIR, env=CHILD_ENV, capture_output=True, text=True, timeout=CHILD_TIMEOUT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    entries = parse_importtime(result.stderr)
+    top = next((entry for entry in reversed(entries) if entry[0] == module), entries[-1])
+    slowest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:SLOWEST_SHOWN]
+    return {
+        "module": module,
+        "total_ms": round(top[2] / 1000, 1),
+        "modules_imported": len(entries),
+        "telethon_imported": any(name == "telethon" for name, _, _ in entries),
+        "slowest_self_ms": {name: round(self_us / 1000, 1) for name, self_us, _ in slowest},
+    }
+
+
+def measure_first_update() -> float:
+    """Секунди від запуску процесу до першої відповіді бота на /start."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.startup_benchmark", "--child"],
+        cwd=PACKAGE_DIR, env=CHILD_ENV, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        for line in process.stdout:
+            if line.strip() == READY_MARKER:
+                return time.perf_counter() - started
+        raise RuntimeError(f"child exited with code {process.wait()} before replying to /start")
+    finally:
+        process.kill()
+        process.wait()
+
+
+async def _child() -> None:
+    """Дочірній процес: піднімає бота з фейковим Bot API і обробляє одне оновлення."""
+    from telegram import Update
+    from telegram.ext import Application
+
+    from main import register_handlers
+    from .webhook_replay import FakeBotApiRequest
+
+    fake = FakeBotApiRequest()
+    application = Application.builder().token(os.environ["TELEGRAM_BOT_TOKEN"]).request(fake).build()
+    register_handlers(application)
+    await application.initialize()
+    try:
+        processing = asyncio.create_task(application.process_update(Update.de_json(START_UPDATE, application.bot)))
+        if await fake.wait_for_call(0, CHILD_TIMEOUT) is not None:
+            print(READY_MARKER, flush=True)
+        await processing
+    finally:
+        await application.shutdown()
+
+
+def run(repeat: int) -> dict:
+    imports = [measure_import(module) for module in MODULES]
+    first_update = sorted(measure_first_update() for _ in range(repeat))
+    return {
+        "imports": imports,
+        "first_update_runs": repeat,
+        "first_update_best_ms": round(first_update[0] * 1000, 1),
+        "first_update_median_ms": round(first_update[len(first_update) // 2] * 1000, 1),
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-update of the bot.")
+    parser.add_argument("--repeat", type=int, default=5, help="how many fresh processes to start for time-to-first-update")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.child:
+        asyncio.run(_child())
+        sys.exit(0)
+    measured = run(arguments.repeat)
+    if arguments.json:
+        json.dump(measured, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        for entry in measured["imports"]:
+            telethon = ", telethon imported" if entry["telethon_imported"] else ""
+            print(f"import {entry['module']:<20} {entry['total_ms']:>8.1f} ms  ({entry['modules_imported']} modules{telethon})")
+            for name, self_ms in entry["slowest_self_ms"].items():
+                print(f"    {name:<40} {self_ms:>8.1f} ms")
+        print(f"time-to-first-update: best {measured['first_update_best_ms']} ms, "
+              f"median {measured['first_update_median_ms']} ms over {measured['first_update_runs']} runs")
@@ -0,0 +1,212 @@
+"""
+Локальна перевірка webhook-режиму: відтворює записані Update JSON через HTTP POST.
+
+Без --url піднімає в процесі справжній вбудований webhook-сервер PTB з обробниками бота
+(main.register_handlers) і фейковим Bot API, тож мережа й токен не потрібні, і вимірює
+затримку від POST до першого запиту бота до Bot API (відповіді користувачу).
+З --url надсилає оновлення на вже запущений бот (UPDATE_MODE=webhook) і вимірює лише
+час відповіді сервера.
+
+Запуск з каталогу telegram_group_creator:
+    python -m benchmarks.webhook_replay
+    python -m benchmarks.webhook_replay --updates my_updates.json --repeat 20
+    python -m benchmarks.webhook_replay --url http://127.0.0.1:8443/telegram --secret-token <секрет>
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Облікові дані та дозволений користувач для офлайн-прогону (підходять будь-які значення)
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:benchmark")
+os.environ.setdefault("TELEGRAM_API_ID", "1")
+os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+os.environ.setdefault("ALLOWED_USER_IDS", "1")
+
+from telegram.ext import Application
+from telegram.request import BaseRequest, RequestData
+
+from main import register_handlers
+
+DEFAULT_UPDATES_PATH = os.path.join(os.path.dirname(__file__), "webhook_updates.json")
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# Скільки чекати на відповідь бота після POST (с)
+REPLY_TIMEOUT = 5.0
+
+
+class FakeBotApiRequest(BaseRequest):
+    """Відповідає на запити бота без мережі й запам'ятовує час кожного виклику Bot API."""
+
+    def __init__(self):
+        self.calls: list[tuple[float, str]] = []
+        self._message_id = 1000
+        self._new_call = asyncio.Event()
+
+    @property
+    def read_timeout(self) -> float | None:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(self, url: str, method: str, request_data: RequestData | None = None,
+                         read_timeout=None, write_timeout=None, connect_timeout=None, pool_timeout=None
+                         ) -> tuple[int, bytes]:
+        endpoint = url.rsplit("/", 1)[-1]
+        parameters = request_data.parameters if request_data else {}
+        if endpoint == "getMe":
+            result = {"id": 1000, "is_bot": True, "first_name": "Replay Bot", "username": "replay_bot"}
+        elif endpoint in ("sendMessage", "editMessageText"):
+            self._message_id += 1
+            result = {
+                "message_id": self._message_id, "date": int(time.time()),
+                "chat": {"id": int(parameters.get("chat_id", 1)), "type": "private"},
+                "text": parameters.get("text", ""),
+            }
+        else:
+            result = True
+        if endpoint not in ("getMe", "setWebhook", "deleteWebhook"):
+            self.calls.append((time.perf_counter(), endpoint))
+            self._new_call.set()
+        return 200, json.dumps({"ok": True, "result": result}).encode("utf-8")
+
+    async def wait_for_call(self, count: int, timeout: float) -> float | None:
+        """Час (perf_counter) виклику з номером count або None, якщо його не було за timeout."""
+        deadline = time.perf_counter() + timeout
+        while len(self.calls) <= count:
+            self._new_call.clear()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._new_call.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        return self.calls[count][0]
+
+
+def load_updates(path: str) -> list[dict]:
+    """Оновлення з JSON-масиву або з файлу з одним Update JSON на рядок."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _post(url: str, update: dict, secret_token: str | None) -> int:
+    request = urllib.request.Request(
+        url, data=json.dumps(update).encode("utf-8"), method="POST",
+        headers={"Content-Type": "application/json", **({SECRET_HEADER: secret_token} if secret_token else {})}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=REPLY_TIMEOUT) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+async def replay(url: str, updates: list[dict], repeat: int, secret_token: str | None,
+                 fake: FakeBotApiRequest | None = None) -> dict:
+    statuses: dict[int, int] = {}
+    post_seconds, reply_seconds = [], []
+    update_id = 0
+    for _ in range(repeat):
+        for update in updates:
+            update_id += 1
+            update = {**update, "update_id": update_id}
+            calls_before = len(fake.calls) if fake else 0
+            started = time.perf_counter()
+            status = await asyncio.to_thread(_post, url, update, secret_token)
+            post_seconds.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if fake is not None and status == 200:
+                replied_at = await fake.wait_for_call(calls_before, REPLY_TIMEOUT)
+                if replied_at is not None:
+                    reply_seconds.append(replied_at - started)
+                # Наступне оновлення — лише після того, як бот закінчив з попереднім
+                await asyncio.sleep(0.05)
+    # Запит без правильного секрету має бути відхилений сервером
+    rejected = await asyncio.to_thread(_post, url, {"update_id": update_id + 1}, "wrong-secret") if secret_token else None
+    return {
+        "updates": update_id,
+        "statuses": statuses,
+        "wrong_secret_status": rejected,
+        "post_p50_ms": _ms(_percentile(post_seconds, 50)),
+        "post_p95_ms": _ms(_percentile(post_seconds, 95)),
+        "replies": len(reply_seconds) if fake else None,
+        "reply_p50_ms": _ms(_percentile(reply_seconds, 50)) if fake else None,
+        "reply_p95_ms": _ms(_percentile(reply_seconds, 95)) if fake else None,
+    }
+
+
+async def run_local(updates: list[dict], repeat: int, port: int, secret_token: str) -> dict:
+    """Справжній webhook-сервер PTB з обробниками бота та фейковим Bot API."""
+    fake = FakeBotApiRequest()
+    application = (
+        Application.builder()
+        .token(os.environ["TELEGRAM_BOT_TOKEN"])
+        .request(fake)
+        .get_updates_request(FakeBotApiRequest())
+        .build()
+    )
+    register_handlers(application)
+    url_path = "telegram"
+    url = f"http://127.0.0.1:{port}/{url_path}"
+    await application.initialize()
+    await application.updater.start_webhook(
+        listen="127.0.0.1", port=port, url_path=url_path, webhook_url=url, secret_token=secret_token
+    )
+    await application.start()
+    try:
+        result = await replay(url, updates, repeat, secret_token, fake)
+        result["bot_calls"] = sorted({endpoint for _, endpoint in fake.calls})
+        return result
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay recorded Telegram updates against the webhook server.")
+    parser.add_argument("--updates", default=DEFAULT_UPDATES_PATH, help="JSON array or JSON lines with Update objects")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times to replay the whole file")
+    parser.add_argument("--url", help="webhook of an already running bot; without it a local server is started")
+    parser.add_argument("--port", type=int, default=8787, help="port of the local webhook server")
+    parser.add_argument("--secret-token", default="replay-secret", help="value of the secret token header")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    recorded = load_updates(arguments.updates)
+    if arguments.url:
+        measured = asyncio.run(replay(arguments.url, recorded, arguments.repeat, arguments.secret_token or None))
+    else:
+        measured = asyncio.run(run_local(recorded, arguments.repeat, arguments.port, arguments.secret_token))
+    if arguments.json:
+        json.dump(measured, sys.stdout, indent=2)
+        print()
+    else:
+        for key, value in measured.items():
+            print(f"{key:>20}: {value}")
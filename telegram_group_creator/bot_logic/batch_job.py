@@ -0,0 +1,199 @@
+import html
+import logging
+
+from telegram import Bot
+
+from .message_texts import (
+    INFO_GROUP_CREATED_SUCCESS, INFO_ALL_GROUPS_CREATED, INFO_MORE_ERRORS, INFO_JOB_PAUSED,
+    ERROR_TELETHON_CONNECTION, ERROR_GROUP_CREATION, ERROR_GENERAL, get_request_summary
+)
+from .progress_message import ProgressMessage
+from core.config import BOT_TO_ADD, GROUP_CREATION_CONCURRENCY, PROGRESS_EDIT_INTERVAL, BATCH_REQUEST_BUDGET
+from core.batch_executor import BatchExecutor
+from core.metrics import GROUP_PHASE_SECONDS, GROUPS_PROCESSED
+from core.group_index import GroupIndex, IndexedGroup
+from core.job_store import JobStore, JobItem, ITEM_PENDING, ITEM_DONE, ITEM_FAILED
+from core.request_accounting import ACCOUNTING, BatchUsage, BudgetExceededError, current_batch, current_group
+from core.session_pool import SessionPool
+from utils.helpers import format_list_html
+
+logger = logging.getLogger(__name__)
+
+# Скільки символів помилок вміщується у фінальний підсумок (ліміт повідомлення — 4096,
+# частину займає підсумок запитів до API)
+SUMMARY_ERRORS_MAX_CHARS = 3200
+
+
+async def run_creation_job(bot: Bot, session_pool: SessionPool, job_store: JobStore, job_id: str,
+                           group_index: GroupIndex | None = None) -> None:
+    """
+    Виконує (або продовжує) збережений батч створення груп.
+
+    Заклади, завершені в попередньому запуску, пропускаються; для незавершених
+    створення продовжується з останньої контрольної точки, тож групи не дублюються.
+    Кожна створена група записується в group_index для пошуку дублікатів у наступних батчах.
+    """
+    # Telethon потрібен лише для виконання батчу, тому модуль створення груп імпортується тут
+    from core.telethon_client import create_telegram_group
+
+    job = job_store.get_job(job_id)
+    if job is None:
+        logger.error("Job %s not found in the job store.", job_id)
+        return
+    user_id = job.user_id
+    # Заклади не завантажуються всі одразу: лічильники рахує база, а незавершені
+    # заклади читаються сторінками по мірі того, як BatchExecutor бере нові
+    counts = job_store.count_items(job_id)
+    total_groups = sum(counts.values())
+    pending = job_store.iter_items(job_id, status=ITEM_PENDING)
+    logger.info("Job %s started: %s/%s venues pending.", job_id, counts[ITEM_PENDING], total_groups)
+    # Одне повідомлення про прогрес, що редагується, замість окремих повідомлень на кожну групу
+    progress_message = ProgressMessage(
+        bot, user_id, total_groups, PROGRESS_EDIT_INTERVAL,
+        created=counts[ITEM_DONE], failed=counts[ITEM_FAILED]
+    )
+
+    # Усі запити, зроблені з цього контексту (і з задач, створених у ньому), зараховуються батчу
+    usage = ACCOUNTING.start_batch(job_id, BATCH_REQUEST_BUDGET)
+    batch_token = current_batch.set(job_id)
+    try:
+        # Збій Bot API тут не зупиняє батч: ProgressMessage лише пише попередження
+        await progress_message.start()
+
+        # Перевіряємо підключення один раз до старту, щоб не запускати батч без авторизації
+        await session_pool.ensure_available()
+
+        async def create_one(index: int, item: JobItem) -> tuple[bool, str | int | None, str | None, str] | BudgetExceededError:
+            progress = item.progress
+            already_created = progress.chat_id is not None
+            # Кожна задача BatchExecutor має власний контекст, тож тег групи не змішується з іншими
+            current_group.set(item.index)
+            # Якщо група може не вкластися в бюджет — батч стає на паузу (reserve пише про це в лог один раз),
+            # а заклад лишається в очікуванні. Помилка повертається як результат, а не як збій групи
+            try:
+                usage.reserve(item.index)
+            except BudgetExceededError as e:
+                return e
+            try:
+                # Вже створену групу дозавершує той самий акаунт (чат існує лише в нього);
+                # нову — акаунт з найбільшим залишком ліміту і без FloodWait
+                account = await session_pool.acquire(item.account if already_created else None)
+            except BaseException:
+                usage.release(item.index)
+                raise
+            try:
+                # Повертає той самий клієнт; перепідключає його, якщо з'єднання обірвалося
+                client = await account.get_client()
+                with GROUP_PHASE_SECONDS.time(phase="total"):
+                    success, group_info, error_msg = await create_telegram_group(
+                        client=client,
+                        entity_cache=account.entity_cache,
+                        rate_limiter=account.rate_limiter,
+                        group_name=item.name,
+                        # Менеджери з рядка файлу мають пріоритет над менеджерами батчу
+                        manager_usernames=item.managers if item.managers is not None else job.managers,
+                        bot_username=BOT_TO_ADD,
+                        uid_code=item.uid,
+                        progress=progress,
+                        # Контрольна точка після кожного успішного кроку
+                        on_progress=lambda p: job_store.save_progress(job_id, item.index, account.session_name, p)
+                    )
+            finally:
+                usage.release(item.index)
+                # Група зараховується в ліміт акаунта, якщо чат було створено в цьому запуску
+                session_pool.release(account, created=not already_created and progress.chat_id is not None)
+            if group_info is not None:
+                logger.info(
+                    "Group '%s' (ID: %s) was created by account '%s' with %s MTProto requests.",
+                    item.name, group_info, account.session_name, usage.by_group[item.index]
+                )
+            return success, group_info, error_msg, account.session_name
+
+        async def report_result(index: int, item: JobItem, result) -> None:
+            if isinstance(result, BudgetExceededError):
+                # Заклад лишається в очікуванні і буде оброблений після /resume
+                return
+            if isinstance(result, Exception):
+                # Збій однієї групи не зупиняє батч — звітуємо як звичайну помилку
+                success, group_info, error_msg, account_name = False, None, str(result), None
+            else:
+                success, group_info, error_msg, account_name = result
+            job_store.finish_item(job_id, item.index, success, error_msg)
+            GROUPS_PROCESSED.inc(result="created" if success else "failed")
+            # Група існує, навіть якщо наступні кроки не вдалися — повторно її створювати не можна
+            if group_index is not None and item.progress.chat_id is not None:
+                group_index.add(IndexedGroup(item.progress.chat_id, item.name, item.uid, account_name))
+
+            name = html.escape(item.name)
+            if success:
+                success_msg = INFO_GROUP_CREATED_SUCCESS.format(name=name, uid=html.escape(item.uid))
+                if isinstance(group_info, int):
+                     success_msg += f" (ID: <code>{group_info}</code>)"
+                if len(session_pool.accounts) > 1:
+                     success_msg += f" [акаунт: <code>{account_name}</code>]"
+                progress_message.record(True, success_msg)
+                logger.info("Group '%s' created successfully for user %s. Info: %s", item.name, user_id, group_info)
+            else:
+                error_log = ERROR_GROUP_CREATION.format(group_name=name, error=html.escape(str(error_msg)))
+                logger.error("Failed to create group '%s' for user %s: %s", item.name, user_id, error_msg)
+                progress_message.record(False, error_log)
+
+        # Групи створюються паралельно, але результати звітуються в порядку введення
+        executor = BatchExecutor(GROUP_CREATION_CONCURRENCY)
+        # Після паузи за бюджетом нові заклади не запускаються
+        await executor.run(pending, create_one, on_result=report_result, should_stop=lambda: usage.paused)
+
+    except ConnectionError as e:
+         # Задача лишається незавершеною і буде продовжена після перезапуску
+         logger.error("Telethon connection/authentication error for job %s (user %s): %s", job_id, user_id, e)
+         await progress_message.finish(f"{ERROR_TELETHON_CONNECTION}\n<i>{html.escape(str(e))}</i>")
+         return
+    except Exception as e:
+         logger.exception("Unexpected error during job %s for user %s: %s", job_id, user_id, e)
+         await progress_message.finish(f"{ERROR_GENERAL}\n<i>{html.escape(str(e))}</i>")
+         return
+    finally:
+        current_batch.reset(batch_token)
+        ACCOUNTING.end_batch(job_id)
+        _log_request_usage(job_id, usage)
+
+    request_summary = get_request_summary(usage.total, dict(usage.by_method), usage.groups_finished)
+    if usage.paused:
+        job_store.pause_job(job_id)
+        counts = job_store.count_items(job_id)
+        await progress_message.finish(
+            INFO_JOB_PAUSED.format(job_id=job_id, budget=usage.budget, created=counts[ITEM_DONE], total=total_groups)
+            + "\n\n" + request_summary
+        )
+        return
+
+    job_store.finish_job(job_id)
+
+    # --- Фінальне повідомлення (з урахуванням закладів, завершених до перезапуску) ---
+    counts = job_store.count_items(job_id)
+    created_count, failed_count = counts[ITEM_DONE], counts[ITEM_FAILED]
+    final_message = f"Завершено. Створено {created_count} з {total_groups} груп."
+    if failed_count:
+         final_message += "\n\nВиникли наступні помилки:\n"
+         shown, length = [], 0
+         # Читаємо лише ті помилки, що вміщуються в повідомлення
+         for item in job_store.iter_items(job_id, status=ITEM_FAILED):
+             error = f"Помилка для '{item.name}': {item.error}"
+             length += len(error) + 3
+             if length > SUMMARY_ERRORS_MAX_CHARS:
+                 break
+             shown.append(error)
+         final_message += format_list_html(shown)
+         if len(shown) < failed_count:
+             final_message += "\n" + INFO_MORE_ERRORS.format(count=failed_count - len(shown))
+    elif created_count == total_groups and total_groups > 0:
+        final_message = INFO_ALL_GROUPS_CREATED
+
+    await progress_message.finish(f"{final_message}\n\n{request_summary}")
+
+
+def _log_request_usage(job_id: str, usage: BatchUsage) -> None:
+    """Пише в лог, скільки MTProto-запитів коштував запуск батчу, з розбивкою за методами."""
+    per_group = f", {usage.total / usage.groups_finished:.1f} per group" if usage.groups_finished else ""
+    methods = ", ".join(f"{method}={count}" for method, count in usage.by_method.most_common())
+    logger.info("Job %s made %s MTProto requests%s: %s.", job_id, usage.total, per_group, methods or 'none')
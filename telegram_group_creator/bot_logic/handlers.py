@@ -1,7 +1,14 @@
+import asyncio
+import html
 import logging
+import math
+import os
+import sqlite3
+import tempfile
 
-from telegram import Update, ReplyKeyboardRemove
+from telegram import Update, ReplyKeyboardRemove, InlineKeyboardMarkup
 from telegram.constants import ParseMode
+from telegram.error import TelegramError
 
 
 from telegram.ext import (
@@ -15,35 +22,46 @@ from .states import (
 )
 from .keyboards import (
     get_start_keyboard, get_confirmation_keyboard,
-    CALLBACK_STEP_BY_STEP, CALLBACK_BULK, CALLBACK_CONFIRM_CREATE, CALLBACK_GO_BACK
+    CALLBACK_STEP_BY_STEP, CALLBACK_BULK, CALLBACK_CONFIRM_CREATE, CALLBACK_GO_BACK, CALLBACK_PLAN,
+    CALLBACK_PAGE_PREFIX, CALLBACK_SKIP_DUPLICATES
 )
 from .message_texts import (
-    WELCOME_MESSAGE, STEP_1_MANAGERS_PROMPT, STEP_2_NAMES_PROMPT, STEP_3_UIDS_PROMPT,
+    WELCOME_MESSAGE, get_managers_prompt, STEP_2_NAMES_PROMPT, STEP_3_UIDS_PROMPT,
     BULK_INPUT_PROMPT, get_confirmation_message, ERROR_UID_NAME_MISMATCH,
     ERROR_INVALID_MANAGER_INPUT, ERROR_INVALID_BULK_FORMAT, ERROR_PARSING_BULK_SECTION,
-    INFO_CREATING_GROUPS_START, INFO_CREATING_GROUP_PROGRESS, INFO_GROUP_CREATED_SUCCESS,
-    INFO_ALL_GROUPS_CREATED, CANCEL_MESSAGE, RESTART_MESSAGE, SELECT_MODE_PROMPT,
-    ERROR_TELETHON_CONNECTION, ERROR_GROUP_CREATION, ERROR_GENERAL, ERROR_ACCESS_DENIED
+    INFO_JOB_QUEUED, CANCEL_MESSAGE, RESTART_MESSAGE, SELECT_MODE_PROMPT,
+    ERROR_TELETHON_CONNECTION, ERROR_ACCESS_DENIED, ERROR_STATUS_USAGE, ERROR_JOB_NOT_FOUND,
+    ERROR_RESUME_USAGE, ERROR_JOB_NOT_PAUSED, get_job_status_message, get_plan_message,
+    ERROR_UNSUPPORTED_DOCUMENT, ERROR_DOCUMENT_TOO_LARGE, ERROR_INVALID_DOCUMENT, ERROR_BOT_UNRESOLVED,
+    ERROR_DOCUMENT_UPLOAD, INFO_DUPLICATES_SKIPPED, INFO_ALL_DUPLICATES,
+    CONFIRMATION_PAGE_SIZE, get_jobs_list_message
 )
-from core.config import (
-    API_ID, API_HASH, SESSION_NAME, BOT_TO_ADD, ALLOWED_USER_IDS
-)
-from core.parser import parse_managers, parse_names, parse_uids, parse_bulk_message
-from core.telethon_client import create_telegram_group
-from utils.helpers import format_list_html
+from .job_runner import BOT_DATA_KEY as JOB_RUNNER_KEY, STATE_QUEUED, STATE_RUNNING
+from core.batch_planner import build_plan
+from core.entity_cache import EntityCache
+from core.preflight import run_preflight
+from core.config import ALLOWED_USER_IDS, BOT_TO_ADD
+from core.job_store import BOT_DATA_KEY as JOB_STORE_KEY, JOB_DONE, JOB_PAUSED, ITEM_PENDING
+from core.document_parser import VenueFileReader, SUPPORTED_EXTENSIONS
+from core.parser import parse_managers, parse_names, parse_uids, parse_bulk_message, BulkParseError
+from core.session_pool import BOT_DATA_KEY as SESSION_POOL_KEY
+from core.group_index import BOT_DATA_KEY as GROUP_INDEX_KEY
 
 logger = logging.getLogger(__name__)
 
+# Найбільший файл, який Bot API дозволяє завантажити боту (getFile)
+MAX_DOCUMENT_SIZE = 20 * 1024 * 1024
+
 # --- Access Control Decorator ---
 def restricted(func):
     """Декоратор для перевірки, чи ID користувача є у списку дозволених."""
     async def wrapped(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
         user_id = update.effective_user.id
         if user_id not in ALLOWED_USER_IDS:
-            logger.warning(f"Unauthorized access attempt by user ID: {user_id}")
+            logger.warning("Unauthorized access attempt by user ID: %s", user_id)
             await update.message.reply_text(ERROR_ACCESS_DENIED)
             return None # Або ConversationHandler.END, якщо використовується всередині діалогу
-        logger.info(f"Authorized access granted for user ID: {user_id}")
+        logger.info("Authorized access granted for user ID: %s", user_id)
         return await func(update, context, *args, **kwargs)
     return wrapped
 
@@ -52,7 +70,8 @@ def restricted(func):
 @restricted
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обробник команди /start. Починає діалог."""
-    logger.info(f"User {update.effective_user.id} started the conversation.")
+    logger.info("User %s started the conversation.", update.effective_user.id)
+    _discard_draft(context)
     context.user_data.clear() # Очищаємо дані попередньої сесії
     await update.message.reply_text(
         WELCOME_MESSAGE,
@@ -65,14 +84,14 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 async def select_mode_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обробляє вибір режиму (покроково / одним повідомленням)."""
     query = update.callback_query
-    logger.info(f"Received callback query with data: {query.data}")
+    logger.info("Received callback query with data: %s", query.data)
     await query.answer() # Важливо відповісти на запит
     mode = query.data
 
     if mode == CALLBACK_STEP_BY_STEP:
         logger.info("User selected step-by-step mode")
         await query.edit_message_text(
-            STEP_1_MANAGERS_PROMPT,
+            get_managers_prompt(),
             parse_mode=ParseMode.HTML
         )
         return AWAITING_MANAGERS
@@ -84,17 +103,18 @@ async def select_mode_callback(update: Update, context: ContextTypes.DEFAULT_TYP
         )
         return AWAITING_BULK_MESSAGE
     elif mode == CALLBACK_GO_BACK: # Обробка кнопки "Почати заново"
-        logger.info(f"User {update.effective_user.id} chose to restart.")
+        logger.info("User %s chose to restart.", update.effective_user.id)
         await query.edit_message_text(RESTART_MESSAGE)
         await query.message.reply_text(
              WELCOME_MESSAGE,
              reply_markup=get_start_keyboard(),
              parse_mode=ParseMode.HTML
         )
+        _discard_draft(context)
         context.user_data.clear()
         return SELECTING_MODE
     else:
-        logger.warning(f"Unexpected callback data received: {mode}")
+        logger.warning("Unexpected callback data received: %s", mode)
         await query.edit_message_text(
             "Невідомий режим. Будь ласка, виберіть один з доступних режимів.",
             reply_markup=get_start_keyboard()
@@ -106,19 +126,19 @@ async def select_mode_callback(update: Update, context: ContextTypes.DEFAULT_TYP
 async def handle_managers(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обробляє введення менеджерів."""
     user_input = update.message.text
-    logger.debug(f"Received manager input from {update.effective_user.id}: {user_input}")
+    logger.debug("Received manager input from %s: %s", update.effective_user.id, user_input)
     managers, errors = parse_managers(user_input)
 
     if errors:
-        logger.warning(f"Invalid manager input from {update.effective_user.id}: {errors}")
+        logger.warning("Invalid manager input from %s: %s", update.effective_user.id, errors)
         error_message = ERROR_INVALID_MANAGER_INPUT + "\n\n" + "\n".join(errors)
         await update.message.reply_text(error_message, parse_mode=ParseMode.HTML)
         # Залишаємося в тому ж стані, щоб користувач спробував ще раз
-        await update.message.reply_text(STEP_1_MANAGERS_PROMPT, parse_mode=ParseMode.HTML)
+        await update.message.reply_text(get_managers_prompt(), parse_mode=ParseMode.HTML)
         return AWAITING_MANAGERS
 
     context.user_data['managers'] = managers
-    logger.info(f"User {update.effective_user.id} selected managers: {managers}")
+    logger.info("User %s selected managers: %s", update.effective_user.id, managers)
     await update.message.reply_text(STEP_2_NAMES_PROMPT, parse_mode=ParseMode.HTML) # Change to HTML
     return AWAITING_NAMES
 
@@ -126,16 +146,16 @@ async def handle_managers(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 async def handle_names(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обробляє введення назв закладів."""
     user_input = update.message.text
-    logger.debug(f"Received names input from {update.effective_user.id}: {user_input}")
+    logger.debug("Received names input from %s: %s", update.effective_user.id, user_input)
     names = parse_names(user_input)
 
     if not names:
-        logger.warning(f"Empty names input from {update.effective_user.id}")
+        logger.warning("Empty names input from %s", update.effective_user.id)
         await update.message.reply_text("Будь ласка, введіть хоча б одну назву закладу.")
         return AWAITING_NAMES # Залишаємося тут
 
     context.user_data['names'] = names
-    logger.info(f"User {update.effective_user.id} provided names: {names}")
+    logger.info("User %s provided names: %s", update.effective_user.id, names)
     await update.message.reply_text(STEP_3_UIDS_PROMPT, parse_mode=ParseMode.HTML)
     return AWAITING_UIDS
 
@@ -143,17 +163,17 @@ async def handle_names(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 async def handle_uids(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обробляє введення UID та переходить до підтвердження."""
     user_input = update.message.text
-    logger.debug(f"Received UIDs input from {update.effective_user.id}: {user_input}")
+    logger.debug("Received UIDs input from %s: %s", update.effective_user.id, user_input)
     uids = parse_uids(user_input)
     names = context.user_data.get('names', [])
 
     if not uids:
-         logger.warning(f"Empty UIDs input from {update.effective_user.id}")
+         logger.warning("Empty UIDs input from %s", update.effective_user.id)
          await update.message.reply_text("Будь ласка, введіть хоча б один UID.")
          return AWAITING_UIDS # Залишаємося тут
 
     if len(uids) != len(names):
-        logger.warning(f"UID/Name count mismatch for user {update.effective_user.id}. Names: {len(names)}, UIDs: {len(uids)}")
+        logger.warning("UID/Name count mismatch for user %s. Names: %s, UIDs: %s", update.effective_user.id, len(names), len(uids))
         error_msg = ERROR_UID_NAME_MISMATCH.format(uid_count=len(uids), name_count=len(names))
         await update.message.reply_text(error_msg, parse_mode=ParseMode.HTML)
         # Запитуємо UID знову
@@ -161,14 +181,17 @@ async def handle_uids(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         return AWAITING_UIDS
 
     context.user_data['uids'] = uids
-    logger.info(f"User {update.effective_user.id} provided UIDs: {uids}")
+    logger.info("User %s provided UIDs: %s", update.effective_user.id, uids)
+
+    if not await _preflight(update, context, context.user_data.get('managers', [])):
+        return ConversationHandler.END
+    await _find_duplicates(context)
 
     # Перехід до підтвердження
-    managers = context.user_data.get('managers', [])
-    confirmation_text = get_confirmation_message(managers, names, uids)
+    confirmation_text, keyboard = _render_confirmation_page(context, 0)
     await update.message.reply_text(
         confirmation_text,
-        reply_markup=get_confirmation_keyboard(),
+        reply_markup=keyboard,
         parse_mode=ParseMode.HTML # Використовуємо HTML тут
     )
     return CONFIRMATION
@@ -179,36 +202,281 @@ async def handle_bulk_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     """Обробляє одне повідомлення з усіма даними."""
     user_input = update.message.text
     user_id = update.effective_user.id
-    logger.debug(f"Received bulk message input from {user_id}:\n{user_input}")
+    logger.debug("Received bulk message input from %s:\n%s", user_id, user_input)
 
     try:
         parsed_data = parse_bulk_message(user_input)
         context.user_data['managers'] = parsed_data['managers']
         context.user_data['names'] = parsed_data['names']
         context.user_data['uids'] = parsed_data['uids']
-        logger.info(f"Successfully parsed bulk message from {user_id}.")
-
-        # Перехід до підтвердження
-        confirmation_text = get_confirmation_message(
-            parsed_data['managers'], parsed_data['names'], parsed_data['uids']
-        )
-        await update.message.reply_text(
-            confirmation_text,
-            reply_markup=get_confirmation_keyboard(),
-            parse_mode=ParseMode.HTML
-        )
-        return CONFIRMATION
-
+        logger.info("Successfully parsed bulk message from %s.", user_id)
     except ValueError as e:
         error_message = str(e)
-        logger.warning(f"Failed to parse bulk message from {user_id}: {error_message}")
+        logger.warning("Failed to parse bulk message from %s: %s", user_id, error_message)
         # Повідомляємо користувача про помилку парсингу
-        full_error_message = f"{ERROR_INVALID_BULK_FORMAT}\n\n<i>Деталі: {error_message}</i>"
+        full_error_message = f"{ERROR_INVALID_BULK_FORMAT}\n\n<i>Деталі:\n{html.escape(error_message)}</i>"
         await update.message.reply_text(full_error_message, parse_mode=ParseMode.HTML)
         # Просимо спробувати ще раз
         await update.message.reply_text(BULK_INPUT_PROMPT, parse_mode=ParseMode.HTML)
         return AWAITING_BULK_MESSAGE # Залишаємося у стані очікування
 
+    if not await _preflight(update, context, parsed_data['managers']):
+        return ConversationHandler.END
+    await _find_duplicates(context)
+
+    # Перехід до підтвердження
+    confirmation_text, keyboard = _render_confirmation_page(context, 0)
+    await update.message.reply_text(
+        confirmation_text,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.HTML
+    )
+    return CONFIRMATION
+
+# --- Bulk Document Handling (CSV/XLSX) ---
+def _discard_draft(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Видаляє незапущену чернетку з файлу, якщо діалог скасовано або почато заново."""
+    draft_job_id = context.user_data.pop('draft_job_id', None)
+    job_store = context.bot_data.get(JOB_STORE_KEY)
+    if draft_job_id and job_store is not None:
+        job_store.delete_job(draft_job_id)
+
+async def handle_bulk_document(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """
+    Обробляє CSV/XLSX зі списком закладів.
+
+    Файл читається потоково й одразу записується в сховище задач як чернетка,
+    тож у user_data зберігається лише її ID, а не списки назв і UID.
+    """
+    document = update.message.document
+    user_id = update.effective_user.id
+    extension = os.path.splitext(document.file_name or "")[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        await update.message.reply_text(ERROR_UNSUPPORTED_DOCUMENT)
+        return AWAITING_BULK_MESSAGE
+    if document.file_size and document.file_size > MAX_DOCUMENT_SIZE:
+        await update.message.reply_text(ERROR_DOCUMENT_TOO_LARGE.format(max_mb=MAX_DOCUMENT_SIZE // (1024 * 1024)))
+        return AWAITING_BULK_MESSAGE
+
+    # Менеджери для всіх закладів можна вказати в підписі ("1, 3 @user" або "Користувачі: 1, 3")
+    caption = (update.message.caption or "").split(":", 1)[-1]
+    managers, manager_errors = parse_managers(caption)
+    if manager_errors:
+        await update.message.reply_text(
+            f"{ERROR_INVALID_MANAGER_INPUT}\n" + "\n".join(html.escape(error) for error in manager_errors),
+            parse_mode=ParseMode.HTML
+        )
+        return AWAITING_BULK_MESSAGE
+
+    job_store = context.bot_data.get(JOB_STORE_KEY)
+    if job_store is None:
+        await update.message.reply_text(ERROR_TELETHON_CONNECTION, parse_mode=ParseMode.HTML)
+        return AWAITING_BULK_MESSAGE
+
+    fd, path = tempfile.mkstemp(suffix=extension)
+    os.close(fd)
+    custom_managers = 0
+    max_row_managers = 0
+    file_managers: set[str] = set()
+    try:
+        telegram_file = await document.get_file()
+        await telegram_file.download_to_drive(path)
+        reader = VenueFileReader(path)
+
+        def venues():
+            nonlocal custom_managers, max_row_managers
+            for venue in reader:
+                if venue.managers is not None:
+                    custom_managers += 1
+                    max_row_managers = max(max_row_managers, len(venue.managers))
+                    file_managers.update(venue.managers)
+                yield venue.name, venue.uid, venue.managers
+
+        # Файл читається під час запису (генератор), тож розбір і вставка великого файлу
+        # разом ідуть у робочому потоці й не блокують цикл подій
+        job_id, total = await asyncio.to_thread(job_store.create_draft, user_id, managers, venues())
+    except (TelegramError, sqlite3.Error, OSError) as e:
+        # Обробника помилок у застосунку немає: без відповіді користувач лишився б без реакції на файл
+        logger.error("Could not load venue file '%s' from %s: %s", document.file_name, user_id, e)
+        await update.message.reply_text(
+            ERROR_DOCUMENT_UPLOAD.format(error=html.escape(str(e))), parse_mode=ParseMode.HTML
+        )
+        return AWAITING_BULK_MESSAGE
+    finally:
+        os.remove(path)
+
+    if reader.errors:
+        await asyncio.to_thread(job_store.delete_job, job_id)
+        logger.warning("Rejected venue file '%s' from %s: %s errors.", document.file_name, user_id, len(reader.errors))
+        details = BulkParseError(reader.errors).format()
+        await update.message.reply_text(
+            f"{ERROR_INVALID_DOCUMENT}\n\n<i>{html.escape(details)}</i>", parse_mode=ParseMode.HTML
+        )
+        return AWAITING_BULK_MESSAGE
+
+    _discard_draft(context)
+    context.user_data['draft_job_id'] = job_id
+    context.user_data['managers'] = managers
+    context.user_data['custom_managers'] = custom_managers
+    # Менеджери з рядків файлу потрібні лише для плану батчу (самі списки лежать у чернетці)
+    context.user_data['file_managers'] = sorted(file_managers - set(managers))
+    context.user_data['max_row_managers'] = max_row_managers
+    logger.info("User %s uploaded '%s' with %s venues (draft job %s).", user_id, document.file_name, total, job_id)
+
+    if not await _preflight(update, context, managers + context.user_data['file_managers']):
+        return ConversationHandler.END
+    await _find_duplicates(context)
+
+    confirmation_text, keyboard = _render_confirmation_page(context, 0)
+    await update.message.reply_text(confirmation_text, reply_markup=keyboard, parse_mode=ParseMode.HTML)
+    return CONFIRMATION
+
+# --- Pre-flight ---
+async def _preflight(update: Update, context: ContextTypes.DEFAULT_TYPE, usernames: list[str]) -> bool:
+    """
+    Перед підтвердженням один раз резолвить бота та менеджерів і перевіряє акаунти Telethon.
+
+    Якщо батч запускати не можна (немає акаунтів, бот не знайдений), повідомляє користувача,
+    очищає дані діалогу й повертає False. Не знайдені менеджери прибираються зі списку,
+    а тих, кого не вдалося перевірити (FloodWait, мережа), батч перевірить сам; обидві
+    групи показуються на екрані підтвердження.
+    """
+    user_id = update.effective_user.id
+    session_pool = context.bot_data.get(SESSION_POOL_KEY)
+    try:
+        if session_pool is None:
+            raise ConnectionError("Telethon клієнт не ініціалізовано.")
+        result = await run_preflight(session_pool, BOT_TO_ADD, usernames)
+    except ConnectionError as e:
+        logger.error("Pre-flight failed for user %s: %s", user_id, e)
+        await update.message.reply_text(f"{ERROR_TELETHON_CONNECTION}\n<i>{html.escape(str(e))}</i>", parse_mode=ParseMode.HTML)
+        _discard_draft(context)
+        context.user_data.clear()
+        return False
+
+    if result.bot_unresolved:
+        logger.error("Pre-flight for user %s: bot %s is not resolvable.", user_id, BOT_TO_ADD)
+        await update.message.reply_text(ERROR_BOT_UNRESOLVED.format(bot=html.escape(BOT_TO_ADD)), parse_mode=ParseMode.HTML)
+        _discard_draft(context)
+        context.user_data.clear()
+        return False
+
+    context.user_data['unresolved'] = result.unresolved
+    # Невідомих менеджерів не передаємо в батч, щоб він не шукав їх заново для кожної групи.
+    # Pre-flight зводить юзернейми до одного написання, тож порівнюємо нормалізовані
+    missing = {EntityCache.normalize(username) for username in result.missing}
+    managers = context.user_data.get('managers', [])
+    context.user_data['managers'] = [m for m in managers if EntityCache.normalize(m) not in missing]
+    if missing:
+        logger.warning("Pre-flight for user %s: participants not found %s.", user_id, sorted(result.missing))
+        # Чернетка з файлу вже містить менеджерів батчу та рядків — прибираємо їх і там,
+        # бо батч бере менеджерів саме з чернетки
+        file_managers = context.user_data.get('file_managers', [])
+        dropped = {m for m in managers + file_managers if EntityCache.normalize(m) in missing}
+        context.user_data['file_managers'] = [m for m in file_managers if m not in dropped]
+        draft_job_id = context.user_data.get('draft_job_id')
+        if dropped and draft_job_id is not None:
+            changed = await asyncio.to_thread(context.bot_data[JOB_STORE_KEY].drop_item_managers, draft_job_id, dropped)
+            logger.info("Removed unknown managers from draft job %s (%s venues with own managers).", draft_job_id, changed)
+    unverified = sorted(set(result.unresolved) - set(result.missing))
+    if unverified:
+        logger.warning("Pre-flight for user %s: could not verify %s, keeping them in the batch.", user_id, unverified)
+    return True
+
+# --- Duplicates ---
+async def _find_duplicates(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Шукає в індексі груп заклади батчу, для яких група вже існує (одним запитом на весь батч).
+    Прохід по великій чернетці та JOIN займають секунди, тож перевірка йде в робочому потоці.
+    """
+    group_index = context.bot_data.get(GROUP_INDEX_KEY)
+    if group_index is None:
+        return
+    draft_job_id = context.user_data.get('draft_job_id')
+    if draft_job_id is not None:
+        venues = ((item.index, item.name, item.uid) for item in context.bot_data[JOB_STORE_KEY].iter_items(draft_job_id))
+    else:
+        venues = (
+            (position, name, uid)
+            for position, (name, uid) in enumerate(zip(context.user_data.get('names', []), context.user_data.get('uids', [])))
+        )
+    duplicates = await asyncio.to_thread(group_index.find_duplicates, venues)
+    context.user_data['duplicates'] = [duplicates[key] for key in sorted(duplicates)]
+
+async def skip_duplicates_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Прибирає з батчу заклади, для яких групи вже існують."""
+    query = update.callback_query
+    await query.answer()
+    duplicates = context.user_data.pop('duplicates', [])
+    keys = {duplicate.key for duplicate in duplicates}
+    draft_job_id = context.user_data.get('draft_job_id')
+    if draft_job_id is not None:
+        await asyncio.to_thread(context.bot_data[JOB_STORE_KEY].delete_items, draft_job_id, keys)
+    else:
+        kept = [
+            (name, uid) for position, (name, uid) in enumerate(zip(context.user_data.get('names', []), context.user_data.get('uids', [])))
+            if position not in keys
+        ]
+        context.user_data['names'] = [name for name, _ in kept]
+        context.user_data['uids'] = [uid for _, uid in kept]
+    logger.info("User %s skipped %s venues with existing groups.", update.effective_user.id, len(keys))
+
+    if _venue_count(context) == 0:
+        await query.edit_message_text(INFO_ALL_DUPLICATES)
+        _discard_draft(context)
+        context.user_data.clear()
+        return ConversationHandler.END
+    text, keyboard = _render_confirmation_page(context, 0)
+    await query.edit_message_text(
+        f"{INFO_DUPLICATES_SKIPPED.format(count=len(keys))}\n{text}", reply_markup=keyboard, parse_mode=ParseMode.HTML
+    )
+    return CONFIRMATION
+
+# --- Confirmation Pages ---
+def _venue_count(context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Кількість закладів у діалозі: з чернетки у сховищі (файл) або зі списків у user_data."""
+    draft_job_id = context.user_data.get('draft_job_id')
+    if draft_job_id is not None:
+        return context.bot_data[JOB_STORE_KEY].count_items(draft_job_id)[ITEM_PENDING]
+    return len(context.user_data.get('names', []))
+
+def _render_confirmation_page(context: ContextTypes.DEFAULT_TYPE, page: int,
+                              show_plan: bool = True) -> tuple[str, InlineKeyboardMarkup]:
+    """Рендерить лише одну сторінку підтвердження: читає зі сховища чи user_data тільки її заклади."""
+    total = _venue_count(context)
+    page_count = max(1, math.ceil(total / CONFIRMATION_PAGE_SIZE))
+    page = min(max(page, 0), page_count - 1)
+    offset = page * CONFIRMATION_PAGE_SIZE
+    draft_job_id = context.user_data.get('draft_job_id')
+    if draft_job_id is not None:
+        items = context.bot_data[JOB_STORE_KEY].get_items(draft_job_id, limit=CONFIRMATION_PAGE_SIZE, offset=offset)
+        venues = [(item.name, item.uid) for item in items]
+    else:
+        names = context.user_data.get('names', [])[offset:offset + CONFIRMATION_PAGE_SIZE]
+        uids = context.user_data.get('uids', [])[offset:offset + CONFIRMATION_PAGE_SIZE]
+        venues = list(zip(names, uids))
+    context.user_data['confirmation_page'] = page
+    context.user_data.pop('showing_plan', None)
+    duplicates = context.user_data.get('duplicates', [])
+    text = get_confirmation_message(
+        context.user_data.get('managers', []), venues, total, page, page_count,
+        context.user_data.get('custom_managers', 0), context.user_data.get('unresolved'), duplicates
+    )
+    return text, get_confirmation_keyboard(page, page_count, show_plan, len(duplicates))
+
+async def confirmation_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Гортає сторінки підтвердження (◀️/▶️) і повертає до списку з екрана плану."""
+    query = update.callback_query
+    await query.answer()
+    page = int(query.data[len(CALLBACK_PAGE_PREFIX):])
+    # Кнопка з номером поточної сторінки нічого не змінює (крім повернення з екрана плану)
+    if page == context.user_data.get('confirmation_page') and not context.user_data.pop('showing_plan', False):
+        return CONFIRMATION
+    context.user_data.pop('showing_plan', None)
+    text, keyboard = _render_confirmation_page(context, page)
+    await query.edit_message_text(text, reply_markup=keyboard, parse_mode=ParseMode.HTML)
+    return CONFIRMATION
+
 # --- Confirmation Callback & Group Creation Trigger ---
 async def confirm_creation_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обробляє кнопку підтвердження та запускає створення груп."""
@@ -217,91 +485,61 @@ async def confirm_creation_callback(update: Update, context: ContextTypes.DEFAUL
     user_id = update.effective_user.id
 
     if query.data == CALLBACK_CONFIRM_CREATE:
-        logger.info(f"User {user_id} confirmed group creation.")
+        logger.info("User %s confirmed group creation.", user_id)
         managers = context.user_data.get('managers', [])
         names = context.user_data.get('names', [])
         uids = context.user_data.get('uids', [])
+        # Заклади з файлу вже лежать у сховищі як чернетка задачі
+        draft_job_id = context.user_data.get('draft_job_id')
 
-        if not names or not uids or len(names) != len(uids):
-             logger.error(f"Data inconsistency before creation for user {user_id}. Data: {context.user_data}")
+        if draft_job_id is None and (not names or not uids or len(names) != len(uids)):
+             logger.error("Data inconsistency before creation for user %s. Data: %s", user_id, context.user_data)
              await query.edit_message_text("Помилка даних. Будь ласка, почніть заново з /start.")
              context.user_data.clear()
              return ConversationHandler.END
 
-        await query.edit_message_text(INFO_CREATING_GROUPS_START, parse_mode=ParseMode.HTML)
-
-        total_groups = len(names)
-        created_count = 0
-        errors = []
-
         # --- Запуск Telethon логіки ---
         try:
-            # Перевірка наявності сесії - базова
-            session_file = f"{SESSION_NAME}.session"
-            import os
-            if not os.path.exists(session_file):
-                logger.error(f"Telethon session file '{session_file}' not found!")
-                raise ConnectionError(f"Файл сесії '{session_file}' не знайдено. Запустіть процес автентифікації Telethon.")
-
-            for i, (name, uid) in enumerate(zip(names, uids)):
-                progress_message = INFO_CREATING_GROUP_PROGRESS.format(index=i+1, total=total_groups, name=name)
-                await context.bot.send_message(chat_id=user_id, text=progress_message, parse_mode=ParseMode.HTML)
-
-                success, group_info, error_msg = await create_telegram_group(
-                    api_id=API_ID,
-                    api_hash=API_HASH,
-                    session_name=SESSION_NAME,
-                    group_name=name,
-                    manager_usernames=managers,
-                    bot_username=BOT_TO_ADD,
-                    uid_code=uid
-                )
-
-                if success:
-                    created_count += 1
-                    success_msg = INFO_GROUP_CREATED_SUCCESS.format(name=name, uid=uid)
-                    # Можна додати посилання на групу, якщо group_info - це ID
-                    if isinstance(group_info, int):
-                         # Посилання на приватну групу створити складно без invite link
-                         # Поки що просто ID
-                         success_msg += f" (ID: <code>{group_info}</code>)" # Use HTML code tag instead of backticks
-                    await context.bot.send_message(chat_id=user_id, text=success_msg, parse_mode=ParseMode.HTML)
-                    logger.info(f"Group '{name}' created successfully for user {user_id}. Info: {group_info}")
-                else:
-                    error_log = ERROR_GROUP_CREATION.format(group_name=name, error=error_msg)
-                    logger.error(f"Failed to create group '{name}' for user {user_id}: {error_msg}")
-                    errors.append(f"Помилка для '{name}': {error_msg}")
-                    await context.bot.send_message(chat_id=user_id, text=error_log, parse_mode=ParseMode.HTML)
-
+            # Сесії акаунтів живуть у пам'яті пулу (див. core.session_storage); їх доступність уже
+            # перевірив pre-flight, а батч перевіряє її ще раз через session_pool.ensure_available().
+
+            # Сховище та виконавець задач, створені при старті застосунку (див. main.post_init)
+            job_store = context.bot_data.get(JOB_STORE_KEY)
+            job_runner = context.bot_data.get(JOB_RUNNER_KEY)
+            if job_store is None or job_runner is None:
+                raise ConnectionError("Telethon клієнт не ініціалізовано.")
         except ConnectionError as e:
-             logger.error(f"Telethon connection/authentication error for user {user_id}: {e}")
-             await context.bot.send_message(chat_id=user_id, text=f"{ERROR_TELETHON_CONNECTION}\n<i>{e}</i>", parse_mode=ParseMode.HTML)
+             logger.error("Telethon connection/authentication error for user %s: %s", user_id, e)
+             await query.edit_message_text(f"{ERROR_TELETHON_CONNECTION}\n<i>{e}</i>", parse_mode=ParseMode.HTML)
              # Завершуємо діалог при помилці підключення
-             context.user_data.clear()
-             return ConversationHandler.END
-        except Exception as e:
-             logger.exception(f"Unexpected error during group creation loop for user {user_id}: {e}")
-             await context.bot.send_message(chat_id=user_id, text=f"{ERROR_GENERAL}\n<i>{e}</i>", parse_mode=ParseMode.HTML)
-             # Завершуємо діалог
+             _discard_draft(context)
              context.user_data.clear()
              return ConversationHandler.END
 
-
-        # --- Фінальне повідомлення ---
-        final_message = f"Завершено. Створено {created_count} з {total_groups} груп."
-        if errors:
-             final_message += "\n\nВиникли наступні помилки:\n"
-             final_message += format_list_html(errors) # Використовуємо хелпер
-        elif created_count == total_groups and total_groups > 0:
-            final_message = INFO_ALL_GROUPS_CREATED
-
-        await context.bot.send_message(chat_id=user_id, text=final_message, parse_mode=ParseMode.HTML)
+        # Батч зберігається до старту (щоб його можна було продовжити після перезапуску)
+        # і виконується у фоні — обробник відповідає одразу
+        if draft_job_id is not None:
+            if not job_store.activate_job(draft_job_id):
+                logger.error("Draft job %s of user %s is missing.", draft_job_id, user_id)
+                await query.edit_message_text("Помилка даних. Будь ласка, почніть заново з /start.")
+                context.user_data.clear()
+                return ConversationHandler.END
+            job_id = draft_job_id
+            total = job_store.count_items(job_id)[ITEM_PENDING]
+        else:
+            job_id = job_store.create_job(user_id, managers, names, uids)
+            total = len(names)
+        position = job_runner.submit(job_id)
+        await query.edit_message_text(
+            INFO_JOB_QUEUED.format(job_id=job_id, total=total, position=position),
+            parse_mode=ParseMode.HTML
+        )
 
         context.user_data.clear() # Очистка даних після завершення
         return ConversationHandler.END
 
     elif query.data == CALLBACK_GO_BACK:
-        logger.info(f"User {user_id} chose to restart from confirmation.")
+        logger.info("User %s chose to restart from confirmation.", user_id)
         await query.edit_message_text(RESTART_MESSAGE)
          # Повертаємо користувача до вибору режиму
         await query.message.reply_text(
@@ -309,18 +547,112 @@ async def confirm_creation_callback(update: Update, context: ContextTypes.DEFAUL
              reply_markup=get_start_keyboard(),
              parse_mode=ParseMode.HTML
         )
+        _discard_draft(context)
         context.user_data.clear()
         return SELECTING_MODE
     else:
-        logger.warning(f"Received unknown callback data in confirmation state: {query.data}")
+        logger.warning("Received unknown callback data in confirmation state: %s", query.data)
         await query.edit_message_text("Невідома опція.")
         return CONFIRMATION
 
+async def plan_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Показує план батчу замість підтвердження: запити, орієнтовний час і ризик флуду."""
+    query = update.callback_query
+    await query.answer()
+    # Кнопки сторінок і "До списку закладів" повертають з плану до списку
+    context.user_data['showing_plan'] = True
+    page = context.user_data.get('confirmation_page', 0)
+    duplicates = len(context.user_data.get('duplicates', []))
+    session_pool = context.bot_data.get(SESSION_POOL_KEY)
+    if session_pool is None:
+        await query.edit_message_text(
+            f"{ERROR_TELETHON_CONNECTION}\n<i>Telethon клієнт не ініціалізовано.</i>",
+            reply_markup=get_confirmation_keyboard(page, show_plan=False, duplicates=duplicates, back_to_list=True),
+            parse_mode=ParseMode.HTML
+        )
+        return CONFIRMATION
+
+    # План рахується лише за станом лімітерів і кешу юзернеймів — без запитів до API
+    group_count = _venue_count(context)
+    plan = build_plan(
+        session_pool, context.user_data.get('managers', []), BOT_TO_ADD, group_count,
+        row_managers=context.user_data.get('file_managers', []),
+        max_row_managers=context.user_data.get('max_row_managers', 0)
+    )
+    logger.info(
+        "User %s requested a plan: %s groups, %s requests, ~%.0fs, flood risk %s.",
+        update.effective_user.id, plan.groups, plan.total_requests, plan.estimated_seconds, plan.risk
+    )
+    page_count = max(1, math.ceil(group_count / CONFIRMATION_PAGE_SIZE))
+    await query.edit_message_text(
+        get_plan_message(plan),
+        reply_markup=get_confirmation_keyboard(page, page_count, show_plan=False, duplicates=duplicates, back_to_list=True),
+        parse_mode=ParseMode.HTML
+    )
+    return CONFIRMATION
+
+# --- /status та /jobs ---
+def _job_state(job_runner, job) -> str:
+    """Стан задачі: з виконавця, якщо вона в роботі, інакше зі сховища."""
+    state = job_runner.state(job.id)
+    if state is not None:
+        return state
+    if job.status in (JOB_DONE, JOB_PAUSED):
+        return job.status
+    return "interrupted"
+
+@restricted
+async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показує прогрес батчу: /status <id>."""
+    if not context.args:
+        await update.message.reply_text(ERROR_STATUS_USAGE, parse_mode=ParseMode.HTML)
+        return
+    job_id = context.args[0].strip()
+    job_store = context.bot_data[JOB_STORE_KEY]
+    job = job_store.get_job(job_id)
+    if job is None:
+        await update.message.reply_text(ERROR_JOB_NOT_FOUND.format(job_id=html.escape(job_id)), parse_mode=ParseMode.HTML)
+        return
+    state = _job_state(context.bot_data[JOB_RUNNER_KEY], job)
+    await update.message.reply_text(
+        get_job_status_message(job.id, state, job_store.count_items(job.id)), parse_mode=ParseMode.HTML
+    )
+
+@restricted
+async def jobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показує батчі, що виконуються або чекають у черзі."""
+    job_store = context.bot_data[JOB_STORE_KEY]
+    job_runner = context.bot_data[JOB_RUNNER_KEY]
+    jobs = [(job_id, STATE_RUNNING, job_store.count_items(job_id)) for job_id in job_runner.running]
+    jobs += [(job_id, STATE_QUEUED, job_store.count_items(job_id)) for job_id in job_runner.queued]
+    await update.message.reply_text(get_jobs_list_message(jobs), parse_mode=ParseMode.HTML)
+
+@restricted
+async def resume_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Продовжує батч, призупинений через бюджет запитів: /resume <id>."""
+    if not context.args:
+        await update.message.reply_text(ERROR_RESUME_USAGE, parse_mode=ParseMode.HTML)
+        return
+    job_id = context.args[0].strip()
+    job_store = context.bot_data[JOB_STORE_KEY]
+    if not job_store.resume_job(job_id):
+        error = ERROR_JOB_NOT_FOUND if job_store.get_job(job_id) is None else ERROR_JOB_NOT_PAUSED
+        await update.message.reply_text(error.format(job_id=html.escape(job_id)), parse_mode=ParseMode.HTML)
+        return
+    counts = job_store.count_items(job_id)
+    position = context.bot_data[JOB_RUNNER_KEY].submit(job_id)
+    logger.info("User %s resumed paused job %s.", update.effective_user.id, job_id)
+    await update.message.reply_text(
+        INFO_JOB_QUEUED.format(job_id=job_id, total=counts[ITEM_PENDING], position=position),
+        parse_mode=ParseMode.HTML
+    )
+
 # --- /cancel Command ---
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Скасовує поточну операцію (виходить з ConversationHandler)."""
     user = update.effective_user
-    logger.info(f"User {user.id} canceled the conversation.")
+    logger.info("User %s canceled the conversation.", user.id)
+    _discard_draft(context)
     context.user_data.clear()
     await update.message.reply_text(
         CANCEL_MESSAGE, reply_markup=ReplyKeyboardRemove()
@@ -331,7 +663,7 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 # --- Обробник неочікуваних текстових повідомлень ---
 async def unexpected_message_in_mode_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обробляє текстові повідомлення у стані вибору режиму."""
-    logger.info(f"User {update.effective_user.id} sent text message in mode selection state: {update.message.text}")
+    logger.info("User %s sent text message in mode selection state: %s", update.effective_user.id, update.message.text)
     await update.message.reply_text(
         "Будь ласка, вибери режим роботи, натиснувши на одну з кнопок нижче.",
         reply_markup=get_start_keyboard(),
@@ -360,10 +692,14 @@ def get_conversation_handler() -> ConversationHandler:
                 MessageHandler(filters.TEXT & ~filters.COMMAND, handle_uids)
             ],
              AWAITING_BULK_MESSAGE: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_bulk_message)
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_bulk_message),
+                MessageHandler(filters.Document.ALL, handle_bulk_document)
             ],
             CONFIRMATION: [
                  CallbackQueryHandler(confirm_creation_callback, pattern=f"^{CALLBACK_CONFIRM_CREATE}$|^{CALLBACK_GO_BACK}$"),
+                 CallbackQueryHandler(plan_callback, pattern=f"^{CALLBACK_PLAN}$"),
+                 CallbackQueryHandler(skip_duplicates_callback, pattern=f"^{CALLBACK_SKIP_DUPLICATES}$"),
+                 CallbackQueryHandler(confirmation_page_callback, pattern=f"^{CALLBACK_PAGE_PREFIX}\\d+$"),
                  # Додаємо обробник текстових повідомлень на етапі підтвердження
                  MessageHandler(filters.TEXT & ~filters.COMMAND, unexpected_message_in_mode_selection)
             ],
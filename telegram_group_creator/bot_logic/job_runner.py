@@ -0,0 +1,85 @@
+import asyncio
+import logging
+
+from telegram import Bot
+
+from .batch_job import run_creation_job
+from core.group_index import GroupIndex
+from core.job_store import JobStore
+from core.session_pool import SessionPool
+
+logger = logging.getLogger(__name__)
+
+# Ключ, під яким виконавець задач зберігається в application.bot_data
+BOT_DATA_KEY = "job_runner"
+
+# Стан задачі у виконавці
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+
+
+class JobRunner:
+    """
+    Внутрішня черга батчів з фоновими воркерами.
+
+    Обробник підтвердження лише додає задачу в чергу й одразу відповідає,
+    а батч виконується у фоні; стан задач доступний через /status та /jobs.
+    """
+
+    def __init__(self, bot: Bot, session_pool: SessionPool, job_store: JobStore, workers: int,
+                 group_index: GroupIndex | None = None):
+        self.bot = bot
+        self.session_pool = session_pool
+        self.job_store = job_store
+        self.group_index = group_index
+        self.workers = max(1, workers)
+        self.queued: list[str] = []
+        self.running: list[str] = []
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job_worker_{i}") for i in range(self.workers)
+        ]
+        logger.info("Job runner started with %s worker(s).", self.workers)
+
+    async def stop(self) -> None:
+        """Зупиняє воркерів; незавершені задачі лишаються в сховищі й продовжаться після перезапуску."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job_id: str) -> int:
+        """Додає задачу в чергу і повертає її позицію (1 — наступна на виконання)."""
+        self.queued.append(job_id)
+        self._queue.put_nowait(job_id)
+        logger.info("Job %s queued at position %s.", job_id, len(self.queued))
+        return len(self.queued)
+
+    async def wait_idle(self) -> None:
+        """Чекає, доки всі задачі з черги будуть виконані."""
+        await self._queue.join()
+
+    def state(self, job_id: str) -> str | None:
+        """Стан задачі у виконавці: queued, running або None, якщо задача не в роботі."""
+        if job_id in self.running:
+            return STATE_RUNNING
+        if job_id in self.queued:
+            return STATE_QUEUED
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self.queued.remove(job_id)
+            self.running.append(job_id)
+            try:
+                await run_creation_job(self.bot, self.session_pool, self.job_store, job_id, self.group_index)
+            except Exception as e:
+                # run_creation_job сам звітує про помилки; сюди потрапляє лише непередбачене
+                logger.exception("Job %s crashed: %s", job_id, e)
+            finally:
+                self.running.remove(job_id)
+                self._queue.task_done()
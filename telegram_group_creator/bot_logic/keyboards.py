@@ -4,6 +4,10 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 CALLBACK_STEP_BY_STEP = "mode_step_by_step"
 CALLBACK_BULK = "mode_bulk"
 CALLBACK_CONFIRM_CREATE = "confirm_create"
+CALLBACK_PLAN = "plan_batch"
+CALLBACK_SKIP_DUPLICATES = "skip_duplicates"
+# Сторінка підтвердження: "confirm_page:<номер з 0>"
+CALLBACK_PAGE_PREFIX = "confirm_page:"
 CALLBACK_GO_BACK = "go_back_start" # Або інша логіка повернення
 
 def get_start_keyboard() -> InlineKeyboardMarkup:
@@ -16,14 +20,30 @@ def get_start_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(keyboard)
 
-def get_confirmation_keyboard() -> InlineKeyboardMarkup:
-    """Клавіатура для підтвердження створення груп."""
-    keyboard = [
-        [
-            InlineKeyboardButton("✅ Створити групи", callback_data=CALLBACK_CONFIRM_CREATE),
-            InlineKeyboardButton("✏️ Почати заново", callback_data=CALLBACK_GO_BACK),
-        ]
-    ]
+def get_confirmation_keyboard(page: int = 0, page_count: int = 1, show_plan: bool = True,
+                              duplicates: int = 0, back_to_list: bool = False) -> InlineKeyboardMarkup:
+    """
+    Клавіатура для підтвердження створення груп: гортання сторінок, підтвердження, дублікати і план.
+    back_to_list додає кнопку повернення до сторінки page списку закладів (з екрана плану).
+    """
+    keyboard = []
+    if back_to_list:
+        keyboard.append([InlineKeyboardButton("📋 До списку закладів", callback_data=f"{CALLBACK_PAGE_PREFIX}{page}")])
+    if page_count > 1:
+        # Кнопка посередині показує номер сторінки; натискання на неї нічого не змінює
+        keyboard.append([
+            InlineKeyboardButton("◀️", callback_data=f"{CALLBACK_PAGE_PREFIX}{max(page - 1, 0)}"),
+            InlineKeyboardButton(f"{page + 1}/{page_count}", callback_data=f"{CALLBACK_PAGE_PREFIX}{page}"),
+            InlineKeyboardButton("▶️", callback_data=f"{CALLBACK_PAGE_PREFIX}{min(page + 1, page_count - 1)}"),
+        ])
+    keyboard.append([
+        InlineKeyboardButton("✅ Створити групи", callback_data=CALLBACK_CONFIRM_CREATE),
+        InlineKeyboardButton("✏️ Почати заново", callback_data=CALLBACK_GO_BACK),
+    ])
+    if duplicates:
+        keyboard.append([InlineKeyboardButton(f"⏭ Пропустити вже створені ({duplicates})", callback_data=CALLBACK_SKIP_DUPLICATES)])
+    if show_plan:
+        keyboard.append([InlineKeyboardButton("🧮 План і оцінка часу", callback_data=CALLBACK_PLAN)])
     return InlineKeyboardMarkup(keyboard)
 
 # Можна додати інші клавіатури за потреби
\ No newline at end of file
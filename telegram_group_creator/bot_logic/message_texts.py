@@ -1,5 +1,12 @@
+import functools
+import html
+
+from telegram.constants import MessageLimit
+
+from core.batch_planner import BatchPlan
+from core.group_index import Duplicate, MATCH_UID
 from core.config import BOT_TO_ADD, get_manager_list_text
-from utils.helpers import format_list_html # Імпортуємо хелпер
+from utils.helpers import format_list_html, format_duration # Імпортуємо хелпери
 
 # --- Привітання ---
 WELCOME_MESSAGE = f"""
@@ -25,7 +32,10 @@ UID:
 """
 
 # --- Покроковий режим ---
-STEP_1_MANAGERS_PROMPT = get_manager_list_text() # Використовуємо функцію з конфігу
+@functools.cache
+def get_managers_prompt() -> str:
+    """Крок 1: список менеджерів з конфігу; будується при першому показі, а не при імпорті модуля."""
+    return get_manager_list_text()
 
 STEP_2_NAMES_PROMPT = """
 📌 <b>Крок 2: Назви закладів</b>
@@ -70,30 +80,256 @@ UID:
 48391</code>
 
 <i>Просто скопіюй цей приклад і заміни на свої дані</i>
+
+📄 Для великих списків надішли файл <b>CSV</b> або <b>XLSX</b> з колонками:
+<code>назва, адреса, UID, менеджери</code> (менеджери — необов'язково, як у кроці 1).
+У підписі до файлу можна вказати менеджерів для всіх закладів, напр. <code>1, 3 @custom_user1</code>.
 """
 
 # --- Підтвердження ---
-def get_confirmation_message(managers: list[str], names: list[str], uids: list[str]) -> str:
-    """Формує повідомлення для підтвердження даних."""
-    managers_str = format_list_html(managers) if managers else "<i>Не вибрано</i>"
-    names_str = format_list_html(names, numbered=True) if names else "<i>Не вказано</i>"
-    uids_str = format_list_html(uids, numbered=True) if uids else "<i>Не вказано</i>"
+# Скільки закладів показується на одній сторінці підтвердження
+CONFIRMATION_PAGE_SIZE = 20
+# Назви та списки менеджерів обрізаються, щоб сторінка вміщалася в ліміт повідомлення
+CONFIRMATION_NAME_MAX_CHARS = 120
+CONFIRMATION_MANAGERS_SHOWN = 15
+CONFIRMATION_DUPLICATES_SHOWN = 10
+# Найкоротша назва закладу, до якої її можна обрізати, якщо сторінка все одно задовга
+CONFIRMATION_NAME_MIN_CHARS = 24
+# Найдовший UID, що показується повністю
+CONFIRMATION_UID_MAX_CHARS = 40
+# Скільки місця на сторінці гарантовано отримує кожен список (не знайдені, дублікати)
+CONFIRMATION_SECTION_MIN_CHARS = 300
+
+def _escape_shortened(text: str, limit: int) -> str:
+    """html.escape(text), обрізаний до limit символів уже після екранування (сутності не розрізаються)."""
+    escaped = html.escape(text)
+    if len(escaped) <= limit:
+        return escaped
+    parts, length = [], 0
+    for char in text:
+        piece = html.escape(char)
+        if length + len(piece) > limit - 1:
+            break
+        parts.append(piece)
+        length += len(piece)
+    return "".join(parts) + "…"
+
+def _limited_section(title: str, lines: list[str], total: int, budget: int) -> str:
+    """
+    Секція зі списком, що вміщується в budget символів: рядки додаються, поки є місце,
+    решта (з total) підсумовується як "... і ще N". Порожній рядок, якщо не вміщується й заголовок.
+    """
+    text, shown = f"\n{title}\n", 0
+    for line in lines:
+        more = f"... і ще {total - shown - 1}\n" if shown + 1 < total else ""
+        if len(text) + len(line) + 1 + len(more) > budget:
+            break
+        text += line + "\n"
+        shown += 1
+    if shown < total:
+        text += f"... і ще {total - shown}\n"
+    return text if len(text) <= budget else ""
+
+def get_confirmation_message(managers: list[str], venues: list[tuple[str, str]], total: int,
+                             page: int, page_count: int, custom_managers: int = 0,
+                             unresolved: dict[str, str] | None = None,
+                             duplicates: list[Duplicate] | None = None) -> str:
+    """
+    Формує одну сторінку підтвердження.
 
-    return f"""
+    venues — лише заклади цієї сторінки (назва, UID); решта не рендериться,
+    тож розмір повідомлення не залежить від розміру батчу. Заклади сторінки показуються
+    завжди (за потреби з коротшими назвами), а списки не знайдених учасників і дублікатів
+    отримують лише те місце, що лишилося до MessageLimit.MAX_TEXT_LENGTH.
+    """
+    shown_managers = managers[:CONFIRMATION_MANAGERS_SHOWN]
+    managers_str = format_list_html(shown_managers) if managers else "<i>Не вибрано</i>"
+    if len(managers) > len(shown_managers):
+        managers_str += f"\n... і ще {len(managers) - len(shown_managers)}"
+
+    head = f"""
 ✅ <b>Перевір дані перед створенням:</b>
 
+📊 Закладів: <b>{total}</b>, менеджерів: <b>{len(managers)}</b>
+
 👤 <b>Менеджери для додавання:</b>
 {managers_str}
 (Також буде доданий {BOT_TO_ADD})
+"""
+    if custom_managers:
+        head += f"<i>Для {custom_managers} закладів менеджери вказані у файлі.</i>\n"
 
-🏢 <b>Заклади:</b>
-{names_str}
+    sections = []
+    if unresolved:
+        missing = [(username, reason) for username, reason in unresolved.items() if reason != "error"]
+        unverified = [username for username, reason in unresolved.items() if reason == "error"]
+        if missing:
+            sections.append((
+                "⚠️ <b>Не знайдені в Telegram — не будуть додані:</b>",
+                [f"- {html.escape(username)} ({UNRESOLVED_REASON_TEXTS.get(reason, reason)})"
+                 for username, reason in missing[:CONFIRMATION_MANAGERS_SHOWN]],
+                len(missing)
+            ))
+        if unverified:
+            sections.append((
+                "⏳ <b>Не вдалося перевірити зараз (ліміт Telegram чи мережа) — лишаються в батчі:</b>",
+                [f"- {html.escape(username)}" for username in unverified[:CONFIRMATION_MANAGERS_SHOWN]],
+                len(unverified)
+            ))
+    if duplicates:
+        sections.append((
+            f"♻️ <b>Групи вже існують для {len(duplicates)} закладів:</b>",
+            [f"- {_escape_shortened(d.name, CONFIRMATION_NAME_MAX_CHARS)} — <code>{_escape_shortened(d.uid, CONFIRMATION_UID_MAX_CHARS)}</code> "
+             f"({'той самий UID' if d.matched == MATCH_UID else 'та сама назва'}, чат <code>{d.chat_id}</code>)"
+             for d in duplicates[:CONFIRMATION_DUPLICATES_SHOWN]],
+            len(duplicates)
+        ))
 
-🔑 <b>UID:</b>
-{uids_str}
+    first_number = page * CONFIRMATION_PAGE_SIZE + 1
+    page_info = f" — сторінка {page + 1} з {page_count}" if page_count > 1 else ""
+    reserved = CONFIRMATION_SECTION_MIN_CHARS * len(sections)
+    name_limit = CONFIRMATION_NAME_MAX_CHARS
+    while True:
+        venues_str = "\n".join(
+            f"{number}. {_escape_shortened(name, name_limit)} — <code>{_escape_shortened(uid, CONFIRMATION_UID_MAX_CHARS)}</code>"
+            for number, (name, uid) in enumerate(venues, start=first_number)
+        ) or "<i>Не вказано</i>"
+        tail = f"""
+🏢 <b>Заклади (назва — UID){page_info}:</b>
+{venues_str}
 
 Все вірно?
 """
+        # Якщо довгі назви не лишають місця хоча б на початок кожного списку — обрізаємо їх сильніше
+        if len(head) + len(tail) + reserved <= MessageLimit.MAX_TEXT_LENGTH or name_limit <= CONFIRMATION_NAME_MIN_CHARS:
+            break
+        name_limit = max(CONFIRMATION_NAME_MIN_CHARS, name_limit // 2)
+
+    text = head
+    budget = MessageLimit.MAX_TEXT_LENGTH - len(head) - len(tail)
+    for position, (title, lines, count) in enumerate(sections):
+        # Місце ділиться порівну; те, що список не використав, дістається наступним
+        section = _limited_section(title, lines, count, budget // (len(sections) - position))
+        text += section
+        budget -= len(section)
+    return text + tail
+
+# Причини з core.preflight (REASON_*)
+UNRESOLVED_REASON_TEXTS = {
+    "not_found": "юзернейм не існує",
+    "not_user": "це не користувач",
+    "error": "помилка перевірки",
+}
+
+# --- Фонові задачі ---
+JOB_STATE_LABELS = {
+    "queued": "⏳ в черзі",
+    "running": "⚙️ виконується",
+    "done": "🏁 завершено",
+    "interrupted": "⚠️ перервано (продовжиться після перезапуску)",
+    "paused": "⏸ на паузі (бюджет запитів; /resume)",
+}
+
+def get_job_status_message(job_id: str, state: str, counts: dict[str, int]) -> str:
+    """Формує відповідь на /status для однієї задачі."""
+    total = sum(counts.values())
+    finished = counts["done"] + counts["failed"]
+    return (
+        f"📋 <b>Батч</b> <code>{job_id}</code>: {JOB_STATE_LABELS.get(state, state)}\n"
+        f"Оброблено {finished} з {total}: ✅ {counts['done']}, ❌ {counts['failed']}, ⏳ {counts['pending']}"
+    )
+
+def get_jobs_list_message(jobs: list[tuple[str, str, dict[str, int]]]) -> str:
+    """Формує відповідь на /jobs: задачі, що виконуються або чекають у черзі."""
+    if not jobs:
+        return INFO_NO_ACTIVE_JOBS
+    lines = []
+    for job_id, state, counts in jobs:
+        finished = counts["done"] + counts["failed"]
+        lines.append(f"<code>{job_id}</code> — {JOB_STATE_LABELS.get(state, state)}, {finished}/{sum(counts.values())}")
+    return "📋 <b>Активні батчі:</b>\n" + "\n".join(lines)
+
+# --- План батчу ---
+PLAN_STEP_LABELS = {
+    "create": "створення супергрупи",
+    "rights": "видима історія + адмінка бота (один контейнер)",
+    "invite": "запрошення менеджерів",
+    "promote": "адмінка менеджерів (один контейнер)",
+    "send_uid": "надсилання UID",
+}
+FLOOD_RISK_LABELS = {
+    "low": "🟢 низький",
+    "medium": "🟡 середній",
+    "high": "🔴 високий",
+}
+RISK_FACTOR_TEXTS = {
+    "no_accounts": "немає авторизованих акаунтів Telethon",
+    "account_blocked": "акаунт <code>{account}</code> обмежений Telegram ще {duration} і не використовується",
+    "daily_limit_exceeded": "{value} груп не вміщуються в добовий ліміт доступних акаунтів",
+    "account_flood_wait": "акаунт <code>{account}</code> під FloodWait ще {duration} — батч почнеться з паузи",
+    "rate_reduced": "акаунт <code>{account}</code>: швидкість знижена після недавнього FloodWait",
+    "daily_limit_near": "акаунт <code>{account}</code> використає {value} груп добового ліміту",
+    "many_resolves": "акаунт <code>{account}</code>: {value} юзернеймів не в кеші, масовий резолв може спричинити FloodWait",
+    "budget_pause": "бюджет запитів вистачить на ~{value} груп, далі батч стане на паузу (/resume)",
+}
+
+def get_plan_message(plan: BatchPlan) -> str:
+    """Формує план батчу (послідовність запитів, час, ризик флуду) для екрана підтвердження."""
+    lines = [f"🧮 <b>План батчу</b> — {plan.groups} груп, без запитів до Telegram", "", "<b>Запити для кожної групи:</b>"]
+    for number, trip in enumerate(plan.round_trips, start=1):
+        counts = {method: trip.methods.count(method) for method in trip.methods}
+        methods = " + ".join(f"<code>{method}</code>" + (f" ×{count}" if count > 1 else "") for method, count in counts.items())
+        lines.append(f"{number}. {PLAN_STEP_LABELS.get(trip.step, trip.step)}: {methods}")
+
+    lines += ["", f"📊 Всього запитів: <b>{plan.total_requests}</b>"]
+    for method, count in plan.requests_by_method.most_common():
+        lines.append(f"  • <code>{method}</code>: {count}")
+
+    if plan.accounts:
+        lines += ["", "<b>Акаунти:</b>"]
+        for account in plan.accounts:
+            line = f"  • <code>{account.session_name}</code>: {account.groups} груп, ~{format_duration(account.seconds)}"
+            if account.uncached:
+                line += f", резолв {len(account.uncached)} юзернеймів"
+            lines.append(line)
+
+    lines += [
+        "",
+        f"⏱ Орієнтовний час: ~{format_duration(plan.estimated_seconds)}",
+        f"🌊 Ризик флуду: {FLOOD_RISK_LABELS[plan.risk]}",
+    ]
+    for risk in plan.risks:
+        text = RISK_FACTOR_TEXTS[risk.kind].format(
+            account=risk.account, value=risk.value, duration=format_duration(risk.value)
+        )
+        lines.append(f"  • {text}")
+    return "\n".join(lines)
+
+# --- Облік запитів до API ---
+# Скільки методів показувати в підсумку батчу (решта — одним рядком)
+REQUEST_SUMMARY_METHODS = 8
+
+def get_request_summary(total: int, by_method: dict[str, int], groups: int) -> str:
+    """Формує підсумок запитів до Telegram API за батч."""
+    text = f"📊 Запитів до Telegram API: <b>{total}</b>"
+    if groups:
+        text += f" (~{total / groups:.1f} на групу)"
+    ranked = sorted(by_method.items(), key=lambda pair: pair[1], reverse=True)
+    lines = [f"<code>{method}</code>: {count}" for method, count in ranked[:REQUEST_SUMMARY_METHODS]]
+    rest = sum(count for _, count in ranked[REQUEST_SUMMARY_METHODS:])
+    if rest:
+        lines.append(f"інші: {rest}")
+    return text + ("\n" + "\n".join(lines) if lines else "")
+
+# --- Прогрес батчу ---
+def get_progress_message(processed: int, total: int, created: int, failed: int, recent: list[str], eta_seconds: float | None) -> str:
+    """Формує повідомлення про прогрес батчу, яке редагується на місці."""
+    text = f"{INFO_CREATING_GROUPS_START}\n\n⚙️ Оброблено <b>{processed}</b> з <b>{total}</b>: ✅ {created}, ❌ {failed}"
+    if eta_seconds is not None and processed < total:
+        text += f"\n⏱ Залишилось приблизно {format_duration(eta_seconds)}"
+    if recent:
+        text += "\n\n<b>Останні результати:</b>\n" + "\n".join(recent)
+    return text
 
 # --- Помилки ---
 ERROR_UID_NAME_MISMATCH = "❌ <b>Помилка:</b> Кількість UID ({uid_count}) не збігається з кількістю назв закладів ({name_count}). Будь ласка, надішли правильну кількість UID."
@@ -101,16 +337,34 @@ ERROR_INVALID_MANAGER_INPUT = "❌ <b>Помилка:</b> Не вдалося р
 ERROR_INVALID_BULK_FORMAT = "❌ <b>Помилка:</b> Не вдалося розпарсити повідомлення. Переконайся, що воно містить секції 'Користувачі:', 'Назви:' та 'UID:' і відповідає формату."
 ERROR_PARSING_BULK_SECTION = "❌ <b>Помилка</b> при обробці секції '{section}': {error}"
 ERROR_TELETHON_CONNECTION = "❌ <b>Помилка:</b> Не вдалося підключитися до Telegram API (Telethon). Перевір API ID/Hash та наявність файлу сесії."
+INFO_DUPLICATES_SKIPPED = "⏭ Пропущено {count} закладів, для яких групи вже існують."
+INFO_ALL_DUPLICATES = "♻️ Для всіх закладів групи вже існують — створювати нічого. Почни знову: /start"
+ERROR_BOT_UNRESOLVED = "❌ <b>Помилка:</b> Бота {bot} не вдалося знайти в Telegram, тож жодна група не буде створена. Перевір BOT_TO_ADD у налаштуваннях."
 ERROR_GROUP_CREATION = "❌ <b>Помилка</b> при створенні групи '{group_name}': {error}"
 ERROR_GENERAL = "❌ Сталася несподівана помилка. Спробуй ще раз пізніше."
 ERROR_ACCESS_DENIED = "❌ Вибач, тобі не дозволено використовувати цього бота."
+ERROR_STATUS_USAGE = "Використання: /status <code>ID батчу</code>"
+ERROR_JOB_NOT_FOUND = "❌ Батч <code>{job_id}</code> не знайдено."
+ERROR_UNSUPPORTED_DOCUMENT = "❌ Підтримуються лише файли CSV та XLSX."
+ERROR_DOCUMENT_TOO_LARGE = "❌ Файл завеликий: бот може завантажувати файли до {max_mb} МБ."
+ERROR_INVALID_DOCUMENT = "❌ <b>Помилка:</b> У файлі є помилки, батч не створено. Виправ їх і надішли файл ще раз."
+ERROR_DOCUMENT_UPLOAD = "❌ <b>Помилка:</b> Не вдалося завантажити або зберегти файл. Спробуй надіслати його ще раз.\n<i>{error}</i>"
+ERROR_RESUME_USAGE = "Використання: /resume <code>ID батчу</code>"
+ERROR_JOB_NOT_PAUSED = "❌ Батч <code>{job_id}</code> не стоїть на паузі."
 
 
 # --- Успішне виконання ---
 INFO_CREATING_GROUPS_START = "⏳ Починаю створення груп..."
-INFO_CREATING_GROUP_PROGRESS = "⚙️ Створюю групу {index}/{total}: '{name}'..."
 INFO_GROUP_CREATED_SUCCESS = "✅ Група '{name}' (UID: {uid}) успішно створена!"
 INFO_ALL_GROUPS_CREATED = "🎉 Всі групи успішно створені!"
+INFO_MORE_ERRORS = "... і ще {count}"
+INFO_JOB_QUEUED = "📥 Батч <code>{job_id}</code> ({total} груп) додано в чергу, позиція {position}.\nПрогрес: /status {job_id}"
+INFO_NO_ACTIVE_JOBS = "Немає батчів у роботі."
+INFO_JOB_PAUSED = (
+    "⏸ Батч <code>{job_id}</code> призупинено: наступна група перевищила б бюджет "
+    "у {budget} запитів до API. Створено {created} з {total} груп.\nПродовжити: /resume {job_id}"
+)
+INFO_RESUMING_JOB = "🔄 Продовжую перерваний батч <code>{job_id}</code>: залишилось {remaining} з {total} груп."
 
 # --- Інше ---
 CANCEL_MESSAGE = "Дію скасовано. Починай заново командою /start."
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from telegram import Bot, Message
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+from .message_texts import get_progress_message
+
+logger = logging.getLogger(__name__)
+
+# Скільки останніх результатів показувати в повідомленні про прогрес
+RECENT_RESULTS_LIMIT = 5
+
+
+class ProgressMessage:
+    """
+    Одне повідомлення про прогрес батчу, яке редагується на місці.
+
+    Результати груп накопичуються, а повідомлення оновлюється не частіше ніж раз
+    на min_interval секунд; в кінці воно замінюється на фінальний підсумок.
+    """
+
+    def __init__(self, bot: Bot, chat_id: int, total: int, min_interval: float, created: int = 0, failed: int = 0):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.total = total
+        self.min_interval = min_interval
+        # Лічильники враховують заклади, оброблені до перезапуску
+        self.created = created
+        self.failed = failed
+        self.recent: deque[str] = deque(maxlen=RECENT_RESULTS_LIMIT)
+        self._message: Message | None = None
+        self._started_at = time.monotonic()
+        self._processed_at_start = created + failed
+        self._last_edit = 0.0
+        self._flush_task: asyncio.Task | None = None
+
+    @property
+    def processed(self) -> int:
+        return self.created + self.failed
+
+    def eta(self) -> float | None:
+        """Оцінка часу до завершення за середньою швидкістю поточного запуску."""
+        done_now = self.processed - self._processed_at_start
+        if done_now <= 0:
+            return None
+        per_group = (time.monotonic() - self._started_at) / done_now
+        return per_group * (self.total - self.processed)
+
+    def render(self) -> str:
+        return get_progress_message(self.processed, self.total, self.created, self.failed, list(self.recent), self.eta())
+
+    async def start(self) -> None:
+        # Повідомлення редагуватиметься, тож його не можна об'єднувати з іншими в черзі відправки
+        try:
+            self._message = await self.bot.send_message(
+                chat_id=self.chat_id, text=self.render(), parse_mode=ParseMode.HTML,
+                rate_limit_args={"coalesce": False}
+            )
+        except TelegramError as e:
+            # Батч виконується й без повідомлення про прогрес: проміжні оновлення пропускаються,
+            # а підсумок finish() спробує надіслати окремим повідомленням
+            logger.warning("Failed to send progress message to chat %s: %s", self.chat_id, e)
+        self._last_edit = time.monotonic()
+
+    def record(self, success: bool, line: str) -> None:
+        """Додає результат групи; повідомлення оновиться не пізніше ніж за min_interval."""
+        if success:
+            self.created += 1
+        else:
+            self.failed += 1
+        self.recent.append(line)
+        if self._flush_task is None or self._flush_task.done():
+            delay = max(0.0, self._last_edit + self.min_interval - time.monotonic())
+            self._flush_task = asyncio.create_task(self._flush_after(delay))
+
+    async def finish(self, text: str) -> None:
+        """Замінює повідомлення про прогрес фінальним підсумком."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        if not await self._edit(text):
+            # Якщо редагування неможливе (повідомлення видалено тощо) — надсилаємо підсумок окремо
+            try:
+                await self.bot.send_message(chat_id=self.chat_id, text=text, parse_mode=ParseMode.HTML)
+            except TelegramError as e:
+                # Стан батчу вже записаний у сховище; підсумок доступний через /status
+                logger.warning("Failed to send batch summary to chat %s: %s", self.chat_id, e)
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._edit(self.render())
+
+    async def _edit(self, text: str) -> bool:
+        if self._message is None:
+            return False
+        self._last_edit = time.monotonic()
+        try:
+            await self._message.edit_text(text, parse_mode=ParseMode.HTML)
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                return True
+            logger.warning("Failed to edit progress message in chat %s: %s", self.chat_id, e)
+            return False
+        except RetryAfter as e:
+            # Черга відправки вже вичерпала повтори; наступне оновлення покаже актуальний стан
+            logger.warning("Progress message edit throttled by Telegram: %s", e)
+            return False
+        except TelegramError as e:
+            logger.warning("Failed to edit progress message in chat %s: %s", self.chat_id, e)
+            return False
+        return True
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# worker(index, item) -> результат обробки одного елемента
+Worker = Callable[[int, Any], Awaitable[Any]]
+# on_result(index, item, result) — викликається строго в порядку вхідних елементів
+ResultCallback = Callable[[int, Any, Any], Awaitable[None]]
+
+
+class BatchExecutor:
+    """
+    Запускає обробку елементів батчу паралельно, але не більше ніж `concurrency` одночасно.
+
+    Помилка в одному елементі не зупиняє інші: виняток повертається як результат
+    цього елемента. Результати віддаються в on_result у порядку вхідного списку.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+
+    async def run(
+        self,
+        items: Iterable[Any],
+        worker: Worker,
+        on_result: ResultCallback | None = None,
+        should_stop: Callable[[], bool] | None = None
+    ) -> list[Any]:
+        """
+        Обробляє всі елементи та повертає список результатів у вхідному порядку.
+        Для елементів, обробка яких завершилась винятком, у списку буде сам виняток.
+
+        Елементи беруться з items лише тоді, коли звільняється місце, тож items може бути
+        генератором, що читає великий батч зі сховища сторінками. Якщо should_stop()
+        повертає True, нові елементи не запускаються (вже запущені завершуються).
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Запущені задачі в порядку старту; None — елементи закінчилися
+        started: asyncio.Queue = asyncio.Queue()
+        tasks: set[asyncio.Task] = set()
+
+        async def run_one(index: int, item: Any) -> Any:
+            try:
+                return await worker(index, item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Batch item %s failed: %s", index, e)
+                return e
+            finally:
+                semaphore.release()
+
+        async def schedule() -> None:
+            try:
+                for index, item in enumerate(items):
+                    # Semaphore пропускає очікувачів у порядку FIFO, тому елементи стартують по черзі
+                    await semaphore.acquire()
+                    if should_stop is not None and should_stop():
+                        semaphore.release()
+                        break
+                    task = asyncio.create_task(run_one(index, item))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    started.put_nowait((index, item, task))
+            finally:
+                started.put_nowait(None)
+
+        scheduler = asyncio.create_task(schedule())
+        results = []
+        try:
+            while (entry := await started.get()) is not None:
+                index, item, task = entry
+                result = await task
+                results.append(result)
+                if on_result:
+                    await on_result(index, item, result)
+            # Повторно кидає помилку читання items, якщо вона була
+            await scheduler
+        finally:
+            # Якщо звітування впало або батч скасовано — не залишаємо завислих задач
+            scheduler.cancel()
+            for task in list(tasks):
+                task.cancel()
+        return results
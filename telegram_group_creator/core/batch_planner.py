@@ -0,0 +1,190 @@
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .config import GROUP_CREATION_CONCURRENCY, BATCH_REQUEST_BUDGET
+from .metrics import MTPROTO_REQUEST_SECONDS
+from .rate_limiter import METHOD_FAMILIES, DEFAULT_FAMILY
+from .session_pool import SessionPool
+
+# Рівні ризику флуду (за зростанням)
+RISK_LOW = "low"
+RISK_MEDIUM = "medium"
+RISK_HIGH = "high"
+_RISK_ORDER = (RISK_LOW, RISK_MEDIUM, RISK_HIGH)
+
+# Тривалість одного round trip, поки в процесі ще не було жодного запиту (с)
+DEFAULT_ROUND_TRIP_SECONDS = 0.3
+# Критичний шлях групи в round trip-ах: create -> (rights -> send_uid | invite -> promote)
+CRITICAL_PATH_ROUND_TRIPS = 3
+# Частка добового ліміту акаунта, після якої батч вважається ризикованим
+DAILY_LIMIT_WARN_FRACTION = 0.8
+
+
+@dataclass
+class RoundTrip:
+    """Один round trip створення групи: окремий запит або контейнер з кількох."""
+    step: str
+    methods: tuple[str, ...]
+
+
+@dataclass
+class RiskFactor:
+    """Причина ризику флуду; текст для користувача формується в message_texts."""
+    level: str
+    kind: str
+    account: str | None = None
+    value: int = 0
+
+
+@dataclass
+class AccountPlan:
+    session_name: str
+    groups: int
+    # Юзернейми, яких немає в кеші акаунта (по одному ResolveUsernameRequest)
+    uncached: list[str]
+    seconds: float
+
+
+@dataclass
+class BatchPlan:
+    groups: int
+    round_trips: list[RoundTrip]
+    requests_by_method: Counter[str]
+    accounts: list[AccountPlan]
+    # Групи, для яких не вистачає добового ліміту доступних акаунтів
+    unassigned: int
+    estimated_seconds: float
+    risks: list[RiskFactor] = field(default_factory=list)
+    # Скільки груп вміститься в BATCH_REQUEST_BUDGET (None — бюджет вимкнено)
+    budget_groups: int | None = None
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests_by_method.values())
+
+    @property
+    def risk(self) -> str:
+        return max((risk.level for risk in self.risks), key=_RISK_ORDER.index, default=RISK_LOW)
+
+
+def group_round_trips(manager_count: int) -> list[RoundTrip]:
+    """Запити create_telegram_group для нової супергрупи (без повторів після FloodWait і fallback-ів)."""
+    trips = [
+        RoundTrip("create", ("CreateChannelRequest",)),
+        RoundTrip("rights", ("EditChatDefaultBannedRightsRequest", "EditAdminRequest")),
+    ]
+    if manager_count:
+        trips.append(RoundTrip("invite", ("InviteToChannelRequest",)))
+        trips.append(RoundTrip("promote", ("EditAdminRequest",) * manager_count))
+    trips.append(RoundTrip("send_uid", ("SendMessageRequest",)))
+    return trips
+
+
+def _average_round_trip() -> float:
+    """Середня тривалість MTProto-запиту за метриками процесу."""
+    stats = MTPROTO_REQUEST_SECONDS.snapshot()
+    count = sum(entry["count"] for entry in stats)
+    return sum(entry["sum"] for entry in stats) / count if count else DEFAULT_ROUND_TRIP_SECONDS
+
+
+def build_plan(
+    session_pool: SessionPool,
+    managers: list[str],
+    bot_username: str,
+    group_count: int,
+    concurrency: int = GROUP_CREATION_CONCURRENCY,
+    request_budget: int = BATCH_REQUEST_BUDGET,
+    row_managers: list[str] | None = None,
+    max_row_managers: int = 0
+) -> BatchPlan:
+    """
+    Рахує план батчу без звернень до Telegram API.
+
+    Групи розподіляються між акаунтами так само, як це робить SessionPool (за
+    залишком добового ліміту). Час оцінюється за поточним станом token bucket-ів
+    і FloodWait-дедлайнів кожного акаунта та середньою тривалістю запиту.
+    Менеджери з рядків файлу (row_managers) резолвляться один раз кожен, а група
+    оцінюється з найбільшим списком менеджерів (max_row_managers або менеджери батчу).
+    """
+    trips = group_round_trips(max(len(managers), max_row_managers))
+    per_group = Counter(method for trip in trips for method in trip.methods)
+    risks: list[RiskFactor] = []
+
+    capacity = session_pool.capacity()
+    if not capacity:
+        risks.append(RiskFactor(RISK_HIGH, "no_accounts"))
+    usable = []
+    for account, remaining, blocked in capacity:
+        if blocked > session_pool.max_wait:
+            risks.append(RiskFactor(RISK_MEDIUM, "account_blocked", account.session_name, int(blocked)))
+        elif remaining > 0:
+            usable.append((account, remaining, blocked))
+
+    # Той самий вибір, що й у SessionPool.acquire: акаунт з найбільшим залишком ліміту
+    remaining = {account.session_name: budget for account, budget, _ in usable}
+    assigned: Counter[str] = Counter()
+    unassigned = 0
+    for _ in range(group_count):
+        name = max(remaining, key=remaining.get, default=None)
+        if name is None or remaining[name] <= 0:
+            unassigned += 1
+            continue
+        remaining[name] -= 1
+        assigned[name] += 1
+    if unassigned:
+        risks.append(RiskFactor(RISK_HIGH, "daily_limit_exceeded", value=unassigned))
+
+    requests_by_method: Counter[str] = Counter()
+    accounts = []
+    for account, budget, blocked in usable:
+        groups = assigned[account.session_name]
+        if not groups:
+            continue
+        uncached = [u for u in [bot_username] + managers + (row_managers or []) if account.entity_cache.get(u) is None]
+        needs: Counter[str] = Counter()
+        for method, count in per_group.items():
+            requests_by_method[method] += count * groups
+            needs[METHOD_FAMILIES.get(method, DEFAULT_FAMILY)] += count * groups
+        if uncached:
+            requests_by_method["ResolveUsernameRequest"] += len(uncached)
+            needs[METHOD_FAMILIES["ResolveUsernameRequest"]] += len(uncached)
+        limiter = account.rate_limiter
+        seconds = max(limiter.bucket(family).seconds_for(count) for family, count in needs.items())
+        accounts.append(AccountPlan(account.session_name, groups, uncached, seconds))
+
+        if blocked > 0:
+            risks.append(RiskFactor(RISK_MEDIUM, "account_flood_wait", account.session_name, int(blocked)))
+        for family in needs:
+            bucket = limiter.bucket(family)
+            if bucket.rate < bucket.base_rate:
+                risks.append(RiskFactor(RISK_MEDIUM, "rate_reduced", account.session_name))
+                break
+        used = session_pool.daily_group_limit - budget + groups
+        if used >= session_pool.daily_group_limit * DAILY_LIMIT_WARN_FRACTION:
+            risks.append(RiskFactor(RISK_MEDIUM, "daily_limit_near", account.session_name, used))
+        resolve_burst = limiter.bucket(METHOD_FAMILIES["ResolveUsernameRequest"]).capacity
+        if len(uncached) > resolve_burst:
+            risks.append(RiskFactor(RISK_MEDIUM, "many_resolves", account.session_name, len(uncached)))
+
+    # Паралельність батчу обмежує швидкість навіть тоді, коли лімітер не гальмує
+    waves = math.ceil((group_count - unassigned) / max(1, concurrency))
+    latency_seconds = waves * CRITICAL_PATH_ROUND_TRIPS * _average_round_trip()
+    estimated = max([latency_seconds] + [plan.seconds for plan in accounts])
+
+    budget_groups = None
+    if request_budget:
+        budget_groups = min(group_count, request_budget // max(1, sum(per_group.values())))
+        if budget_groups < group_count:
+            risks.append(RiskFactor(RISK_LOW, "budget_pause", value=budget_groups))
+
+    return BatchPlan(
+        groups=group_count,
+        round_trips=trips,
+        requests_by_method=requests_by_method,
+        accounts=accounts,
+        unassigned=unassigned,
+        estimated_seconds=estimated,
+        risks=risks,
+        budget_groups=budget_groups,
+    )
@@ -0,0 +1,158 @@
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Coroutine
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from .rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Ліміти Bot API (запитів за секунду, burst): загальний на бота, на приватний чат і на групу (20/хв)
+GLOBAL_LIMIT = (30.0, 30)
+PRIVATE_CHAT_LIMIT = (1.0, 3)
+GROUP_CHAT_LIMIT = (20 / 60, 3)
+
+# Максимальна довжина тексту повідомлення в Telegram
+MAX_MESSAGE_LENGTH = 4096
+# Роздільник між об'єднаними повідомленнями
+COALESCE_SEPARATOR = "\n\n"
+# Параметри, з якими повідомлення не можна об'єднати з іншими (клавіатура, відповідь, розмітка entities)
+NON_MERGEABLE_PARAMS = {"reply_markup", "reply_parameters", "entities", "message_thread_id", "business_connection_id"}
+
+
+@dataclass
+class _PendingMessage:
+    """sendMessage, що чекає на ліміт; поки він у черзі, до нього дописуються наступні повідомлення."""
+    options: tuple
+    texts: list[str]
+    result: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+    def can_merge(self, options: tuple, text: str) -> bool:
+        length = sum(len(t) for t in self.texts) + len(COALESCE_SEPARATOR) * len(self.texts) + len(text)
+        return options == self.options and length <= MAX_MESSAGE_LENGTH
+
+    def fail(self, error: BaseException) -> None:
+        # Якщо до повідомлення ніхто не дописався, помилку отримує лише відправник
+        if len(self.texts) == 1 or isinstance(error, asyncio.CancelledError):
+            self.result.cancel()
+        else:
+            self.result.set_exception(error)
+
+
+class OutboundMessageQueue(BaseRateLimiter[dict]):
+    """
+    Єдина черга вихідних запитів бота до Bot API.
+
+    Дотримується загального ліміту та лімітів на чат, повторює запит після RetryAfter
+    із затримкою, яку просить сервер, і об'єднує послідовні короткі повідомлення
+    в один чат, що чекають у черзі, в одне повідомлення до 4096 символів.
+
+    Повідомлення, яке потім редагуватиметься, треба надсилати з
+    rate_limit_args={"coalesce": False}, щоб його не об'єднало з іншими.
+    """
+
+    def __init__(self, max_retries: int):
+        self.max_retries = max_retries
+        self._global = TokenBucket(*GLOBAL_LIMIT)
+        self._chats: dict[int | str, TokenBucket] = {}
+        self._pending: dict[int | str, _PendingMessage] = {}
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        if chat_id not in self._chats:
+            # Від'ємні ID та @юзернейми — групи й канали, додатні — приватні чати
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            self._chats[chat_id] = TokenBucket(*(GROUP_CHAT_LIMIT if is_group else PRIVATE_CHAT_LIMIT))
+        return self._chats[chat_id]
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, bool | dict | list[dict]]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: dict | None,
+    ) -> bool | dict | list[dict]:
+        chat_id = data.get("chat_id")
+        coalesce = (rate_limit_args or {}).get("coalesce", True)
+        if (
+            coalesce and endpoint == "sendMessage" and chat_id is not None
+            and isinstance(data.get("text"), str) and not NON_MERGEABLE_PARAMS & data.keys()
+        ):
+            return await self._send_coalesced(callback, args, kwargs, chat_id, data)
+        return await self._run(callback, args, kwargs, chat_id)
+
+    async def _send_coalesced(self, callback, args, kwargs, chat_id: int | str, data: dict[str, Any]):
+        text = data["text"]
+        options = tuple(sorted((key, repr(value)) for key, value in data.items() if key != "text"))
+        pending = self._pending.get(chat_id)
+        if pending is not None and pending.can_merge(options, text):
+            # Повідомлення ще чекає на ліміт — дописуємо текст і отримуємо той самий результат
+            pending.texts.append(text)
+            return await asyncio.shield(pending.result)
+
+        pending = _PendingMessage(options, [text])
+        self._pending[chat_id] = pending
+        try:
+            # Поки чекаємо на ліміт чату, до повідомлення можуть дописатися наступні
+            await self._chat_bucket(chat_id).acquire()
+        except BaseException as e:
+            self._close(chat_id, pending)
+            pending.fail(e)
+            raise
+        self._close(chat_id, pending)
+
+        if len(pending.texts) > 1:
+            logger.debug("Coalesced %s messages to chat %s into one.", len(pending.texts), chat_id)
+        data["text"] = COALESCE_SEPARATOR.join(pending.texts)
+        try:
+            result = await self._run(callback, args, kwargs, chat_id, chat_acquired=True)
+        except BaseException as e:
+            pending.fail(e)
+            raise
+        pending.result.set_result(result)
+        return result
+
+    def _close(self, chat_id: int | str, pending: _PendingMessage) -> None:
+        if self._pending.get(chat_id) is pending:
+            del self._pending[chat_id]
+
+    async def _run(self, callback, args, kwargs, chat_id: int | str | None, chat_acquired: bool = False):
+        chat_bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+        for attempt in range(self.max_retries + 1):
+            if chat_bucket is not None and not chat_acquired:
+                await chat_bucket.acquire()
+            chat_acquired = False
+            await self._global.acquire()
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                seconds = _retry_after_seconds(e)
+                # Блокуємо чат (або всього бота, якщо запит не до чату) до дедлайну сервера
+                (chat_bucket or self._global).on_flood(seconds)
+                if attempt == self.max_retries:
+                    logger.error("Bot API rate limit hit for chat %s after %s retries.", chat_id, self.max_retries)
+                    raise
+                logger.warning("Bot API rate limit hit for chat %s, retrying in %ss.", chat_id, seconds)
+                continue
+            if chat_bucket is not None:
+                chat_bucket.on_success()
+            return result
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    # Залежно від версії PTB retry_after — int або timedelta
+    retry_after = error.retry_after
+    if isinstance(retry_after, datetime.timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
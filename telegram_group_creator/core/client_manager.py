@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+from .config import ENTITY_CACHE_TTL, FLOOD_MAX_WAIT, FLOOD_MAX_RETRIES, PEER_FLOOD_COOLDOWN, SESSION_FLUSH_INTERVAL
+from .entity_cache import EntityCache
+from .rate_limiter import RateLimiter
+
+if TYPE_CHECKING:
+    from telethon import TelegramClient
+    from .session_storage import BufferedSession
+
+logger = logging.getLogger(__name__)
+
+class TelethonClientManager:
+    """
+    Тримає одного довгоживучого Telethon-клієнта (один акаунт) на весь час роботи бота.
+
+    Клієнт створюється та перевіряється на авторизацію при старті застосунку
+    (post_init), перепідключається при обриві з'єднання і використовується
+    всіма батчами спільно, замість connect/disconnect на кожну групу.
+    Кілька менеджерів об'єднуються в SessionPool.
+    Сесія тримається в пам'яті (BufferedSession) і періодично зберігається у файл.
+    """
+
+    def __init__(self, api_id: int, api_hash: str, session_name: str):
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.session_name = session_name
+        self._client: "TelegramClient | None" = None
+        self._session: "BufferedSession | None" = None
+        self._flush_task: asyncio.Task | None = None
+        self._authorized = False
+        self._lock = asyncio.Lock()
+        # Ліміти та access_hash прив'язані до акаунта, тому лімітер і кеш — окремі для кожної сесії
+        self.rate_limiter = RateLimiter(
+            f"{session_name}.flood.json", FLOOD_MAX_WAIT, FLOOD_MAX_RETRIES, PEER_FLOOD_COOLDOWN
+        )
+        self.entity_cache = EntityCache(f"{session_name}.entities.json", ENTITY_CACHE_TTL, self.rate_limiter)
+
+    @property
+    def is_authorized(self) -> bool:
+        """Чи була сесія успішно авторизована (хоча б раз після старту)."""
+        return self._authorized
+
+    def _build_client(self) -> "TelegramClient":
+        # Telethon (разом із TL-схемою) імпортується лише тут — при першому підключенні акаунта
+        from telethon import TelegramClient
+        from .session_storage import BufferedSession
+        self._session = BufferedSession(self.session_name)
+        return TelegramClient(
+            self._session,
+            self.api_id,
+            self.api_hash,
+            system_version="4.16.30-vxCUSTOM",  # Вказуємо версію системи для стабільності
+            auto_reconnect=True,
+            connection_retries=5,
+            retry_delay=2,
+            flood_sleep_threshold=0,  # FloodWait обробляє RateLimiter, а не Telethon
+        )
+
+    async def start(self) -> None:
+        """Підключає клієнта при старті. Помилку лише логуємо, щоб бот усе одно запустився."""
+        try:
+            await self.get_client()
+            logger.info("Telethon client for session '%s' is connected and authorized.", self.session_name)
+        except ConnectionError as e:
+            logger.error("Telethon client could not be started: %s", e)
+
+    async def get_client(self) -> "TelegramClient":
+        """
+        Повертає підключений та авторизований клієнт.
+        Якщо з'єднання обірвалося, перепідключається.
+
+        Raises:
+            ConnectionError: якщо не вдалося підключитися або сесія не авторизована.
+        """
+        client = self._client
+        if client is not None and self._authorized and client.is_connected():
+            return client
+
+        async with self._lock:
+            if self._client is None:
+                self._client = self._build_client()
+                if self._session is not None:
+                    self._flush_task = asyncio.create_task(self._flush_periodically(self._session))
+            client = self._client
+
+            if not client.is_connected():
+                logger.info("Connecting to Telegram via Telethon (session: %s)...", self.session_name)
+                try:
+                    await client.connect()
+                except OSError as e:
+                    raise ConnectionError(f"Не вдалося підключитися до Telegram: {e}") from e
+
+            if not self._authorized:
+                if not await client.is_user_authorized():
+                    logger.error("Telethon session '%s' is not authorized. Run authentication flow first.", self.session_name)
+                    # Користувач має пройти автентифікацію через authenticate.py перед запуском бота
+                    raise ConnectionError("User not authorized")
+                self._authorized = True
+                logger.info("Telethon connection successful.")
+
+            return client
+
+    async def warm_entities(self, usernames: list[str]) -> None:
+        """Попередньо резолвить юзернейми (бот, менеджери), щоб батчі брали їх з кешу."""
+        try:
+            client = await self.get_client()
+        except ConnectionError as e:
+            logger.warning("Skipping entity pre-warm, client is not available: %s", e)
+            return
+        await self.entity_cache.warm(client, usernames)
+
+    async def _flush_periodically(self, session: "BufferedSession") -> None:
+        """
+        Пакетно записує зміни сесії у файл раз на SESSION_FLUSH_INTERVAL секунд.
+        Запис іде в окремому потоці; помилка (наприклад, файл довго заблокований) не зупиняє цикл,
+        а незаписані зміни повертаються в сесію до наступної спроби.
+        """
+        while True:
+            await asyncio.sleep(SESSION_FLUSH_INTERVAL)
+            changes = session.take_changes()
+            if changes is None:
+                continue
+            try:
+                await asyncio.to_thread(session.write_changes, changes)
+            except asyncio.CancelledError:
+                # Зупинка клієнта: незаписане запише close() при відключенні
+                session.restore_changes(changes)
+                raise
+            except Exception as e:
+                session.restore_changes(changes)
+                logger.warning("Periodic flush of session %s failed, will retry: %s", session.filename, e)
+
+    async def stop(self) -> None:
+        """Відключає клієнта при зупинці застосунку й записує сесію у файл."""
+        async with self._lock:
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+                self._flush_task = None
+            if self._client is not None and self._client.is_connected():
+                logger.info("Disconnecting Telethon client.")
+                # disconnect() закриває сесію, а close() записує незбережені зміни
+                await self._client.disconnect()
+            elif self._session is not None:
+                self._session.flush()
+            self._client = None
+            self._session = None
+            self._authorized = False
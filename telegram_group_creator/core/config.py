@@ -1,38 +1,101 @@
+import html
 import os
 import logging
 from dotenv import load_dotenv
-from telegram.helpers import escape_markdown
 
 # Завантажуємо змінні середовища з .env файлу
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Обов'язкові облікові дані перевіряються в validate_config() при запуску бота чи утиліт Telethon,
+# а не при імпорті, тож парсер, бенчмарки та інші інструменти працюють і без них
+
 # --- Telegram Bot API ---
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-if not BOT_TOKEN:
-    logger.error("TELEGRAM_BOT_TOKEN не знайдено у змінних середовища!")
-    raise ValueError("Не вказано TELEGRAM_BOT_TOKEN")
 
 # --- Telethon API ---
 try:
     API_ID = int(os.getenv("TELEGRAM_API_ID", 0))
-    if not API_ID:
-        raise ValueError("TELEGRAM_API_ID має бути цілим числом.")
-except (ValueError, TypeError):
-     logger.error("Некоректний TELEGRAM_API_ID у змінних середовища!")
-     raise ValueError("Некоректний TELEGRAM_API_ID")
-
+except ValueError:
+    API_ID = 0
 API_HASH = os.getenv("TELEGRAM_API_HASH")
-if not API_HASH:
-    logger.error("TELEGRAM_API_HASH не знайдено у змінних середовища!")
-    raise ValueError("Не вказано TELEGRAM_API_HASH")
 
 SESSION_NAME = os.getenv("TELETHON_SESSION_NAME", "bot_session")
 
+# Пул акаунтів для створення груп: назви сесій через кому (за замовчуванням — лише SESSION_NAME)
+SESSION_NAMES = [
+    name.strip() for name in os.getenv("TELETHON_SESSION_NAMES", SESSION_NAME).split(",") if name.strip()
+]
+# Скільки груп один акаунт може створити за добу, перш ніж планувальник перестане його обирати
+ACCOUNT_DAILY_GROUP_LIMIT = int(os.getenv("ACCOUNT_DAILY_GROUP_LIMIT", 50))
+# На скільки секунд акаунт виводиться з ротації після PeerFloodError (Telegram не повідомляє точний час)
+PEER_FLOOD_COOLDOWN = int(os.getenv("PEER_FLOOD_COOLDOWN", 6 * 3600))
+
+# Як часто (секунди) зміни сесії Telethon (сутності, стан оновлень) записуються у <session>.session.
+# Сесія живе в пам'яті процесу; нові ключі авторизації записуються одразу, решта — пакетом
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", 30))
+
+# Час життя закешованих юзернеймів (секунди); кеш зберігається у <session>.entities.json
+ENTITY_CACHE_TTL = int(os.getenv("ENTITY_CACHE_TTL", 7 * 24 * 3600))
+
+# FloodWait: максимальне очікування (секунди), після якого запит повторюється, і кількість повторів.
+# Довші FloodWait не очікуються — група завершується з помилкою, а дедлайн зберігається у <session>.flood.json
+FLOOD_MAX_WAIT = int(os.getenv("FLOOD_MAX_WAIT", 120))
+FLOOD_MAX_RETRIES = int(os.getenv("FLOOD_MAX_RETRIES", 2))
+
+# Скільки секунд pre-flight (перевірка бота й менеджерів перед підтвердженням) може тримати діалог.
+# Pre-flight не чекає FloodWait; не перевірені вчасно учасники лишаються в батчі й резолвляться під час створення
+PREFLIGHT_TIMEOUT = float(os.getenv("PREFLIGHT_TIMEOUT", 15))
+
+# SQLite база з контрольними точками батчів (перерваний батч продовжується після перезапуску)
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+
+# SQLite індекс уже створених груп (UID, назва, ID чату) для пошуку дублікатів перед запуском батчу
+GROUP_INDEX_PATH = os.getenv("GROUP_INDEX_PATH", "groups.sqlite3")
+
+# Скільки батчів виконуються одночасно у фоні (решта чекають у черзі)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 1))
+
+# Як часто (секунди) оновлюється повідомлення про прогрес батчу
+PROGRESS_EDIT_INTERVAL = float(os.getenv("PROGRESS_EDIT_INTERVAL", 3))
+
+# Скільки разів повторювати запит до Bot API після RetryAfter (429)
+BOT_API_MAX_RETRIES = int(os.getenv("BOT_API_MAX_RETRIES", 3))
+
+# Отримання оновлень: "polling" (за замовчуванням) або "webhook" (вбудований HTTP-сервер PTB)
+UPDATE_MODE = os.getenv("UPDATE_MODE", "polling").strip().lower()
+
+# Локальний ендпоінт метрик (/metrics — Prometheus, /metrics.json — JSON, /healthz — стан бота); 0 вимикає ендпоінт.
+# У режимі webhook він увімкнений за замовчуванням: інших перевірок стану за reverse proxy немає
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9090 if UPDATE_MODE == "webhook" else 0))
+# Webhook: публічна HTTPS-адреса, яку реєструємо в Telegram (зазвичай за reverse proxy з TLS)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+# Локальна адреса й порт сервера webhook та шлях, на який Telegram надсилає оновлення
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8443))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+# Секрет, який Telegram передає в заголовку X-Telegram-Bot-Api-Secret-Token; запити без нього відхиляються
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN", "")
+# Скільки одночасних з'єднань Telegram може відкрити до webhook (1-100)
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", 40))
+
+# Логування: рівень і формат виводу ("text" — рядки для консолі, "json" — один JSON-об'єкт на рядок)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").strip().lower()
+# Частка груп (0-1), для яких пишуться DEBUG-логи гарячого шляху; записи однієї групи пишуться всі разом
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 1.0))
+
+# Максимум MTProto-запитів за один запуск батчу; батч стає на паузу до того, як перевищить ліміт. 0 — без обмеження
+BATCH_REQUEST_BUDGET = int(os.getenv("BATCH_REQUEST_BUDGET", 0))
+
 # --- Bot Specific Settings ---
 BOT_TO_ADD = "@ExpirenzaBoxBot" # Юзернейм бота, якого завжди додаємо
 
+# Скільки груп батчу створюються одночасно
+GROUP_CREATION_CONCURRENCY = int(os.getenv("GROUP_CREATION_CONCURRENCY", 3))
+
 # Список менеджерів за замовчуванням
 PREDEFINED_MANAGERS = {
     1: {"name": "Марго", "username": "@margo_knp"},
@@ -65,5 +128,27 @@ def get_manager_list_text() -> str:
     lines.append("Приклад: 1, 3, 5")
     lines.append("\nАбо додати додаткових користувачів через @:")
     lines.append("Приклад: 1, 3 @extra_user1 @extra_user2")
-    lines.append(f"\nP.S. Бот {escape_markdown(BOT_TO_ADD)} буде доданий автоматично.")
-    return "\n".join(lines)
\ No newline at end of file
+    # Текст надсилається з ParseMode.HTML
+    lines.append(f"\nP.S. Бот {html.escape(BOT_TO_ADD)} буде доданий автоматично.")
+    return "\n".join(lines)
+
+
+def validate_config(require_bot: bool = True, require_telethon: bool = True) -> None:
+    """
+    Перевіряє обов'язкові змінні середовища.
+
+    Raises:
+        ValueError: якщо якоїсь змінної немає або вона некоректна (перелічуються всі).
+    """
+    errors = []
+    if require_bot and not BOT_TOKEN:
+        errors.append("Не вказано TELEGRAM_BOT_TOKEN")
+    if require_telethon:
+        if not API_ID:
+            errors.append("Некоректний TELEGRAM_API_ID (має бути цілим числом)")
+        if not API_HASH:
+            errors.append("Не вказано TELEGRAM_API_HASH")
+    if errors:
+        for error in errors:
+            logger.error(error)
+        raise ValueError("; ".join(errors))
\ No newline at end of file
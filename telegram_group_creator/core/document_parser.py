@@ -0,0 +1,238 @@
+import csv
+import logging
+import posixpath
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from .parser import parse_managers
+
+logger = logging.getLogger(__name__)
+
+# Розширення файлів, які бот приймає як список закладів
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx")
+
+# Назви колонок у рядку заголовка (без урахування регістру); без заголовка — порядок нижче
+COLUMN_ALIASES = {
+    "name": ("name", "назва", "назви", "заклад"),
+    "address": ("address", "адреса"),
+    "uid": ("uid",),
+    "managers": ("managers", "менеджери", "користувачі"),
+}
+DEFAULT_COLUMNS = ("name", "address", "uid", "managers")
+
+# Кодування CSV у порядку спроб (Excel з українською локаллю зберігає в cp1251)
+CSV_ENCODINGS = ("utf-8-sig", "cp1251")
+CSV_DELIMITERS = ",;\t"
+CSV_SNIFF_BYTES = 4096
+
+_XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_XLSX_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_CELL_COLUMN_RE = re.compile(r'[A-Z]+')
+
+
+@dataclass
+class VenueRow:
+    """Один заклад з файлу."""
+    row: int
+    name: str
+    uid: str
+    # None — використовувати менеджерів, вказаних для всього файлу
+    managers: Optional[List[str]]
+
+
+class VenueFileReader:
+    """
+    Потоково читає CSV/XLSX зі списком закладів і перевіряє кожен рядок.
+
+    Ітерація віддає лише коректні рядки; помилки з номерами рядків збираються в errors,
+    тож увесь файл перевіряється за один прохід без завантаження в пам'ять.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.errors: List[Tuple[Optional[int], str]] = []
+
+    def __iter__(self) -> Iterator[VenueRow]:
+        if self.path.lower().endswith(".xlsx"):
+            rows = _iter_xlsx_rows(self.path)
+        else:
+            rows = _iter_csv_rows(self.path)
+        columns = None
+        seen_uids: dict[str, int] = {}
+        try:
+            for number, cells in rows:
+                cells = [cell.strip() for cell in cells]
+                if not any(cells):
+                    continue
+                if columns is None:
+                    columns = _header_columns(cells)
+                    if columns is not None:
+                        continue
+                    columns = {name: index for index, name in enumerate(DEFAULT_COLUMNS)}
+                venue = self._validate(number, cells, columns, seen_uids)
+                if venue is not None:
+                    yield venue
+        except (zipfile.BadZipFile, ElementTree.ParseError, KeyError, ValueError, csv.Error) as e:
+            logger.warning("Could not read venue file %s: %s", self.path, e)
+            self.errors.append((None, f"Не вдалося прочитати файл: {e}"))
+        if columns is None and not self.errors:
+            self.errors.append((None, "Файл не містить жодного закладу."))
+
+    def _validate(self, number: int, cells: List[str], columns: dict[str, int],
+                  seen_uids: dict[str, int]) -> Optional[VenueRow]:
+        def cell(column: str) -> str:
+            index = columns.get(column)
+            return cells[index] if index is not None and index < len(cells) else ""
+
+        errors_before = len(self.errors)
+        name, address, uid = cell("name"), cell("address"), cell("uid")
+        if not name:
+            self.errors.append((number, "не вказано назву закладу."))
+        if not uid:
+            self.errors.append((number, "не вказано UID."))
+        elif uid in seen_uids:
+            self.errors.append((number, f"UID {uid} повторюється (вперше — рядок {seen_uids[uid]})."))
+        else:
+            seen_uids[uid] = number
+
+        managers = None
+        if cell("managers"):
+            managers, manager_errors = parse_managers(cell("managers"))
+            self.errors.extend((number, error) for error in manager_errors)
+
+        if len(self.errors) > errors_before:
+            return None
+        # Той самий формат назви, що й у текстовому режимі: "НАЗВА | Адреса"
+        return VenueRow(number, f"{name} | {address}" if address else name, uid, managers)
+
+
+def _header_columns(cells: List[str]) -> Optional[dict[str, int]]:
+    """Індекси колонок за рядком заголовка або None, якщо це не заголовок."""
+    columns = {}
+    for index, value in enumerate(cells):
+        for column, aliases in COLUMN_ALIASES.items():
+            if value.lower() in aliases and column not in columns:
+                columns[column] = index
+    if "name" in columns and "uid" in columns:
+        return columns
+    return None
+
+
+# --- CSV ---
+def _iter_csv_rows(path: str) -> Iterator[Tuple[int, List[str]]]:
+    encoding = _detect_csv_encoding(path)
+    with open(path, encoding=encoding, newline="") as f:
+        sample = f.read(CSV_SNIFF_BYTES)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        for cells in reader:
+            yield reader.line_num, cells
+
+
+def _detect_csv_encoding(path: str) -> str:
+    """Перше кодування, яким файл читається без помилок (перевіряється потоково)."""
+    for encoding in CSV_ENCODINGS[:-1]:
+        try:
+            with open(path, encoding=encoding) as f:
+                while f.read(1 << 16):
+                    pass
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return CSV_ENCODINGS[-1]
+
+
+# --- XLSX (Office Open XML; читається стандартною бібліотекою) ---
+def _iter_xlsx_rows(path: str) -> Iterator[Tuple[int, List[str]]]:
+    with zipfile.ZipFile(path) as archive:
+        shared_strings = _read_shared_strings(archive)
+        with archive.open(_first_sheet_path(archive)) as sheet:
+            cells: dict[int, str] = {}
+            sheet_data = None
+            for event, element in ElementTree.iterparse(sheet, events=("start", "end")):
+                if event == "start":
+                    if element.tag == f"{_XLSX_NS}sheetData":
+                        sheet_data = element
+                    continue
+                if element.tag == f"{_XLSX_NS}c":
+                    column = _column_index(element.get("r"), len(cells))
+                    cells[column] = _cell_text(element, shared_strings)
+                elif element.tag == f"{_XLSX_NS}row":
+                    number = int(element.get("r", 0))
+                    row = [""] * (max(cells) + 1) if cells else []
+                    for column, value in cells.items():
+                        row[column] = value
+                    yield number, row
+                    cells = {}
+                    # Звільняємо вже оброблені рядки, щоб пам'ять не росла з розміром аркуша
+                    if sheet_data is not None:
+                        sheet_data.clear()
+
+
+def _read_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    with archive.open("xl/sharedStrings.xml") as f:
+        for _, element in ElementTree.iterparse(f, events=("end",)):
+            if element.tag == f"{_XLSX_NS}si":
+                # Текст з форматуванням розбитий на кілька <t>
+                strings.append("".join(t.text or "" for t in element.iter(f"{_XLSX_NS}t")))
+                element.clear()
+    return strings
+
+
+def _first_sheet_path(archive: zipfile.ZipFile) -> str:
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    sheet = workbook.find(f"{_XLSX_NS}sheets/{_XLSX_NS}sheet")
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    rel_id = sheet.get(f"{_XLSX_REL_NS}id") if sheet is not None else None
+    for rel in rels:
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            if not target:
+                raise ValueError("аркуш книги не має шляху до файлу (Target)")
+            return target.lstrip("/") if target.startswith("/") else posixpath.normpath(f"xl/{target}")
+    return "xl/worksheets/sheet1.xml"
+
+
+def _column_index(reference: Optional[str], default: int) -> int:
+    """'C7' -> 2; без посилання — наступна колонка."""
+    match = _CELL_COLUMN_RE.match(reference or "")
+    if not match:
+        return default
+    index = 0
+    for letter in match.group():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def _cell_text(cell: ElementTree.Element, shared_strings: List[str]) -> str:
+    cell_type = cell.get("t")
+    if cell_type == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{_XLSX_NS}t"))
+    value = cell.findtext(f"{_XLSX_NS}v") or ""
+    if cell_type == "s":
+        if not value:
+            return ""
+        # int() сам кидає ValueError для нечислового індексу
+        index = int(value)
+        if not 0 <= index < len(shared_strings):
+            raise ValueError(f"комірка {cell.get('r')} посилається на відсутній рядок {index}")
+        return shared_strings[index]
+    if cell_type in (None, "n") and value:
+        # UID, збережений як число, не повинен перетворитися на "48390.0" чи "4.839E4"
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        if number.is_integer():
+            return str(int(number))
+    return value
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING
+from .rate_limiter import RateLimiter
+
+if TYPE_CHECKING:
+    # Telethon імпортується лише при першому зверненні до кешу, а не при імпорті модуля
+    from telethon import TelegramClient, types
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedEntity:
+    """Результат ResolveUsername, якого достатньо для побудови InputPeerUser."""
+    user_id: int
+    access_hash: int
+    resolved_at: float
+
+
+class EntityCache:
+    """
+    Кеш юзернейм -> (user_id, access_hash) з TTL та збереженням у JSON-файл.
+
+    access_hash прив'язаний до акаунта, тому кеш ведеться окремо для кожної сесії.
+    Паралельні запити одного й того ж юзернейму об'єднуються в один запит до API.
+    """
+
+    def __init__(self, path: str, ttl: float, rate_limiter: RateLimiter | None = None):
+        self.path = path
+        self.ttl = ttl
+        self.rate_limiter = rate_limiter
+        self._entries: dict[str, CachedEntity] = {}
+        self._pending: dict[tuple[str, int | None], asyncio.Task] = {}
+        self._load()
+
+    @staticmethod
+    def normalize(username: str) -> str:
+        """Ключ кешу: юзернейм без '@' у нижньому регістрі."""
+        return username.strip().lstrip('@').lower()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                raw = json.load(f)
+            self._entries = {key: CachedEntity(**value) for key, value in raw.items()}
+            logger.info("Loaded %s cached entities from %s", len(self._entries), self.path)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Could not load entity cache %s, starting empty: %s", self.path, e)
+            self._entries = {}
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({key: asdict(value) for key, value in self._entries.items()}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save entity cache %s: %s", self.path, e)
+
+    def get(self, username: str) -> "types.InputPeerUser | None":
+        """Повертає закешований peer або None, якщо запису немає чи він застарів."""
+        entry = self._entries.get(self.normalize(username))
+        if entry is None or time.time() - entry.resolved_at > self.ttl:
+            return None
+        from telethon import types
+        return types.InputPeerUser(user_id=entry.user_id, access_hash=entry.access_hash)
+
+    def invalidate(self, username: str) -> None:
+        """Видаляє запис, наприклад, коли юзернейм більше не резолвиться."""
+        if self._entries.pop(self.normalize(username), None) is not None:
+            logger.info("Entity cache entry for %s invalidated.", username)
+            self._save()
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Видаляє всі записи з вказаним user_id (коли API відхилив збережений access_hash)."""
+        keys = [key for key, entry in self._entries.items() if entry.user_id == user_id]
+        for key in keys:
+            self.invalidate(key)
+
+    async def resolve(self, client: "TelegramClient", username: str,
+                      max_flood_wait: int | None = None) -> "types.InputPeerUser":
+        """
+        Повертає InputPeerUser для юзернейму, звертаючись до API лише при промаху кешу.
+        max_flood_wait передається в RateLimiter.run (0 — не чекати FloodWait).
+
+        Raises:
+            Ті самі помилки, що й client.get_entity (UsernameNotOccupiedError, ValueError, ...).
+        """
+        cached = self.get(username)
+        if cached is not None:
+            return cached
+
+        key = self.normalize(username)
+        # Спільний запит лише для викликів з однаковим max_flood_wait: інакше батч, що може
+        # чекати FloodWait, отримав би помилку запиту pre-flight, який не чекає
+        pending_key = (key, max_flood_wait)
+        task = self._pending.get(pending_key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(client, username, key, max_flood_wait))
+            self._pending[pending_key] = task
+            task.add_done_callback(lambda _: self._pending.pop(pending_key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, client: "TelegramClient", username: str, key: str,
+                     max_flood_wait: int | None = None) -> "types.InputPeerUser":
+        from telethon import types
+
+        try:
+            if self.rate_limiter:
+                entity = await self.rate_limiter.run(
+                    "resolve", lambda: client.get_entity(username), method="ResolveUsernameRequest",
+                    max_flood_wait=max_flood_wait
+                )
+            else:
+                entity = await client.get_entity(username)
+            if not isinstance(entity, types.User):
+                raise ValueError(f"{username} не є користувачем.")
+        except Exception:
+            self.invalidate(key)
+            raise
+
+        self._entries[key] = CachedEntity(
+            user_id=entity.id, access_hash=entity.access_hash, resolved_at=time.time()
+        )
+        self._save()
+        logger.debug("Entity resolved and cached: %s -> ID=%s", username, entity.id)
+        return types.InputPeerUser(user_id=entity.id, access_hash=entity.access_hash)
+
+    async def warm(self, client: "TelegramClient", usernames: list[str]) -> None:
+        """Попередньо резолвить список юзернеймів (помилки лише логуються)."""
+        results = await asyncio.gather(
+            *(self.resolve(client, username) for username in usernames),
+            return_exceptions=True
+        )
+        for username, result in zip(usernames, results):
+            if isinstance(result, Exception):
+                logger.warning("Could not pre-resolve %s: %s", username, result)
@@ -0,0 +1,174 @@
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Hashable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Ключ, під яким індекс груп зберігається в application.bot_data
+BOT_DATA_KEY = "group_index"
+
+# Скільки чекати (секунди), якщо індекс саме записується
+DB_TIMEOUT = 10.0
+
+# Звідки група потрапила в індекс
+SOURCE_CREATED = "created"
+SOURCE_IMPORTED = "imported"
+
+# За чим знайдено збіг
+MATCH_UID = "uid"
+MATCH_NAME = "name"
+
+# Назва групи, яку створює бот (див. create_telegram_group)
+GROUP_TITLE_FORMAT = "(1) {name} + Expirenza Box"
+_GROUP_TITLE_RE = re.compile(r'^\(1\)\s*(.+?)\s*\+\s*Expirenza Box$', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    chat_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    uid TEXT,
+    account TEXT,
+    source TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_groups_uid ON groups(uid);
+CREATE INDEX IF NOT EXISTS idx_groups_name_key ON groups(name_key);
+"""
+
+
+@dataclass
+class IndexedGroup:
+    chat_id: int
+    name: str
+    uid: str | None
+    account: str | None = None
+    source: str = SOURCE_CREATED
+
+
+@dataclass
+class Duplicate:
+    """Заклад батчу, для якого вже існує група."""
+    key: Hashable
+    name: str
+    uid: str
+    matched: str
+    chat_id: int
+    existing_name: str
+
+
+def normalize_name(name: str) -> str:
+    """Ключ для порівняння назв: без зайвих пробілів і регістру."""
+    return _WHITESPACE_RE.sub(" ", name).strip().casefold()
+
+
+def name_from_title(title: str) -> str | None:
+    """Назва закладу з назви групи, створеної ботом, або None для інших чатів."""
+    match = _GROUP_TITLE_RE.match(title.strip())
+    return match.group(1) if match else None
+
+
+class GroupIndex:
+    """
+    Локальний індекс уже створених груп (UID, нормалізована назва, ID чату) у SQLite.
+
+    Поповнюється після кожного створення групи та разовим імпортом з діалогів акаунтів
+    (import_groups.py); перед запуском батчу перевіряє всі заклади одним запитом.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM groups").fetchone()[0]
+
+    def add(self, group: IndexedGroup) -> None:
+        self.add_many([group])
+
+    def add_many(self, groups: Iterable[IndexedGroup]) -> int:
+        """
+        Записує групи в індекс (повторний запис того самого чату оновлює його).
+        Відомий UID не затирається записом без UID. Повертає кількість записаних груп.
+        """
+        now = time.time()
+        count = 0
+
+        def rows():
+            nonlocal count
+            for group in groups:
+                count += 1
+                yield (group.chat_id, group.name, normalize_name(group.name), group.uid or None,
+                       group.account, group.source, now)
+
+        with self._conn:
+            self._conn.executemany(
+                """INSERT INTO groups (chat_id, name, name_key, uid, account, source, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(chat_id) DO UPDATE SET
+                       name = excluded.name, name_key = excluded.name_key,
+                       uid = COALESCE(excluded.uid, groups.uid),
+                       account = COALESCE(excluded.account, groups.account)""",
+                rows()
+            )
+        return count
+
+    def find_duplicates(self, venues: Iterable[tuple[Hashable, str, str]]) -> dict[Hashable, Duplicate]:
+        """
+        Перевіряє заклади (ключ, назва, UID) на вже існуючі групи.
+
+        Заклади записуються в тимчасову таблицю, а збіги за UID і за назвою шукаються
+        одним JOIN по індексах, тож перевірка тисяч рядків — це один запит, а не N.
+        Збіг за UID має пріоритет над збігом за назвою. Повертає {ключ: Duplicate}.
+        Перевірка йде через окреме з'єднання, тож її можна виконувати в робочому потоці.
+        """
+        keys: list[Hashable] = []
+
+        def rows():
+            for position, (key, name, uid) in enumerate(venues):
+                keys.append(key)
+                yield position, name, normalize_name(name), uid
+
+        connection = sqlite3.connect(self.path, timeout=DB_TIMEOUT)
+        connection.row_factory = sqlite3.Row
+        try:
+            with connection:
+                # Тимчасова таблиця живе лише в цьому з'єднанні
+                connection.execute(
+                    "CREATE TEMP TABLE candidates (pos INTEGER PRIMARY KEY, name TEXT, name_key TEXT, uid TEXT)"
+                )
+                connection.executemany("INSERT INTO candidates VALUES (?, ?, ?, ?)", rows())
+                matches = connection.execute(
+                    """SELECT c.pos, c.name, c.uid, 'uid' AS matched, g.chat_id, g.name AS existing_name
+                           FROM candidates c JOIN groups g ON g.uid = c.uid
+                       UNION ALL
+                       SELECT c.pos, c.name, c.uid, 'name', g.chat_id, g.name
+                           FROM candidates c JOIN groups g ON g.name_key = c.name_key
+                       ORDER BY 1"""
+                ).fetchall()
+        finally:
+            connection.close()
+
+        duplicates: dict[Hashable, Duplicate] = {}
+        for row in matches:
+            key = keys[row["pos"]]
+            known = duplicates.get(key)
+            if known is None or (known.matched == MATCH_NAME and row["matched"] == MATCH_UID):
+                duplicates[key] = Duplicate(
+                    key=key, name=row["name"], uid=row["uid"], matched=row["matched"],
+                    chat_id=row["chat_id"], existing_name=row["existing_name"]
+                )
+        if duplicates:
+            logger.info("Found %s already created groups among %s venues.", len(duplicates), len(keys))
+        return duplicates
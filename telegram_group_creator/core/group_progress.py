@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class GroupProgress:
+    """
+    Контрольна точка створення однієї групи. Дозволяє продовжити роботу
+    після перезапуску, не створюючи групу вдруге і не повторюючи виконані кроки.
+    """
+    chat_id: int | None = None
+    is_supergroup: bool = False
+    access_hash: int | None = None
+    history_set: bool = False
+    invited: bool = False
+    promoted: bool = False
+    uid_sent: bool = False
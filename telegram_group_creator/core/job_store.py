@@ -0,0 +1,373 @@
+import itertools
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+from .group_progress import GroupProgress
+
+logger = logging.getLogger(__name__)
+
+# Ключ, під яким сховище задач зберігається в application.bot_data
+BOT_DATA_KEY = "job_store"
+
+# Статуси задачі (батчу)
+# Завантажено з файлу й чекає підтвердження в діалозі
+JOB_DRAFT = "draft"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+# Зупинено через бюджет запитів; продовжується командою /resume
+JOB_PAUSED = "paused"
+
+# Статуси окремого закладу в задачі
+ITEM_PENDING = "pending"
+ITEM_DONE = "done"
+ITEM_FAILED = "failed"
+
+# Скільки закладів чернетки записується однією транзакцією. Між транзакціями батчі, що
+# виконуються, встигають записати свої контрольні точки, а не чекають на весь файл
+DRAFT_INSERT_CHUNK = 2000
+# Скільки чекати (секунди), поки інше з'єднання звільнить базу для запису
+DB_TIMEOUT = 10.0
+# Скільки закладів читається з бази за раз при проході по всій задачі (iter_items)
+ITEMS_PAGE_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    managers TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    managers TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    account TEXT,
+    chat_id INTEGER,
+    is_supergroup INTEGER NOT NULL DEFAULT 0,
+    access_hash INTEGER,
+    history_set INTEGER NOT NULL DEFAULT 0,
+    invited INTEGER NOT NULL DEFAULT 0,
+    promoted INTEGER NOT NULL DEFAULT 0,
+    uid_sent INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+"""
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: int
+    managers: list[str]
+    status: str
+
+
+@dataclass
+class JobItem:
+    index: int
+    name: str
+    uid: str
+    status: str
+    account: str | None
+    progress: GroupProgress
+    error: str | None
+    # Менеджери саме цього закладу (з файлу); None — менеджери задачі
+    managers: list[str] | None = None
+
+
+class JobStore:
+    """
+    Сховище батчів у локальній SQLite базі.
+
+    Для кожного закладу зберігається контрольна точка (GroupProgress) після кожного
+    кроку створення групи, тож перерваний батч можна продовжити без дублікатів.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=DB_TIMEOUT)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+    def _migrate(self) -> None:
+        """Додає колонки, яких немає в базах, створених попередніми версіями."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(job_items)")}
+        if "managers" not in columns:
+            self._conn.execute("ALTER TABLE job_items ADD COLUMN managers TEXT")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def create_job(self, user_id: int, managers: list[str], names: list[str], uids: list[str]) -> str:
+        """Створює задачу з переліком закладів і повертає її ID."""
+        job_id, _ = self._insert_job(
+            self._conn, user_id, managers, JOB_RUNNING, ((name, uid, None) for name, uid in zip(names, uids))
+        )
+        return job_id
+
+    def create_draft(self, user_id: int, managers: list[str],
+                     venues: Iterable[tuple[str, str, list[str] | None]]) -> tuple[str, int]:
+        """
+        Створює чернетку задачі з потоку (назва, UID, менеджери закладу або None).
+        Заклади записуються в базу по мірі читання, тож увесь список не тримається в пам'яті.
+        Повертає (ID задачі, кількість закладів).
+
+        Запис іде через окреме з'єднання порціями по DRAFT_INSERT_CHUNK, тож метод можна
+        викликати в робочому потоці (asyncio.to_thread), поки цикл подій працює з базою.
+        """
+        connection = sqlite3.connect(self.path, timeout=DB_TIMEOUT)
+        try:
+            return self._insert_job(connection, user_id, managers, JOB_DRAFT, venues, DRAFT_INSERT_CHUNK)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _insert_job(connection: sqlite3.Connection, user_id: int, managers: list[str], status: str,
+                    venues: Iterable[tuple[str, str, list[str] | None]],
+                    chunk_size: int | None = None) -> tuple[str, int]:
+        """Записує задачу й заклади однією транзакцією або, з chunk_size, порціями."""
+        job_id = uuid.uuid4().hex[:8]
+        now = time.time()
+        count = 0
+
+        def rows():
+            nonlocal count
+            for idx, (name, uid, item_managers) in enumerate(venues):
+                count += 1
+                yield job_id, idx, name, uid, json.dumps(item_managers) if item_managers is not None else None
+
+        insert_items = "INSERT INTO job_items (job_id, idx, name, uid, managers) VALUES (?, ?, ?, ?, ?)"
+        items = rows()
+        with connection:
+            connection.execute(
+                "INSERT INTO jobs (id, user_id, managers, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, user_id, json.dumps(managers), status, now, now)
+            )
+            if chunk_size is None:
+                connection.executemany(insert_items, items)
+        try:
+            while chunk_size is not None:
+                # Порція читається до початку транзакції, тож база заблокована лише на час вставки
+                chunk = list(itertools.islice(items, chunk_size))
+                with connection:
+                    connection.executemany(insert_items, chunk)
+                if len(chunk) < chunk_size:
+                    break
+        except BaseException:
+            # Недописана чернетка нікому не потрібна
+            with connection:
+                connection.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+                connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            raise
+        logger.info("Job %s (%s) stored with %s venues for user %s.", job_id, status, count, user_id)
+        return job_id, count
+
+    def activate_job(self, job_id: str) -> bool:
+        """Переводить чернетку в роботу; повертає False, якщо задача не є чернеткою."""
+        with self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (JOB_RUNNING, job_id, JOB_DRAFT)
+            )
+            if cursor.rowcount:
+                self._touch(job_id)
+        return cursor.rowcount > 0
+
+    def delete_job(self, job_id: str) -> None:
+        """
+        Видаляє задачу разом із закладами. Пише через окреме з'єднання, тож велику чернетку
+        можна видаляти в робочому потоці.
+        """
+        connection = sqlite3.connect(self.path, timeout=DB_TIMEOUT)
+        try:
+            with connection:
+                connection.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+                connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        finally:
+            connection.close()
+
+    def delete_items(self, job_id: str, indexes: Iterable[int]) -> int:
+        """
+        Видаляє заклади з задачі (наприклад, дублікати з чернетки); повертає кількість видалених.
+        Пише через окреме з'єднання, тож його можна викликати в робочому потоці.
+        """
+        connection = sqlite3.connect(self.path, timeout=DB_TIMEOUT)
+        try:
+            with connection:
+                cursor = connection.executemany(
+                    "DELETE FROM job_items WHERE job_id = ? AND idx = ?", ((job_id, index) for index in indexes)
+                )
+            return cursor.rowcount
+        finally:
+            connection.close()
+
+    def drop_item_managers(self, job_id: str, usernames: set[str]) -> int:
+        """
+        Прибирає вказаних менеджерів зі списку менеджерів задачі та зі списків менеджерів закладів
+        (наприклад, не знайдених pre-flight). Як і create_draft, пише через окреме з'єднання,
+        тож його можна викликати в робочому потоці. Повертає кількість змінених закладів.
+        """
+        connection = sqlite3.connect(self.path, timeout=DB_TIMEOUT)
+        try:
+            row = connection.execute("SELECT managers FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            job_managers = json.loads(row[0]) if row else []
+            kept_job_managers = [manager for manager in job_managers if manager not in usernames]
+            updates = []
+            for idx, managers in connection.execute(
+                    "SELECT idx, managers FROM job_items WHERE job_id = ? AND managers IS NOT NULL", (job_id,)):
+                current = json.loads(managers)
+                kept = [manager for manager in current if manager not in usernames]
+                if len(kept) < len(current):
+                    updates.append((json.dumps(kept), job_id, idx))
+            with connection:
+                if len(kept_job_managers) < len(job_managers):
+                    connection.execute(
+                        "UPDATE jobs SET managers = ? WHERE id = ?", (json.dumps(kept_job_managers), job_id)
+                    )
+                connection.executemany("UPDATE job_items SET managers = ? WHERE job_id = ? AND idx = ?", updates)
+        finally:
+            connection.close()
+        return len(updates)
+
+    def purge_drafts(self) -> int:
+        """Видаляє чернетки, що лишилися від діалогів до перезапуску; повертає їх кількість."""
+        draft_ids = [row["id"] for row in self._conn.execute("SELECT id FROM jobs WHERE status = ?", (JOB_DRAFT,))]
+        for job_id in draft_ids:
+            self.delete_job(job_id)
+        return len(draft_ids)
+
+    def get_job(self, job_id: str) -> Job | None:
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_from_row(row) if row else None
+
+    def interrupted_jobs(self) -> list[Job]:
+        """Задачі, що не були завершені (наприклад, процес зупинився посеред батчу)."""
+        rows = self._conn.execute(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY created_at", (JOB_RUNNING,)
+        ).fetchall()
+        return [self._job_from_row(row) for row in rows]
+
+    def recent_jobs(self, user_id: int, limit: int) -> list[Job]:
+        """Останні задачі користувача, новіші першими."""
+        rows = self._conn.execute(
+            "SELECT * FROM jobs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit)
+        ).fetchall()
+        return [self._job_from_row(row) for row in rows]
+
+    def get_items(self, job_id: str, limit: int = -1, offset: int = 0) -> list[JobItem]:
+        rows = self._conn.execute(
+            "SELECT * FROM job_items WHERE job_id = ? ORDER BY idx LIMIT ? OFFSET ?", (job_id, limit, offset)
+        ).fetchall()
+        return [self._item_from_row(row) for row in rows]
+
+    def iter_items(self, job_id: str, status: str | None = None, page_size: int = ITEMS_PAGE_SIZE) -> Iterator[JobItem]:
+        """
+        Заклади задачі (за бажанням — лише з певним статусом) сторінками по page_size.
+
+        Наступна сторінка починається після останнього прочитаного idx, а не з OFFSET,
+        тож зміна статусів під час проходу (батч завершує заклади) нічого не пропускає.
+        Читання йде через окреме з'єднання, тож прохід можна виконувати в робочому потоці.
+        """
+        connection = sqlite3.connect(self.path, timeout=DB_TIMEOUT)
+        connection.row_factory = sqlite3.Row
+        try:
+            last = -1
+            while True:
+                rows = connection.execute(
+                    "SELECT * FROM job_items WHERE job_id = ? AND idx > ? AND (? IS NULL OR status = ?) ORDER BY idx LIMIT ?",
+                    (job_id, last, status, status, page_size)
+                ).fetchall()
+                for row in rows:
+                    yield self._item_from_row(row)
+                if len(rows) < page_size:
+                    return
+                last = rows[-1]["idx"]
+        finally:
+            connection.close()
+
+    def count_items(self, job_id: str) -> dict[str, int]:
+        """Кількість закладів задачі за статусами (pending/done/failed)."""
+        rows = self._conn.execute(
+            "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+        ).fetchall()
+        counts = {ITEM_PENDING: 0, ITEM_DONE: 0, ITEM_FAILED: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def save_progress(self, job_id: str, index: int, account: str, progress: GroupProgress) -> None:
+        """Записує контрольну точку закладу після успішного кроку."""
+        with self._conn:
+            self._conn.execute(
+                """UPDATE job_items SET account = ?, chat_id = ?, is_supergroup = ?, access_hash = ?,
+                       history_set = ?, invited = ?, promoted = ?, uid_sent = ?
+                   WHERE job_id = ? AND idx = ?""",
+                (account, progress.chat_id, progress.is_supergroup, progress.access_hash,
+                 progress.history_set, progress.invited, progress.promoted, progress.uid_sent,
+                 job_id, index)
+            )
+            self._touch(job_id)
+
+    def finish_item(self, job_id: str, index: int, success: bool, error: str | None) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE job_items SET status = ?, error = ? WHERE job_id = ? AND idx = ?",
+                (ITEM_DONE if success else ITEM_FAILED, error, job_id, index)
+            )
+            self._touch(job_id)
+
+    def finish_job(self, job_id: str) -> None:
+        with self._conn:
+            self._conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (JOB_DONE, job_id))
+            self._touch(job_id)
+
+    def pause_job(self, job_id: str) -> None:
+        with self._conn:
+            self._conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (JOB_PAUSED, job_id))
+            self._touch(job_id)
+
+    def resume_job(self, job_id: str) -> bool:
+        """Знімає задачу з паузи; повертає False, якщо вона не була на паузі."""
+        with self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (JOB_RUNNING, job_id, JOB_PAUSED)
+            )
+            if cursor.rowcount:
+                self._touch(job_id)
+        return cursor.rowcount > 0
+
+    def _touch(self, job_id: str) -> None:
+        self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    @staticmethod
+    def _job_from_row(row: sqlite3.Row) -> Job:
+        return Job(id=row["id"], user_id=row["user_id"], managers=json.loads(row["managers"]), status=row["status"])
+
+    @staticmethod
+    def _item_from_row(row: sqlite3.Row) -> JobItem:
+        progress = GroupProgress(
+            chat_id=row["chat_id"],
+            is_supergroup=bool(row["is_supergroup"]),
+            access_hash=row["access_hash"],
+            history_set=bool(row["history_set"]),
+            invited=bool(row["invited"]),
+            promoted=bool(row["promoted"]),
+            uid_sent=bool(row["uid_sent"]),
+        )
+        return JobItem(
+            index=row["idx"], name=row["name"], uid=row["uid"], status=row["status"],
+            account=row["account"], progress=progress, error=row["error"],
+            managers=json.loads(row["managers"]) if row["managers"] is not None else None
+        )
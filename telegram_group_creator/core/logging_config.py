@@ -1,19 +1,153 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+import time
+import zlib
+from logging.handlers import QueueHandler, QueueListener
+
+from .config import LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE_RATE
+from .request_accounting import current_batch, current_group
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s -%(correlation)s %(message)s'
+
+# Незмінні типи аргументів, з якими форматування можна відкласти до потоку слухача
+IMMUTABLE_ARG_TYPES = frozenset((str, int, float, bool, type(None)))
+
+# Слухач черги логів; запускається один раз у setup_logging()
+_listener: QueueListener | None = None
+
+
+class CorrelationFilter(logging.Filter):
+    """
+    Додає до запису ID батчу та індекс групи з контексту, у якому його створено.
+    Працює в потоці, що логує, бо контекстні змінні недоступні потоку слухача.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.batch = current_batch.get()
+        record.group = current_group.get()
+        if record.batch is None:
+            record.correlation = ""
+        elif record.group is None:
+            record.correlation = f" [job {record.batch}]"
+        else:
+            record.correlation = f" [job {record.batch} #{record.group}]"
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Пропускає DEBUG-записи лише для частки rate груп. Рішення детерміноване для пари
+    (батч, група), тож для вибраної групи в лог потрапляють усі її кроки.
+    Записи поза групою вибираються випадково з тією ж ймовірністю.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        if self.rate <= 0:
+            return False
+        if record.group is None:
+            return random.random() < self.rate
+        return zlib.crc32(f"{record.batch}:{record.group}".encode()) % 10_000 < self.rate * 10_000
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler, який кладе запис у чергу без форматування. Повідомлення з %-аргументів
+    і трасування винятків формуються в потоці слухача, а не в циклі подій.
+    Якщо серед аргументів є щось, крім рядків і чисел (словники, списки, об'єкти), повідомлення
+    форматується одразу: до потоку слухача такий аргумент може встигнути змінитися.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(type(arg) in IMMUTABLE_ARG_TYPES for arg in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Один JSON-об'єкт на рядок: час, рівень, логер, повідомлення, батч, група та виняток."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        batch = getattr(record, "batch", None)
+        if batch is not None:
+            entry["batch"] = batch
+        group = getattr(record, "group", None)
+        if group is not None:
+            entry["group"] = group
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Текстовий формат, який не падає на записах без полів кореляції (наприклад, з інших обробників)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "correlation"):
+            record.correlation = ""
+        return super().format(record)
+
+
+def create_queue_logging(output: logging.Handler, debug_sample_rate: float) -> tuple[QueueHandler, QueueListener]:
+    """Обробник, що кладе записи (з полями кореляції) у чергу, і ще не запущений слухач, що пише їх в output."""
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationFilter())
+    queue_handler.addFilter(DebugSampler(debug_sample_rate))
+    return queue_handler, QueueListener(log_queue, output, respect_handler_level=True)
+
 
 def setup_logging():
-    """Налаштовує базову конфігурацію логування."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        stream=sys.stdout,  # Вивід логів у консоль
-        # filename='bot.log', # Розкоментуйте для запису у файл
-        # filemode='a'
-    )
+    """
+    Налаштовує логування через чергу: обробник кореневого логера лише кладе запис у чергу,
+    а форматує й пише в stdout окремий потік QueueListener, тож цикл подій не блокується на I/O.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)  # Вивід логів у консоль
+    # output = logging.FileHandler('bot.log') # Розкоментуйте для запису у файл
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter(TEXT_FORMAT))
+
+    queue_handler, _listener = create_queue_logging(output, LOG_DEBUG_SAMPLE_RATE)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    level = logging.getLevelName(LOG_LEVEL)
+    root.setLevel(level if isinstance(level, int) else logging.INFO)
+
+    _listener.start()
+    # Дописуємо чергу до кінця при виході з процесу
+    atexit.register(_listener.stop)
+
     # Зменшуємо детальність логів від сторонніх бібліотек
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("telegram.ext").setLevel(logging.INFO)
     logging.getLogger("telethon").setLevel(logging.INFO)
 
     logger = logging.getLogger(__name__)
-    logger.info("Logging configured successfully.")
\ No newline at end of file
+    if LOG_FORMAT not in ("text", "json"):
+        logger.warning("Unknown LOG_FORMAT '%s', using text.", LOG_FORMAT)
+    logger.info("Logging configured successfully (level %s, format %s).", logging.getLevelName(root.level), LOG_FORMAT)
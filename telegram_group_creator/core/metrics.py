@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import math
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Межі бакетів гістограм тривалості (секунди)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, math.inf)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Лічильник з мітками (наприклад, FloodWait секунди за сімейством методів)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+    def snapshot(self) -> list[dict]:
+        return [
+            {"labels": dict(zip(self.labelnames, key)), "value": value}
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram:
+    """Гістограма тривалостей з мітками (фаза створення групи, MTProto-метод)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # мітки -> [лічильники бакетів..., сума, кількість]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        values = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                values[i] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str):
+        """Вимірює тривалість блоку коду (зараховується і при винятку)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, func: Callable[[], Awaitable[T]], **labels: str) -> Callable[[], Awaitable[T]]:
+        """Обгортає корутинну функцію так, щоб кожен її виклик вимірювався."""
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with self.time(**labels):
+                return await func(*args, **kwargs)
+        return wrapper
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, values in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, values):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {values[-1]}")
+        return lines
+
+    def snapshot(self) -> list[dict]:
+        result = []
+        for key, values in sorted(self._values.items()):
+            count = values[-1]
+            result.append({
+                "labels": dict(zip(self.labelnames, key)),
+                "count": count,
+                "sum": round(values[-2], 6),
+                "avg": round(values[-2] / count, 6) if count else 0.0,
+                "buckets": {_format_value(bound): bucket for bound, bucket in zip(self.buckets, values)},
+            })
+        return result
+
+
+class MetricsRegistry:
+    """Набір метрик процесу з експортом у текстовому форматі Prometheus та JSON."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+
+# --- Метрики процесу ---
+REGISTRY = MetricsRegistry()
+
+GROUP_PHASE_SECONDS = REGISTRY.histogram(
+    "group_phase_seconds", "Duration of group creation phases.", ("phase",)
+)
+MTPROTO_REQUEST_SECONDS = REGISTRY.histogram(
+    "mtproto_request_seconds", "Duration of MTProto requests (container round trip for batched requests).", ("method",)
+)
+MTPROTO_REQUESTS = REGISTRY.counter(
+    "mtproto_requests_total", "MTProto requests sent, including FloodWait retries.", ("method",)
+)
+MTPROTO_FAILURES = REGISTRY.counter(
+    "mtproto_failures_total", "Failed MTProto requests by method and error type.", ("method", "error")
+)
+FLOOD_WAIT_SECONDS = REGISTRY.counter(
+    "flood_wait_seconds_total", "FloodWait seconds requested by Telegram.", ("family",)
+)
+FLOOD_RETRIES = REGISTRY.counter(
+    "flood_retries_total", "Requests retried after FloodWait.", ("family",)
+)
+GROUPS_PROCESSED = REGISTRY.counter(
+    "groups_processed_total", "Groups processed by result.", ("result",)
+)
+
+
+class MetricsServer:
+    """
+    Локальний HTTP-ендпоінт метрик.
+
+    GET /metrics — текстовий формат Prometheus, GET /metrics.json — JSON-знімок,
+    GET /healthz — результат health() (200, якщо status == "ok", інакше 503).
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int,
+                 health: Callable[[], dict] | None = None):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.health = health
+        self._server: asyncio.base_events.Server | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info("Metrics endpoint listening on http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Заголовки запиту не потрібні, але їх треба дочитати
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) >= 2 else ""
+            if path == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", self.registry.render_prometheus()
+            elif path == "/metrics.json":
+                status, content_type, body = "200 OK", "application/json", json.dumps(self.registry.snapshot())
+            elif path == "/healthz" and self.health is not None:
+                report = self.health()
+                status = "200 OK" if report.get("status") == "ok" else "503 Service Unavailable"
+                content_type, body = "application/json", json.dumps(report)
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "Not found\n"
+            payload = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logger.debug("Metrics request failed: %s", e)
+        finally:
+            writer.close()
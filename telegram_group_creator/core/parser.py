@@ -1,10 +1,57 @@
+import io
 import re
 import logging
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from .config import PREDEFINED_MANAGERS
 
 logger = logging.getLogger(__name__)
 
+# --- Шаблони компілюються один раз при імпорті ---
+# Заголовок секції (без урахування регістру); вміст може йти на тому ж рядку після двокрапки
+_SECTION_RE = re.compile(r'\s*(користувачі|назви|uid):(.*)', re.IGNORECASE | re.DOTALL)
+_EXTRA_MANAGERS_RE = re.compile(r'додаткові:(.*)', re.IGNORECASE | re.DOTALL)
+# Початкова нумерація типу "1. " або "1) "
+_NUMBERING_RE = re.compile(r'^\d+[\.\)]\s*')
+_MANAGER_SEPARATOR_RE = re.compile(r'[,\s]+')
+
+_SECTION_KEYS = {"користувачі": "managers", "назви": "names", "uid": "uids"}
+_SECTION_TITLES = {"managers": "Користувачі", "names": "Назви", "uids": "UID"}
+
+# Скільки помилок показувати користувачу (решта лише підраховується)
+MAX_REPORTED_ERRORS = 20
+
+
+class BulkParseError(ValueError):
+    """Помилки формату масового повідомлення; кожна з номером рядка (None — стосується всього тексту)."""
+
+    def __init__(self, errors: List[Tuple[Optional[int], str]]):
+        self.errors = errors
+        super().__init__(self.format())
+
+    def format(self, limit: int = MAX_REPORTED_ERRORS) -> str:
+        lines = [f"рядок {number}: {message}" if number else message for number, message in self.errors[:limit]]
+        if len(self.errors) > limit:
+            lines.append(f"... і ще {len(self.errors) - limit}")
+        return "\n".join(lines)
+
+
+def _parse_manager_token(part: str) -> Tuple[Optional[str], Optional[str]]:
+    """Розпізнає один елемент списку менеджерів: повертає (юзернейм, None) або (None, помилка)."""
+    if part.startswith('@'):
+        # Це юзернейм; переконуємося, що це не просто "@"
+        if len(part) > 1:
+            return part, None
+        return None, f"Некоректний юзернейм: '{part}'"
+    # Спробуємо розпізнати як номер
+    try:
+        num = int(part)
+    except ValueError:
+        return None, f"Не вдалося розпізнати '{part}'. Введіть номер або юзернейм (@username)."
+    if num in PREDEFINED_MANAGERS:
+        return PREDEFINED_MANAGERS[num]['username'], None
+    return None, f"Менеджера з номером {num} не знайдено."
+
+
 def parse_managers(text: str) -> Tuple[List[str], List[str]]:
     """
     Парсить ввід користувача для вибору менеджерів.
@@ -12,134 +59,114 @@ def parse_managers(text: str) -> Tuple[List[str], List[str]]:
     """
     selected_usernames = set()
     errors = []
-    parts = re.split(r'[,\s]+', text.strip()) # Розділяємо по комі або пробілах
-
-    for part in parts:
-        part = part.strip()
+    for part in _MANAGER_SEPARATOR_RE.split(text.strip()): # Розділяємо по комі або пробілах
         if not part:
             continue
-
-        if part.startswith('@'):
-            # Це юзернейм
-            if len(part) > 1: # Переконуємося, що це не просто "@"
-                selected_usernames.add(part)
-            else:
-                errors.append(f"Некоректний юзернейм: '{part}'")
+        username, error = _parse_manager_token(part)
+        if error:
+            errors.append(error)
         else:
-            # Спробуємо розпізнати як номер
-            try:
-                num = int(part)
-                if num in PREDEFINED_MANAGERS:
-                    selected_usernames.add(PREDEFINED_MANAGERS[num]['username'])
-                else:
-                    errors.append(f"Менеджера з номером {num} не знайдено.")
-            except ValueError:
-                errors.append(f"Не вдалося розпізнати '{part}'. Введіть номер або юзернейм (@username).")
+            selected_usernames.add(username)
 
-    return sorted(list(selected_usernames)), errors
+    return sorted(selected_usernames), errors
+
+def _clean_lines(text: str) -> List[str]:
+    """Непорожні рядки без початкової нумерації."""
+    return [_NUMBERING_RE.sub('', line, count=1) for line in map(str.strip, text.splitlines()) if line]
 
 def parse_names(text: str) -> List[str]:
     """Парсить список назв закладів, по одній на рядок."""
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    # Видаляємо початкову нумерацію типу "1. " або "1) "
-    cleaned_lines = [re.sub(r'^\d+[\.\)]\s*', '', line) for line in lines]
-    return cleaned_lines
+    return _clean_lines(text)
 
 def parse_uids(text: str) -> List[str]:
     """Парсить список UID, по одному на рядок."""
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-     # Видаляємо початкову нумерацію типу "1. " або "1) "
-    cleaned_lines = [re.sub(r'^\d+[\.\)]\s*', '', line) for line in lines]
-    return cleaned_lines
+    return _clean_lines(text)
 
 
-def parse_bulk_message(text: str) -> Dict[str, List[str]]:
+def iter_lines(text: str) -> Iterator[str]:
+    """Лінивий ітератор рядків (\\n, \\r\\n та \\r), без копіювання тексту в список."""
+    return io.StringIO(text, newline=None)
+
+
+def parse_bulk_lines(lines: Iterable[str]) -> Dict[str, List[str]]:
     """
-    Парсить одне велике повідомлення з секціями.
+    Парсить масове повідомлення за один прохід по рядках.
     Повертає словник {'managers': [...], 'names': [...], 'uids': [...]}
-    Або кидає ValueError у разі помилки формату.
+    Або кидає BulkParseError з усіма знайденими помилками та номерами рядків.
     """
-    data: Dict[str, List[str]] = {"managers": [], "names": [], "uids": []}
+    managers = set()
+    data: Dict[str, List[str]] = {"names": [], "uids": []}
+    # Номер рядка кожної назви та UID — для точного повідомлення про розбіжність кількості
+    line_numbers: Dict[str, List[int]] = {"names": [], "uids": []}
+    section_lines: Dict[str, int] = {}
+    errors: List[Tuple[Optional[int], str]] = []
     current_section: Optional[str] = None
-    section_content: Dict[str, str] = {"користувачі": "", "назви": "", "uid": ""}
-    section_map = {"користувачі": "managers", "назви": "names", "uid": "uids"}
-
-    lines = text.splitlines()
-
-    for line in lines:
-        line_stripped = line.strip().lower()
-
-        # Перевіряємо, чи рядок починається з назви секції
-        matched_section = None
-        for section_key in section_map.keys():
-            if line_stripped.startswith(section_key + ":"):
-                matched_section = section_key
-                break
-
-        if matched_section:
-            current_section = matched_section
-            # Видаляємо назву секції з першого рядка її контенту
-            content_after_marker = line.strip()[len(matched_section)+1:].strip()
-            if content_after_marker:
-                 section_content[current_section] = content_after_marker + "\n"
-            else:
-                 section_content[current_section] = "" # Починаємо збирати контент для цієї секції
-        elif current_section:
-            # Додаємо рядок до контенту поточної секції
-             section_content[current_section] += line + "\n"
-
-    # Парсимо контент кожної секції
-    try:
-        # Обробка менеджерів (включаючи "Додаткові:")
-        manager_text = ""
-        if "користувачі" in section_content:
-             manager_lines = section_content["користувачі"].strip().splitlines()
-             for line in manager_lines:
-                 if not line.strip().lower().startswith("додаткові:"):
-                     manager_text += line.strip() + " " # Додаємо номери/юзернейми через пробіл
-                 else:
-                     # Обробляємо додаткових користувачів
-                     extra_users = line.split(":", 1)[1].strip()
-                     manager_text += extra_users + " "
-
-        parsed_managers, manager_errors = parse_managers(manager_text.strip())
-        if manager_errors:
-            # Можна об'єднати помилки або взяти першу
-            raise ValueError(f"Помилки в секції 'Користувачі': {'; '.join(manager_errors)}")
-        data["managers"] = parsed_managers
-    except Exception as e:
-        logger.error(f"Помилка парсингу секції 'Користувачі': {e}")
-        raise ValueError(f"Помилка обробки секції 'Користувачі': {e}")
 
-
-    try:
-        if "назви" in section_content:
-            data["names"] = parse_names(section_content["назви"].strip())
+    for number, line in enumerate(lines, start=1):
+        header = _SECTION_RE.match(line)
+        if header:
+            current_section = _SECTION_KEYS[header.group(1).lower()]
+            if current_section in section_lines:
+                errors.append((number, f"Секція '{_SECTION_TITLES[current_section]}:' повторюється "
+                                       f"(вперше — рядок {section_lines[current_section]})."))
+            else:
+                section_lines[current_section] = number
+            content = header.group(2).strip()
+        elif current_section is None:
+            # Текст до першої секції ігнорується
+            continue
         else:
-            raise ValueError("Секція 'Назви:' відсутня.")
-    except Exception as e:
-        logger.error(f"Помилка парсингу секції 'Назви': {e}")
-        raise ValueError(f"Помилка обробки секції 'Назви': {e}")
-
+            content = line.strip()
+        if not content:
+            continue
 
-    try:
-        if "uid" in section_content:
-             data["uids"] = parse_uids(section_content["uid"].strip())
+        if current_section == "managers":
+            # Рядок "Додаткові:" містить юзернейми додаткових користувачів
+            extra = _EXTRA_MANAGERS_RE.match(content)
+            if extra:
+                content = extra.group(1)
+            for part in _MANAGER_SEPARATOR_RE.split(content):
+                if not part:
+                    continue
+                username, error = _parse_manager_token(part)
+                if error:
+                    errors.append((number, error))
+                else:
+                    managers.add(username)
         else:
-            raise ValueError("Секція 'UID:' відсутня.")
-    except Exception as e:
-        logger.error(f"Помилка парсингу секції 'UID': {e}")
-        raise ValueError(f"Помилка обробки секції 'UID': {e}")
-
-    # Перевірка на порожні секції (опціонально, залежно від вимог)
-    if not data["names"]:
-         raise ValueError("Секція 'Назви:' не містить даних.")
-    if not data["uids"]:
-         raise ValueError("Секція 'UID:' не містить даних.")
+            value = _NUMBERING_RE.sub('', content, count=1)
+            if not value:
+                errors.append((number, "порожня назва закладу." if current_section == "names" else "порожній UID."))
+                continue
+            data[current_section].append(value)
+            line_numbers[current_section].append(number)
+
     # Менеджери можуть бути порожніми, якщо користувач їх не вказав
+    for section in ("names", "uids"):
+        title = _SECTION_TITLES[section]
+        if section not in section_lines:
+            errors.append((None, f"Секція '{title}:' відсутня."))
+        elif not data[section]:
+            errors.append((section_lines[section], f"Секція '{title}:' не містить даних."))
+
+    names, uids = data["names"], data["uids"]
+    if names and uids and len(names) != len(uids):
+        errors.append((None, f"Кількість назв ({len(names)}) не збігається з кількістю UID ({len(uids)})."))
+        # Перший зайвий рядок — там, де списки розходяться
+        if len(names) > len(uids):
+            errors.append((line_numbers["names"][len(uids)], f"назва '{names[len(uids)]}' не має відповідного UID."))
+        else:
+            errors.append((line_numbers["uids"][len(names)], f"UID '{uids[len(names)]}' не має відповідної назви."))
 
-    # Фінальна перевірка відповідності кількості назв та UID
-    if len(data["names"]) != len(data["uids"]):
-        raise ValueError(f"Кількість назв ({len(data['names'])}) не збігається з кількістю UID ({len(data['uids'])}).")
+    if errors:
+        raise BulkParseError(errors)
+    return {"managers": sorted(managers), "names": names, "uids": uids}
 
-    return data
\ No newline at end of file
+
+def parse_bulk_message(text: str) -> Dict[str, List[str]]:
+    """
+    Парсить одне велике повідомлення з секціями.
+    Повертає словник {'managers': [...], 'names': [...], 'uids': [...]}
+    Або кидає BulkParseError (підклас ValueError) у разі помилки формату.
+    """
+    return parse_bulk_lines(iter_lines(text))
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from .config import PREFLIGHT_TIMEOUT
+from .entity_cache import EntityCache
+from .session_pool import SessionPool
+
+logger = logging.getLogger(__name__)
+
+# Причини, з яких юзернейм не вдалося резолвити; текст для користувача — в message_texts
+REASON_NOT_FOUND = "not_found"
+REASON_NOT_USER = "not_user"
+REASON_ERROR = "error"
+# Причини, за якими учасник точно не може бути доданий; REASON_ERROR (FloodWait, мережа)
+# означає лише, що перевірити зараз не вдалося — батч спробує ще раз
+MISSING_REASONS = (REASON_NOT_FOUND, REASON_NOT_USER)
+
+
+@dataclass
+class PreflightResult:
+    """Результат перевірки учасників перед підтвердженням батчу."""
+    accounts: list[str] = field(default_factory=list)
+    # юзернейм -> причина (REASON_*)
+    unresolved: dict[str, str] = field(default_factory=dict)
+    bot_unresolved: bool = False
+    seconds: float = 0.0
+
+    @property
+    def missing(self) -> dict[str, str]:
+        """Учасники, яких точно немає в Telegram (або це не користувачі)."""
+        return {username: reason for username, reason in self.unresolved.items() if reason in MISSING_REASONS}
+
+
+def _reason(error: Exception) -> str:
+    from telethon.errors import UsernameNotOccupiedError, UsernameInvalidError
+
+    if isinstance(error, (UsernameNotOccupiedError, UsernameInvalidError)):
+        return REASON_NOT_FOUND
+    # get_entity кидає ValueError і для неіснуючого юзернейму, і для каналу/групи;
+    # EntityCache додає "не є користувачем" для не-користувачів
+    if isinstance(error, ValueError):
+        return REASON_NOT_USER if "не є користувачем" in str(error) else REASON_NOT_FOUND
+    return REASON_ERROR
+
+
+async def run_preflight(session_pool: SessionPool, bot_username: str, usernames: list[str],
+                        timeout: float = PREFLIGHT_TIMEOUT) -> PreflightResult:
+    """
+    Один раз резолвить бота та всіх менеджерів перед створенням будь-якої групи.
+
+    Усі акаунти пулу перевіряються паралельно, а в кожному з них — усі юзернейми
+    (access_hash у кожного акаунта свій, тож результати одразу лягають у їхні кеші
+    і батч не повторює ці запити). Закешовані юзернейми не звертаються до API.
+
+    Перевірка йде в обробнику оновлення, тому FloodWait не очікується, а на все дається
+    timeout секунд: не перевірені вчасно юзернейми отримують REASON_ERROR, а їхні запити
+    дозавершуються у фоні й заповнюють кеш для батчу.
+
+    Raises:
+        ConnectionError: якщо жоден акаунт не підключений і не авторизований.
+    """
+    started = time.monotonic()
+    await session_pool.ensure_available()
+    accounts = [account for account in session_pool.accounts if account.is_authorized]
+    if not accounts:
+        raise ConnectionError("Жоден акаунт Telethon не авторизований.")
+
+    # Порядок зберігаємо, дублікати (з різним регістром чи '@') прибираємо
+    unique: dict[str, str] = {}
+    for name in [bot_username, *usernames]:
+        unique.setdefault(EntityCache.normalize(name), name)
+    targets = list(unique.values())
+
+    deadline = started + timeout
+
+    async def resolve_all(account) -> list:
+        client = await account.get_client()
+        tasks = [
+            asyncio.ensure_future(account.entity_cache.resolve(client, username, max_flood_wait=0))
+            for username in targets
+        ]
+        await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()))
+        outcomes = []
+        for task in tasks:
+            if task.done():
+                outcomes.append(task.exception() or task.result())
+            else:
+                # Сам запит захищений asyncio.shield в EntityCache і продовжується у фоні
+                task.cancel()
+                outcomes.append(TimeoutError(f"не перевірено за {timeout:g} с"))
+        return outcomes
+
+    per_account = await asyncio.gather(*(resolve_all(account) for account in accounts), return_exceptions=True)
+
+    result = PreflightResult()
+    for account, outcomes in zip(accounts, per_account):
+        if isinstance(outcomes, Exception):
+            # Акаунт відвалився під час перевірки — батч однаково обере інший
+            logger.warning("Pre-flight skipped account '%s': %s", account.session_name, outcomes)
+            continue
+        result.accounts.append(account.session_name)
+        for username, outcome in zip(targets, outcomes):
+            if not isinstance(outcome, Exception) or result.unresolved.get(username) in MISSING_REASONS:
+                continue
+            logger.warning("Pre-flight: %s is not resolvable from '%s': %s", username, account.session_name, outcome)
+            # Точна відповідь одного акаунта ("не існує") важливіша за збій перевірки в іншого
+            result.unresolved[username] = _reason(outcome)
+
+    if not result.accounts:
+        raise ConnectionError("Жоден акаунт Telethon не зміг перевірити учасників.")
+    result.bot_unresolved = bot_username in result.missing
+    result.seconds = time.monotonic() - started
+    logger.info(
+        "Pre-flight resolved %s/%s participants on %s accounts in %.2fs.",
+        len(targets) - len(result.unresolved), len(targets), len(result.accounts), result.seconds
+    )
+    return result
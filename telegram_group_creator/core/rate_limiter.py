@@ -0,0 +1,304 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, TypeVar
+
+from .metrics import MTPROTO_REQUEST_SECONDS, MTPROTO_FAILURES, FLOOD_WAIT_SECONDS, FLOOD_RETRIES
+from .request_accounting import ACCOUNTING
+
+if TYPE_CHECKING:
+    # Telethon імпортується лише під час першого запиту до API, а не при імпорті модуля
+    from telethon import TelegramClient
+    from telethon.tl.tlobject import TLRequest
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Сімейства MTProto-методів, що мають спільні ліміти на боці Telegram
+METHOD_FAMILIES = {
+    "ResolveUsernameRequest": "resolve",
+    "GetUsersRequest": "resolve",
+    "CreateChannelRequest": "create",
+    "CreateChatRequest": "create",
+    "InviteToChannelRequest": "invite",
+    "AddChatUserRequest": "invite",
+    "EditAdminRequest": "admin",
+    "EditChatAdminRequest": "admin",
+    "EditChatDefaultBannedRightsRequest": "admin",
+    "SendMessageRequest": "message",
+}
+DEFAULT_FAMILY = "default"
+# Псевдо-сімейство для PeerFloodError: обмеження всього акаунта без точного часу
+PEER_FLOOD_FAMILY = "peer_flood"
+
+# (запитів на секунду, розмір "пачки") для кожного сімейства
+FAMILY_LIMITS = {
+    "resolve": (0.5, 5),
+    "create": (0.2, 2),
+    "invite": (0.5, 3),
+    "admin": (2.0, 5),
+    "message": (1.0, 5),
+    DEFAULT_FAMILY: (1.0, 5),
+}
+
+# Мінімальна швидкість, до якої може знизитися сімейство після FloodWait
+MIN_RATE_FRACTION = 0.1
+# Наскільки (частка від базової швидкості) відновлюється швидкість після кожного успішного запиту
+RECOVERY_FRACTION = 0.05
+
+
+def family_for(request: "TLRequest") -> str:
+    """Повертає сімейство методу для TL-запиту."""
+    return METHOD_FAMILIES.get(type(request).__name__, DEFAULT_FAMILY)
+
+
+class TokenBucket:
+    """Token bucket для одного сімейства методів з паузою до дедлайну FloodWait."""
+
+    def __init__(self, rate: float, burst: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        # Unix-час, до якого Telegram заборонив запити цього сімейства
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def flood_remaining(self) -> float:
+        return max(0.0, self.blocked_until - time.time())
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, max_flood_wait: float | None = None) -> bool:
+        """
+        Бере токен, чекаючи на поповнення і FloodWait сімейства. Повертає False без
+        очікування, якщо FloodWait (зокрема отриманий, поки запит стояв у черзі) довший за max_flood_wait.
+        """
+        # Очікувачі обслуговуються по черзі, поки утримують lock
+        async with self._lock:
+            while True:
+                flood_wait = self.flood_remaining()
+                if flood_wait > 0:
+                    if max_flood_wait is not None and flood_wait > max_flood_wait:
+                        return False
+                    await asyncio.sleep(flood_wait)
+                    # Токени не накопичуються, поки сімейство заблоковане
+                    self.updated = time.monotonic()
+                    continue
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def seconds_for(self, count: int) -> float:
+        """Скільки секунд (з урахуванням FloodWait) знадобиться на count токенів за поточної швидкості."""
+        if count <= 0:
+            return 0.0
+        tokens = min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        return self.flood_remaining() + max(0.0, count - tokens) / self.rate
+
+    def on_flood(self, seconds: int) -> None:
+        """Блокує сімейство до дедлайну та вдвічі знижує швидкість."""
+        self.blocked_until = max(self.blocked_until, time.time() + seconds)
+        self.rate = max(self.base_rate * MIN_RATE_FRACTION, self.rate / 2)
+        # Одразу після дедлайну дозволяємо один запит, далі — зі зниженою швидкістю
+        self.tokens = min(self.tokens, 1.0)
+
+    def on_success(self) -> None:
+        self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_FRACTION)
+
+
+class RateLimiter:
+    """
+    Глобальний лімітер запитів одного акаунта Telethon.
+
+    Кожне сімейство методів має власний token bucket. FloodWaitError
+    призупиняє лише відповідне сімейство, а дедлайни зберігаються у JSON-файл,
+    щоб після перезапуску бот не звертався до API одразу ж.
+    """
+
+    def __init__(self, path: str, max_flood_wait: int, max_flood_retries: int, peer_flood_cooldown: int,
+                 limits: dict[str, tuple[float, int]] | None = None):
+        self.path = path
+        # (швидкість, burst) для кожного сімейства; за замовчуванням — FAMILY_LIMITS
+        self.limits = limits or FAMILY_LIMITS
+        self.max_flood_wait = max_flood_wait
+        self.max_flood_retries = max_flood_retries
+        self.peer_flood_cooldown = peer_flood_cooldown
+        self._buckets: dict[str, TokenBucket] = {}
+        self._load()
+
+    def bucket(self, family: str) -> TokenBucket:
+        if family not in self._buckets:
+            rate, burst = self.limits.get(family, self.limits[DEFAULT_FAMILY])
+            self._buckets[family] = TokenBucket(rate, burst)
+        return self._buckets[family]
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                deadlines = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load flood deadlines %s: %s", self.path, e)
+            return
+        now = time.time()
+        for family, deadline in deadlines.items():
+            if deadline > now:
+                self.bucket(family).blocked_until = deadline
+                logger.warning("Method family '%s' is still flood-limited for %ss.", family, int(deadline - now))
+
+    def _save(self) -> None:
+        now = time.time()
+        deadlines = {
+            family: bucket.blocked_until
+            for family, bucket in self._buckets.items() if bucket.blocked_until > now
+        }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(deadlines, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save flood deadlines %s: %s", self.path, e)
+
+    def flood_remaining(self, family: str) -> float:
+        """Скільки секунд ще діє FloodWait для сімейства."""
+        return self.bucket(family).flood_remaining()
+
+    def record_flood(self, family: str, seconds: int) -> None:
+        logger.warning("FloodWait of %ss for method family '%s'.", seconds, family)
+        FLOOD_WAIT_SECONDS.inc(seconds, family=family)
+        self.bucket(family).on_flood(seconds)
+        self._save()
+
+    async def run(self, family: str, call: Callable[[], Awaitable[T]], method: str | None = None,
+                  max_flood_wait: int | None = None) -> T:
+        """
+        Виконує виклик API в межах ліміту сімейства.
+
+        Після FloodWaitError чекає вказаний час і повторює виклик. Якщо очікування
+        довше за max_flood_wait або вичерпано повтори — кидає FloodWaitError далі.
+        method — назва MTProto-методу для метрик (за замовчуванням — сімейство).
+        max_flood_wait замінює ліміт лімітера для цього виклику (0 — не чекати взагалі).
+        """
+        from telethon.errors import FloodWaitError, PeerFloodError
+
+        method = method or family
+        bucket = self.bucket(family)
+        max_wait = self.max_flood_wait if max_flood_wait is None else max_flood_wait
+        attempt = 0
+        while True:
+            remaining = bucket.flood_remaining()
+            # Не тримаємо групу в очікуванні годинами — одразу повідомляємо про ліміт
+            if remaining > max_wait or not await bucket.acquire(max_wait):
+                raise FloodWaitError(request=None, capture=int(bucket.flood_remaining()) + 1)
+            # Кожна спроба — окремий запит до Telegram (зараховується в облік батчу)
+            ACCOUNTING.record(method)
+            try:
+                with MTPROTO_REQUEST_SECONDS.time(method=method):
+                    result = await call()
+            except FloodWaitError as e:
+                MTPROTO_FAILURES.inc(method=method, error=type(e).__name__)
+                self.record_flood(family, e.seconds)
+                attempt += 1
+                if attempt > self.max_flood_retries or e.seconds > max_wait:
+                    raise
+                FLOOD_RETRIES.inc(family=family)
+                logger.info("Retrying '%s' call after FloodWait (attempt %s/%s).", family, attempt, self.max_flood_retries)
+                continue
+            except PeerFloodError as e:
+                MTPROTO_FAILURES.inc(method=method, error=type(e).__name__)
+                # Акаунт обмежений загалом — пул акаунтів перестане його обирати до кінця cooldown
+                self.record_flood(PEER_FLOOD_FAMILY, self.peer_flood_cooldown)
+                raise
+            except Exception as e:
+                MTPROTO_FAILURES.inc(method=method, error=type(e).__name__)
+                raise
+            bucket.on_success()
+            return result
+
+    async def call(self, client: "TelegramClient", request: "TLRequest") -> Any:
+        """Надсилає TL-запит через client з урахуванням ліміту його сімейства."""
+        return await self.run(family_for(request), lambda: client(request), method=type(request).__name__)
+
+    async def call_batch(self, client: "TelegramClient", requests: list["TLRequest"]) -> list[Any]:
+        """
+        Надсилає кілька незалежних TL-запитів одним контейнером (один round trip).
+
+        Кожен запит списує токен свого сімейства. Повертає список тієї ж довжини,
+        де на місці кожного запиту — його результат або виняток, тож помилка одного
+        запиту не ховає результати інших. Запити з FloodWait повторюються за тими ж
+        правилами, що й у run().
+        """
+        from telethon.errors import FloodWaitError, PeerFloodError, MultiError
+
+        results: list[Any] = [None] * len(requests)
+        pending = list(range(len(requests)))
+        attempt = 0
+        while pending:
+            ready = []
+            for i in pending:
+                family = family_for(requests[i])
+                remaining = self.flood_remaining(family)
+                if remaining > self.max_flood_wait:
+                    results[i] = FloodWaitError(request=requests[i], capture=int(remaining) + 1)
+                    continue
+                await self.bucket(family).acquire()
+                ready.append(i)
+            if not ready:
+                break
+
+            for i in ready:
+                ACCOUNTING.record(type(requests[i]).__name__)
+            started = time.perf_counter()
+            try:
+                if len(ready) == 1:
+                    outcomes = [await client(requests[ready[0]])]
+                else:
+                    outcomes = await client([requests[i] for i in ready], ordered=False)
+            except MultiError as e:
+                outcomes = [error if error is not None else result for error, result in zip(e.exceptions, e.results)]
+            except Exception as e:
+                # Для одного запиту Telethon кидає саму помилку; помилка всього контейнера (з'єднання) — кидаємо далі
+                if len(ready) > 1:
+                    for i in ready:
+                        MTPROTO_FAILURES.inc(method=type(requests[i]).__name__, error=type(e).__name__)
+                    raise
+                outcomes = [e]
+            # Запити контейнера завершуються одним round trip, тож кожному зараховується його тривалість
+            elapsed = time.perf_counter() - started
+            for i, outcome in zip(ready, outcomes):
+                method = type(requests[i]).__name__
+                MTPROTO_REQUEST_SECONDS.observe(elapsed, method=method)
+                if isinstance(outcome, Exception):
+                    MTPROTO_FAILURES.inc(method=method, error=type(outcome).__name__)
+
+            attempt += 1
+            retry = []
+            for i, outcome in zip(ready, outcomes):
+                family = family_for(requests[i])
+                if isinstance(outcome, FloodWaitError):
+                    self.record_flood(family, outcome.seconds)
+                    if attempt <= self.max_flood_retries and outcome.seconds <= self.max_flood_wait:
+                        FLOOD_RETRIES.inc(family=family)
+                        retry.append(i)
+                        continue
+                elif isinstance(outcome, PeerFloodError):
+                    self.record_flood(PEER_FLOOD_FAMILY, self.peer_flood_cooldown)
+                elif not isinstance(outcome, Exception):
+                    self.bucket(family).on_success()
+                results[i] = outcome
+            if retry:
+                logger.info("Retrying %s batched requests after FloodWait (attempt %s/%s).", len(retry), attempt, self.max_flood_retries)
+            pending = retry
+        return results
@@ -0,0 +1,106 @@
+import logging
+from collections import Counter
+from contextvars import ContextVar
+
+from .metrics import MTPROTO_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Батч і група (індекс закладу), від імені яких зараз виконуються запити.
+# Задачі asyncio копіюють контекст при створенні, тож теги доходять і до
+# паралельних кроків групи, і до спільних резолвів кешу юзернеймів.
+current_batch: ContextVar[str | None] = ContextVar("current_batch", default=None)
+current_group: ContextVar[int | None] = ContextVar("current_group", default=None)
+
+# Оцінка вартості групи (запитів), поки в батчі немає жодної завершеної групи
+DEFAULT_GROUP_COST = 10
+
+
+class BudgetExceededError(Exception):
+    """Наступна група могла б вийти за бюджет запитів батчу."""
+
+    def __init__(self, used: int, budget: int):
+        super().__init__(f"Бюджет запитів батчу вичерпано: {used} з {budget}.")
+        self.used = used
+        self.budget = budget
+
+
+class BatchUsage:
+    """
+    Облік MTProto-запитів одного запуску батчу.
+
+    Бюджет перевіряється перед стартом кожної групи: група запускається, лише якщо
+    вже зроблені запити плюс оцінка для груп у роботі та нової групи вкладаються в ліміт.
+    Оцінка — найдорожча з завершених груп (або DEFAULT_GROUP_COST до першої).
+    """
+
+    def __init__(self, batch_id: str, budget: int = 0):
+        self.batch_id = batch_id
+        # 0 — без обмеження
+        self.budget = budget
+        self.by_method: Counter[str] = Counter()
+        self.by_group: Counter[int] = Counter()
+        self.groups_finished = 0
+        self.paused = False
+        self._in_flight: set[int] = set()
+        self._max_group_cost = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_method.values())
+
+    def record(self, method: str, count: int, group: int | None) -> None:
+        self.by_method[method] += count
+        if group is not None:
+            self.by_group[group] += count
+
+    def group_cost_estimate(self) -> int:
+        return self._max_group_cost if self.groups_finished else DEFAULT_GROUP_COST
+
+    def reserve(self, group: int) -> None:
+        """Дозволяє старт групи або кидає BudgetExceededError (після цього батч стоїть на паузі)."""
+        if self.budget and not self.paused:
+            estimate = self.group_cost_estimate()
+            in_flight = sum(max(self.by_group[g], estimate) - self.by_group[g] for g in self._in_flight)
+            if self.total + in_flight + estimate > self.budget:
+                logger.warning(
+                    "Job %s paused: %s requests used, next group estimated at %s, budget %s.",
+                    self.batch_id, self.total, estimate, self.budget
+                )
+                self.paused = True
+        if self.paused:
+            raise BudgetExceededError(self.total, self.budget)
+        self._in_flight.add(group)
+
+    def release(self, group: int) -> None:
+        """Позначає групу завершеною і уточнює оцінку вартості групи."""
+        if group not in self._in_flight:
+            return
+        self._in_flight.discard(group)
+        self.groups_finished += 1
+        self._max_group_cost = max(self._max_group_cost, self.by_group[group])
+
+
+class RequestAccounting:
+    """Облік запитів за батчами; RateLimiter повідомляє сюди про кожен надісланий запит."""
+
+    def __init__(self):
+        self._batches: dict[str, BatchUsage] = {}
+
+    def start_batch(self, batch_id: str, budget: int = 0) -> BatchUsage:
+        usage = BatchUsage(batch_id, budget)
+        self._batches[batch_id] = usage
+        return usage
+
+    def end_batch(self, batch_id: str) -> BatchUsage | None:
+        return self._batches.pop(batch_id, None)
+
+    def record(self, method: str, count: int = 1) -> None:
+        MTPROTO_REQUESTS.inc(count, method=method)
+        batch_id = current_batch.get()
+        usage = self._batches.get(batch_id) if batch_id is not None else None
+        if usage is not None:
+            usage.record(method, count, current_group.get())
+
+
+ACCOUNTING = RequestAccounting()
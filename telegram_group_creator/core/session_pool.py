@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from .client_manager import TelethonClientManager
+from .rate_limiter import PEER_FLOOD_FAMILY
+
+logger = logging.getLogger(__name__)
+
+# Ключ, під яким пул акаунтів зберігається в application.bot_data
+BOT_DATA_KEY = "telethon_session_pool"
+
+# Сімейства методів, FloodWait яких робить акаунт непридатним для створення груп
+BLOCKING_FAMILIES = ("create", "invite", PEER_FLOOD_FAMILY)
+
+DAY_SECONDS = 24 * 3600
+
+
+class NoAvailableAccountError(Exception):
+    """Усі акаунти пулу вичерпали добовий ліміт або надовго обмежені Telegram."""
+
+
+class _AccountState:
+    """
+    Стан акаунта в планувальнику: групи в роботі та час створення груп за останню добу.
+    Час створення зберігається у JSON-файл (<session>.groups.json поруч із <session>.flood.json),
+    щоб перезапуск бота не обнуляв добовий ліміт.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.in_flight = 0
+        self.created_at: deque[float] = deque()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                created_at = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load group creation times %s: %s", self.path, e)
+            return
+        self.created_at.extend(sorted(float(moment) for moment in created_at))
+        count = self.created_last_day()
+        if count:
+            logger.info("Account state %s: %s groups created in the last 24h.", self.path, count)
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self.created_at), f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save group creation times %s: %s", self.path, e)
+
+    def record_created(self) -> None:
+        self.created_at.append(time.time())
+        self.created_last_day()
+        self._save()
+
+    def created_last_day(self) -> int:
+        cutoff = time.time() - DAY_SECONDS
+        while self.created_at and self.created_at[0] < cutoff:
+            self.created_at.popleft()
+        return len(self.created_at)
+
+
+class SessionPool:
+    """
+    Пул авторизованих Telethon-акаунтів.
+
+    Планувальник віддає групу акаунту з найбільшим залишком добового ліміту,
+    пропускаючи акаунти під FloodWait на створення/запрошення або під PeerFloodError.
+    """
+
+    def __init__(self, accounts: list[TelethonClientManager], daily_group_limit: int, max_wait: int):
+        self.accounts = accounts
+        self.daily_group_limit = daily_group_limit
+        self.max_wait = max_wait
+        self._state = {
+            account.session_name: _AccountState(f"{account.session_name}.groups.json") for account in accounts
+        }
+
+    async def start(self) -> None:
+        await asyncio.gather(*(account.start() for account in self.accounts))
+        authorized = [account.session_name for account in self.accounts if account.is_authorized]
+        logger.info("Session pool started: %s/%s accounts authorized %s.", len(authorized), len(self.accounts), authorized)
+
+    async def stop(self) -> None:
+        await asyncio.gather(*(account.stop() for account in self.accounts))
+
+    async def warm_entities(self, usernames: list[str]) -> None:
+        """Прогріває кеш юзернеймів кожного акаунта (access_hash у кожного свій)."""
+        await asyncio.gather(*(account.warm_entities(usernames) for account in self.accounts))
+
+    async def ensure_available(self) -> None:
+        """
+        Підключає всі акаунти пулу (ті, що відновилися, повертаються в ротацію)
+        і перевіряє, що хоча б один з них авторизований.
+
+        Raises:
+            ConnectionError: якщо жоден акаунт недоступний.
+        """
+        results = await asyncio.gather(
+            *(account.get_client() for account in self.accounts), return_exceptions=True
+        )
+        errors = []
+        for account, result in zip(self.accounts, results):
+            if isinstance(result, Exception):
+                logger.warning("Account '%s' is unavailable: %s", account.session_name, result)
+                errors.append(f"{account.session_name}: {result}")
+        if len(errors) == len(self.accounts):
+            raise ConnectionError("; ".join(errors) or "Не налаштовано жодного акаунта Telethon.")
+
+    def _blocked_for(self, account: TelethonClientManager) -> float:
+        return max(account.rate_limiter.flood_remaining(family) for family in BLOCKING_FAMILIES)
+
+    def _remaining_budget(self, account: TelethonClientManager) -> int:
+        state = self._state[account.session_name]
+        return self.daily_group_limit - state.created_last_day() - state.in_flight
+
+    def capacity(self) -> list[tuple[TelethonClientManager, int, float]]:
+        """(акаунт, залишок добового ліміту, скільки ще діє FloodWait) для авторизованих акаунтів."""
+        return [
+            (account, self._remaining_budget(account), self._blocked_for(account))
+            for account in self.accounts if account.is_authorized
+        ]
+
+    async def acquire(self, session_name: str | None = None) -> TelethonClientManager:
+        """
+        Обирає акаунт для наступної групи.
+        Якщо всі акаунти тимчасово обмежені, чекає (не довше за max_wait).
+
+        session_name закріплює конкретний акаунт — для дозавершення групи,
+        яку він уже створив (добовий ліміт при цьому не враховується).
+
+        Raises:
+            NoAvailableAccountError: якщо доступного акаунта не буде найближчим часом.
+        """
+        if session_name is not None:
+            return await self._acquire_pinned(session_name)
+
+        while True:
+            usable = [
+                account for account in self.accounts
+                if account.is_authorized and self._remaining_budget(account) > 0
+            ]
+            ready = [account for account in usable if self._blocked_for(account) == 0]
+            if ready:
+                account = max(ready, key=self._remaining_budget)
+                self._state[account.session_name].in_flight += 1
+                return account
+
+            if not usable:
+                raise NoAvailableAccountError("Усі акаунти вичерпали добовий ліміт створення груп або не авторизовані.")
+            wait = min(self._blocked_for(account) for account in usable)
+            if wait > self.max_wait:
+                raise NoAvailableAccountError(f"Усі акаунти обмежені Telegram ще щонайменше {int(wait)}с.")
+            logger.info("All accounts are flood-limited, waiting %.1fs for the next one.", wait)
+            await asyncio.sleep(wait)
+
+    async def _acquire_pinned(self, session_name: str) -> TelethonClientManager:
+        account = next((a for a in self.accounts if a.session_name == session_name), None)
+        if account is None or not account.is_authorized:
+            raise NoAvailableAccountError(f"Акаунт '{session_name}', що створив групу, недоступний.")
+        wait = self._blocked_for(account)
+        if wait > self.max_wait:
+            raise NoAvailableAccountError(f"Акаунт '{session_name}' обмежений Telegram ще щонайменше {int(wait)}с.")
+        if wait > 0:
+            logger.info("Account '%s' is flood-limited, waiting %.1fs to resume its group.", session_name, wait)
+            await asyncio.sleep(wait)
+        self._state[session_name].in_flight += 1
+        return account
+
+    def release(self, account: TelethonClientManager, created: bool) -> None:
+        """Повертає акаунт у пул; created=True зараховує групу в добовий ліміт."""
+        state = self._state[account.session_name]
+        state.in_flight -= 1
+        if created:
+            state.record_created()
@@ -0,0 +1,244 @@
+import datetime
+import logging
+import os
+import sqlite3
+import time
+from telethon import utils
+from telethon.sessions import MemorySession, SQLiteSession
+from telethon.tl import types
+
+logger = logging.getLogger(__name__)
+
+# Скільки чекати (секунди), якщо файл сесії саме зайнятий іншим процесом (наприклад, import_groups.py)
+SESSION_DB_TIMEOUT = 10.0
+
+# Колонки, які пише flush(). Запис іде за назвами і лише тих колонок, що є у файлі: схему файлу
+# створює й мігрує SQLiteSession встановленої версії Telethon, а решта колонок отримує значення за замовчуванням
+SESSION_COLUMNS = ("dc_id", "server_address", "port", "auth_key", "takeout_id")
+ENTITY_COLUMNS = ("id", "hash", "username", "phone", "name", "date")
+UPDATE_STATE_COLUMNS = ("id", "pts", "qts", "date", "seq")
+
+
+class BufferedSession(MemorySession):
+    """
+    Сесія Telethon у пам'яті для довгоживучого процесу бота.
+
+    Стан завантажується з файлу <session>.session, створеного authenticate.py, а зміни
+    (нові сутності, стан оновлень, ключі) накопичуються в пам'яті й записуються у той самий
+    файл однією транзакцією в flush(): періодично (див. TelethonClientManager) і при закритті.
+    Кеш надісланих файлів лишається лише в пам'яті — бот не завантажує файли.
+    Telethon викликає методи сесії з циклу подій, тож спільне використання одного клієнта
+    кількома батчами не потребує блокувань, а файл не тримається відкритим між записами.
+    Пошук сутностей іде за словниками, а не перебором усіх рядків, як у MemorySession.
+    """
+
+    def __init__(self, session_name: str):
+        super().__init__()
+        self.filename = session_name if session_name.endswith(".session") else f"{session_name}.session"
+        # Рядки сутностей (id, hash, username, phone, name) та індекси для пошуку
+        self._rows: dict[int, tuple] = {}
+        self._by_username: dict[str, int] = {}
+        self._by_phone: dict[str, int] = {}
+        self._by_name: dict[str, int] = {}
+        # Зміни, ще не записані у файл
+        self._dirty_rows: dict[int, tuple] = {}
+        self._dirty_states: set[int] = set()
+        self._session_dirty = False
+        self._load()
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self._session_dirty or self._dirty_rows or self._dirty_states)
+
+    def _load(self) -> None:
+        """Читає файл сесії (міграцію старих версій схеми виконує SQLiteSession)."""
+        if not os.path.exists(self.filename):
+            logger.warning("Session file %s not found, the account needs authenticate.py.", self.filename)
+            return
+        # SQLiteSession створює або мігрує схему файлу під встановлену версію Telethon
+        stored = SQLiteSession(self.filename)
+        try:
+            self._dc_id, self._server_address, self._port = stored.dc_id, stored.server_address, stored.port
+            self._auth_key, self._takeout_id = stored.auth_key, stored.takeout_id
+        finally:
+            stored.close()
+        connection = sqlite3.connect(self.filename, timeout=SESSION_DB_TIMEOUT)
+        try:
+            for entity_id, entity_hash, username, phone, name in connection.execute(
+                    "select id, hash, username, phone, name from entities"):
+                # SQLite зберігає телефон як число, а Telethon порівнює рядки
+                self._index((entity_id, entity_hash, username, str(phone) if phone is not None else None, name))
+            for key, pts, qts, date, seq in connection.execute("select id, pts, qts, date, seq from update_state"):
+                self._update_states[key] = types.updates.State(
+                    pts, qts, datetime.datetime.fromtimestamp(date, tz=datetime.timezone.utc), seq, unread_count=0
+                )
+        finally:
+            connection.close()
+        logger.info("Loaded session %s with %s entities.", self.filename, len(self._rows))
+
+    # --- Стан з'єднання: зміни рідкісні, але критичні, тому записуються вже в save() ---
+
+    def set_dc(self, dc_id, server_address, port):
+        super().set_dc(dc_id, server_address, port)
+        self._session_dirty = True
+
+    @MemorySession.auth_key.setter
+    def auth_key(self, value):
+        self._auth_key = value
+        self._session_dirty = True
+
+    @MemorySession.takeout_id.setter
+    def takeout_id(self, value):
+        self._takeout_id = value
+        self._session_dirty = True
+
+    def set_update_state(self, entity_id, state):
+        super().set_update_state(entity_id, state)
+        self._dirty_states.add(entity_id)
+
+    # --- Сутності ---
+
+    def _index(self, row: tuple) -> bool:
+        """Додає або оновлює рядок сутності; повертає False, якщо нічого не змінилося."""
+        entity_id, _, username, phone, name = row
+        previous = self._rows.get(entity_id)
+        if previous == row:
+            return False
+        if previous is not None:
+            for index, key in ((self._by_username, previous[2]), (self._by_phone, previous[3]), (self._by_name, previous[4])):
+                if key is not None and index.get(str(key)) == entity_id:
+                    del index[str(key)]
+        self._rows[entity_id] = row
+        if username:
+            self._by_username[username] = entity_id
+        if phone:
+            self._by_phone[str(phone)] = entity_id
+        if name:
+            self._by_name[name] = entity_id
+        return True
+
+    def process_entities(self, tlo):
+        # Рядки будує MemorySession (те саме робить SQLiteSession); версія Telethon закріплена в requirements.txt
+        for row in self._entities_to_rows(tlo):
+            if self._index(row):
+                self._dirty_rows[row[0]] = row
+
+    def _lookup(self, entity_id: int | None):
+        row = self._rows.get(entity_id) if entity_id is not None else None
+        return (row[0], row[1]) if row else None
+
+    def get_entity_rows_by_phone(self, phone):
+        return self._lookup(self._by_phone.get(str(phone)))
+
+    def get_entity_rows_by_username(self, username):
+        return self._lookup(self._by_username.get(username.lower()))
+
+    def get_entity_rows_by_name(self, name):
+        return self._lookup(self._by_name.get(name))
+
+    def get_entity_rows_by_id(self, id, exact=True):
+        if exact:
+            return self._lookup(id)
+        for peer in (types.PeerUser(id), types.PeerChat(id), types.PeerChannel(id)):
+            found = self._lookup(utils.get_peer_id(peer))
+            if found:
+                return found
+        return None
+
+    # --- Запис у файл ---
+
+    def flush(self) -> None:
+        """Записує накопичені зміни у файл сесії однією транзакцією."""
+        changes = self.take_changes()
+        if changes is None:
+            return
+        try:
+            self.write_changes(changes)
+        except sqlite3.Error as e:
+            self.restore_changes(changes)
+            logger.warning("Could not flush session %s: %s", self.filename, e)
+
+    def take_changes(self) -> tuple | None:
+        """
+        Забирає накопичені зміни для запису: (рядок sessions або None, сутності, стани оновлень).
+        Викликається з циклу подій; сам запис (write_changes) можна виконати в іншому потоці.
+        """
+        if not self.has_changes:
+            return None
+        if not os.path.exists(self.filename):
+            # Неавторизований акаунт: нічого цінного зберігати, а порожній файл сховав би відсутність сесії
+            return None
+        session_row = None
+        if self._session_dirty:
+            session_row = {
+                "dc_id": self._dc_id, "server_address": self._server_address, "port": self._port,
+                "auth_key": (self._auth_key.key if self._auth_key else None) or b"", "takeout_id": self._takeout_id,
+            }
+        states = {key: self._update_states[key] for key in self._dirty_states if key in self._update_states}
+        changes = (session_row, self._dirty_rows, states)
+        self._dirty_rows, self._dirty_states = {}, set()
+        self._session_dirty = False
+        return changes
+
+    def restore_changes(self, changes: tuple) -> None:
+        """Повертає незаписані зміни, щоб вони потрапили в наступний flush (новіші зміни мають перевагу)."""
+        session_row, rows, states = changes
+        self._session_dirty = self._session_dirty or session_row is not None
+        self._dirty_rows = {**rows, **self._dirty_rows}
+        self._dirty_states |= states.keys()
+
+    def write_changes(self, changes: tuple) -> None:
+        """Записує зміни з take_changes() у файл; у разі помилки кидає sqlite3.Error."""
+        started = time.perf_counter()
+        session_row, rows, states = changes
+        now = int(time.time())
+        connection = sqlite3.connect(self.filename, timeout=SESSION_DB_TIMEOUT)
+        try:
+            with connection:
+                if session_row is not None:
+                    columns = _columns(connection, "sessions", SESSION_COLUMNS)
+                    connection.execute("delete from sessions")
+                    connection.execute(_insert("insert", "sessions", columns), session_row)
+                columns = _columns(connection, "entities", ENTITY_COLUMNS)
+                connection.executemany(
+                    _insert("insert or replace", "entities", columns),
+                    (dict(zip(ENTITY_COLUMNS, row + (now,))) for row in rows.values())
+                )
+                columns = _columns(connection, "update_state", UPDATE_STATE_COLUMNS)
+                connection.executemany(
+                    _insert("insert or replace", "update_state", columns),
+                    ({"id": key, "pts": state.pts, "qts": state.qts, "date": state.date.timestamp(), "seq": state.seq}
+                     for key, state in states.items())
+                )
+        finally:
+            connection.close()
+        logger.debug(
+            "Flushed session %s: %s entities, %s update states in %.1f ms.",
+            self.filename, len(rows), len(states), (time.perf_counter() - started) * 1000
+        )
+
+    def save(self):
+        # Telethon викликає save() після підключення, зміни DC та при отриманні оновлень.
+        # Нові ключі записуємо одразу, а сутності й стан оновлень чекають періодичного flush()
+        if self._session_dirty:
+            self.flush()
+
+    def close(self):
+        self.flush()
+
+    def delete(self):
+        try:
+            os.remove(self.filename)
+            return True
+        except OSError:
+            return False
+
+
+def _columns(connection: sqlite3.Connection, table: str, wanted: tuple[str, ...]) -> list[str]:
+    """Ті з колонок wanted, що є в таблиці файлу сесії."""
+    existing = {row[1] for row in connection.execute(f"pragma table_info({table})")}
+    return [column for column in wanted if column in existing]
+
+
+def _insert(verb: str, table: str, columns: list[str]) -> str:
+    return f"{verb} into {table} ({', '.join(columns)}) values ({', '.join(':' + c for c in columns)})"
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Step:
+    """Крок робочого процесу групи та назви кроків, які мають завершитися перед ним."""
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    depends_on: tuple[str, ...] = field(default_factory=tuple)
+
+
+async def run_steps(steps: list[Step]) -> dict[str, Any]:
+    """
+    Виконує граф кроків: кожен крок стартує, щойно завершилися його залежності,
+    незалежні кроки виконуються паралельно.
+
+    Залежності задають лише порядок — крок запускається навіть якщо залежність
+    завершилась помилкою (як і в послідовній версії, помилки кроків некритичні).
+    Повертає {назва кроку: результат або виняток}.
+    """
+    names = {step.name for step in steps}
+    for step in steps:
+        unknown = set(step.depends_on) - names
+        if unknown:
+            raise ValueError(f"Step '{step.name}' depends on unknown steps: {sorted(unknown)}")
+
+    tasks: dict[str, asyncio.Task] = {}
+    by_name = {step.name: step for step in steps}
+
+    def schedule(name: str, visiting: tuple[str, ...] = ()) -> asyncio.Task:
+        if name in visiting:
+            raise ValueError(f"Cycle in step graph: {' -> '.join(visiting + (name,))}")
+        if name not in tasks:
+            step = by_name[name]
+            dependencies = [schedule(dep, visiting + (name,)) for dep in step.depends_on]
+            tasks[name] = asyncio.create_task(_run_after(step, dependencies))
+        return tasks[name]
+
+    try:
+        for step in steps:
+            schedule(step.name)
+    except ValueError:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    return dict(zip(tasks.keys(), results))
+
+
+async def _run_after(step: Step, dependencies: list[asyncio.Task]) -> Any:
+    if dependencies:
+        await asyncio.wait(dependencies)
+    return await step.run()
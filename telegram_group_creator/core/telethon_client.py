@@ -1,12 +1,22 @@
 import logging
-from telethon import TelegramClient, functions, types
+from telethon import TelegramClient, functions, types, events, utils
 from telethon.errors import (
     UserNotParticipantError, UserAlreadyParticipantError,
     FloodWaitError, ChatAdminRequiredError, UserPrivacyRestrictedError,
-    UsernameNotOccupiedError, PeerFloodError, UserBannedInChannelError
+    UsernameNotOccupiedError, PeerFloodError, UserBannedInChannelError,
+    PeerIdInvalidError, UserIdInvalidError
 )
 from telethon.tl.types import ChatAdminRights
 import asyncio
+import contextlib
+from typing import Callable
+from .entity_cache import EntityCache
+from .group_index import GROUP_TITLE_FORMAT
+# GroupProgress живе в окремому легкому модулі, щоб сховище задач не імпортувало Telethon
+from .group_progress import GroupProgress
+from .metrics import GROUP_PHASE_SECONDS
+from .rate_limiter import RateLimiter
+from .step_graph import Step, run_steps
 
 logger = logging.getLogger(__name__)
 
@@ -41,285 +51,386 @@ DEFAULT_BANNED_RIGHTS_VISIBLE_HISTORY = types.ChatBannedRights(
     pin_messages=False
 )
 
+# Скільки чекати на update про створення чату, якщо відповідь API не містить самого чату
+CREATED_CHAT_EVENT_TIMEOUT = 10
+
+# Одночасно створюється не більше одного чату з однаковою назвою,
+# щоб fallback через update-події не сплутав чати двох батчів
+_title_locks: dict[str, list] = {}  # назва -> [Lock, кількість користувачів]
+
+
+@contextlib.asynccontextmanager
+async def _title_lock(title: str):
+    entry = _title_locks.setdefault(title, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _title_locks.pop(title, None)
+
+
+def _extract_created_chat(result) -> types.Chat | types.Channel | None:
+    """Дістає створений чат з відповіді CreateChannelRequest/CreateChatRequest."""
+    # CreateChatRequest повертає messages.InvitedUsers, де Updates лежать у полі updates
+    if isinstance(result, types.messages.InvitedUsers):
+        result = result.updates
+    for chat in getattr(result, 'chats', None) or []:
+        if isinstance(chat, (types.Chat, types.Channel)):
+            return chat
+    return None
+
+
+class _CreatedChatWaiter:
+    """
+    Чекає на update з MessageActionChatCreate/MessageActionChannelCreate для вказаної назви.
+    Реєструється до відправки запиту, щоб не пропустити update з відповіді.
+    """
+
+    def __init__(self, client: TelegramClient, title: str):
+        self.client = client
+        self.title = title
+        self._future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    async def _on_update(self, update) -> None:
+        message = getattr(update, 'message', None)
+        action = getattr(message, 'action', None)
+        if not isinstance(action, (types.MessageActionChatCreate, types.MessageActionChannelCreate)):
+            return
+        if action.title == self.title and getattr(message, 'out', False) and not self._future.done():
+            self._future.set_result(message.peer_id)
+
+    def __enter__(self) -> "_CreatedChatWaiter":
+        self.client.add_event_handler(
+            self._on_update, events.Raw((types.UpdateNewMessage, types.UpdateNewChannelMessage))
+        )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.client.remove_event_handler(self._on_update)
+
+    async def wait(self, timeout: float) -> types.PeerChat | types.PeerChannel | None:
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            return None
+
 
 async def create_telegram_group(
-    api_id: int,
-    api_hash: str,
-    session_name: str,
+    client: TelegramClient,
+    entity_cache: EntityCache,
+    rate_limiter: RateLimiter,
     group_name: str,
     manager_usernames: list[str],
     bot_username: str,
-    uid_code: str
+    uid_code: str,
+    progress: GroupProgress | None = None,
+    on_progress: Callable[[GroupProgress], None] | None = None
 ) -> tuple[bool, str | int | None, str | None]:
     """
     Створює групу в Telegram, додає учасників, видає адмінки та надсилає UID.
 
     Args:
-        api_id: API ID користувача.
-        api_hash: API Hash користувача.
-        session_name: Назва файлу сесії Telethon.
+        client: Підключений та авторизований клієнт Telethon (спільний для всіх груп).
+        entity_cache: Кеш юзернеймів акаунта, від імені якого працює client.
+        rate_limiter: Лімітер запитів того ж акаунта; через нього йдуть усі виклики API.
         group_name: Назва групи для створення.
         manager_usernames: Список юзернеймів менеджерів для додавання та адмінки.
         bot_username: Юзернейм бота для додавання та адмінки.
         uid_code: Код (UID) для відправки в створену групу.
+        progress: Контрольна точка попереднього запуску; виконані кроки пропускаються.
+        on_progress: Викликається після кожного успішного кроку з оновленим progress.
 
     Returns:
         Кортеж (success: bool, group_id: int | str | None, error_message: str | None)
         group_id може бути ID чату або посиланням, якщо вдалося отримати.
     """
     # Format the group name with standard template
-    formatted_group_name = f"(1) {group_name} + Expirenza Box"
+    formatted_group_name = GROUP_TITLE_FORMAT.format(name=group_name)
     
-    client = TelegramClient(session_name, api_id, api_hash, system_version="4.16.30-vxCUSTOM") # Вказуємо версію системи для стабільності
     created_group_id = None
     added_users_entities = []
     bot_entity = None
     is_supergroup = False  # Flag to track if we're dealing with a supergroup
+    progress = progress or GroupProgress()
+
+    def checkpoint(**changes) -> None:
+        for field_name, value in changes.items():
+            setattr(progress, field_name, value)
+        if on_progress:
+            on_progress(progress)
 
     try:
-        logger.info(f"Connecting to Telegram via Telethon (session: {session_name})...")
-        await client.connect()
-        if not await client.is_user_authorized():
-            logger.error(f"Telethon session '{session_name}' is not authorized. Run authentication flow first.")
-            # Важливо: Користувач має пройти автентифікацію вручну через консоль
-            # або окремий скрипт перед першим запуском бота, щоб створити .session файл.
-            # Можна додати тут запит коду/паролю, але це ускладнить логіку бота.
-            # await client.start() # Потребуватиме введення в консолі, де запущений бот
-            raise ConnectionError("User not authorized")
-
-        logger.info("Telethon connection successful.")
-
-        # --- 1. Resolve bot username ---
-        try:
-            logger.info(f"Resolving bot entity: {bot_username}")
-            bot_entity = await client.get_entity(bot_username)
-            logger.info(f"Bot entity resolved: ID={bot_entity.id}")
-        except UsernameNotOccupiedError:
-            logger.error(f"Bot username {bot_username} not found.")
-            return False, None, f"Бот {bot_username} не знайдений."
-        except ValueError as e:
-             logger.error(f"Invalid bot username format '{bot_username}': {e}")
-             return False, None, f"Некоректний формат юзернейму бота: {bot_username}."
-        except Exception as e:
-            logger.exception(f"Failed to resolve bot {bot_username}: {e}")
-            return False, None, f"Помилка пошуку бота {bot_username}: {e}"
-
-        # --- 2. Resolve manager usernames ---
-        manager_entities = []
-        all_users_to_add = [bot_entity]
-        
-        for username in manager_usernames:
+        with GROUP_PHASE_SECONDS.time(phase="resolve"):
+            # --- 1. Resolve bot username ---
             try:
-                logger.info(f"Resolving manager entity: {username}")
-                manager = await client.get_entity(username)
-                logger.info(f"Manager entity resolved: {username} -> ID={manager.id}")
-                manager_entities.append(manager)
-                all_users_to_add.append(manager)
+                logger.debug("Resolving bot entity: %s", bot_username)
+                bot_entity = await entity_cache.resolve(client, bot_username)
+                logger.debug("Bot entity resolved: ID=%s", bot_entity.user_id)
             except UsernameNotOccupiedError:
-                logger.warning(f"Manager username {username} not found, skipping.")
-                continue
+                logger.error("Bot username %s not found.", bot_username)
+                return False, None, f"Бот {bot_username} не знайдений."
+            except ValueError as e:
+                 logger.error("Invalid bot username format '%s': %s", bot_username, e)
+                 return False, None, f"Некоректний формат юзернейму бота: {bot_username}."
             except Exception as e:
-                logger.warning(f"Error resolving manager {username}: {e}")
-                continue
+                logger.exception("Failed to resolve bot %s: %s", bot_username, e)
+                return False, None, f"Помилка пошуку бота {bot_username}: {e}"
 
-        # --- 3. Create Group ---
-        # Telethon рекомендує додавати хоча б одного користувача при створенні
-        # Додаємо бота одразу при створенні, якщо можливо
-        try:
-            # Ініціалізуємо змінну перед використанням
-            created_group_id = None
-            
-            logger.info(f"Creating group '{formatted_group_name}' with initial user ID: {all_users_to_add[0].id}")
-            # Створюємо з першим знайденим користувачем (зазвичай ботом)
-            try:
-                # Create a supergroup (channel) instead of a regular chat
-                result = await client(functions.channels.CreateChannelRequest(
-                    title=formatted_group_name,
-                    about="",
-                    megagroup=True  # This makes it a supergroup
-                ))
-                
-                is_supergroup = True
-                logger.info(f"Chat creation result type: {type(result).__name__}")
-                
-                # Extract the channel ID from the result
-                if hasattr(result, 'chats') and result.chats:
-                    created_chat = result.chats[0]
-                    created_group_id = created_chat.id
-                    logger.info(f"Got supergroup ID {created_group_id} from result.chats[0]")
-            except Exception as create_error:
-                # If creating a supergroup fails, try creating a regular chat
-                logger.warning(f"Error during CreateChannelRequest: {create_error}, falling back to CreateChatRequest")
-                result = await client(functions.messages.CreateChatRequest(
-                    users=[all_users_to_add[0]],  # Add at least one user immediately
-                    title=formatted_group_name
-                ))
-                
-                logger.info(f"Regular chat creation result type: {type(result).__name__}")
-                
-                # Safely try to get chat_id from the result
+            # --- 2. Resolve manager usernames ---
+            manager_entities = []
+            all_users_to_add = [bot_entity]
+        
+            for username in manager_usernames:
                 try:
-                    if hasattr(result, 'chats') and result.chats:
-                        created_chat = result.chats[0]
-                        created_group_id = created_chat.id
-                        logger.info(f"Got chat ID {created_group_id} from result.chats[0]")
-                except Exception as attr_error:
-                    logger.warning(f"Could not extract chat_id from result: {attr_error}")
-            
-            # Wait for the group to appear in the dialogs
-            await asyncio.sleep(3)  # Give it more time
-            
-            # If we still don't have a group ID, look for it in dialogs by name
-            if not created_group_id:
-                logger.info(f"Searching for newly created group '{formatted_group_name}' in recent dialogs...")
-                dialogs = await client.get_dialogs(limit=20)  # Increase the limit
-                for dialog in dialogs:
-                    if dialog.title == formatted_group_name:
-                        created_group_id = dialog.id
-                        is_supergroup = dialog.is_channel
-                        logger.info(f"Found chat ID {created_group_id} from recent dialogs, is_supergroup={is_supergroup}")
-                        break
-            
-            # If we still don't have an ID, this is an error
-            if not created_group_id:
-                logger.error(f"Could not find newly created chat '{formatted_group_name}' in recent dialogs")
-                raise ValueError(f"Failed to get chat ID for {formatted_group_name}")
-            
-            logger.info(f"Group '{formatted_group_name}' created with ID: {created_group_id}")
-
-        except FloodWaitError as e:
-            logger.error(f"Flood wait error during group creation: waiting for {e.seconds} seconds.")
-            await asyncio.sleep(e.seconds + 1)
-            # Can try again or return an error
-            return False, None, f"Перевищено ліміт запитів при створенні групи. Спробуйте пізніше (через {e.seconds}с)."
-        except Exception as e:
-            logger.exception(f"Failed to create group '{formatted_group_name}': {e}")
-            return False, None, f"Не вдалося створити групу '{formatted_group_name}': {e}"
-
-        # --- 4. Set History Visible (if applicable) ---
-        if is_supergroup:
-            try:
-                logger.info(f"Making history visible for supergroup ID: {created_group_id}")
-                await client(functions.channels.EditChatDefaultBannedRights(
-                    channel=created_group_id,
-                    banned_rights=DEFAULT_BANNED_RIGHTS_VISIBLE_HISTORY
-                ))
-                logger.info(f"History visibility set for supergroup {created_group_id}.")
-                await asyncio.sleep(1)  # Small pause
-            except Exception as e:
-                logger.exception(f"Failed to set history visible for supergroup {created_group_id}: {e}")
-                # Not critical, but worth logging
+                    logger.debug("Resolving manager entity: %s", username)
+                    manager = await entity_cache.resolve(client, username)
+                    logger.debug("Manager entity resolved: %s -> ID=%s", username, manager.user_id)
+                    manager_entities.append(manager)
+                    all_users_to_add.append(manager)
+                except UsernameNotOccupiedError:
+                    logger.warning("Manager username %s not found, skipping.", username)
+                    continue
+                except Exception as e:
+                    logger.warning("Error resolving manager %s: %s", username, e)
+                    continue
+
+        # --- 3. Create Group ---
+        if progress.chat_id is not None:
+            # Група вже створена в попередньому запуску — продовжуємо з контрольної точки
+            created_group_id = progress.chat_id
+            is_supergroup = progress.is_supergroup
+            if is_supergroup:
+                group_peer = types.InputPeerChannel(channel_id=created_group_id, access_hash=progress.access_hash)
+            else:
+                group_peer = types.InputPeerChat(chat_id=created_group_id)
+            logger.info("Resuming group '%s' (ID: %s) from checkpoint: %s", formatted_group_name, created_group_id, progress)
         else:
-            # For regular chats, we need to use a different approach
-            try:
-                logger.info(f"Making history visible for regular chat ID: {created_group_id}")
-                await client(functions.messages.EditChatDefaultBannedRightsRequest(
-                    peer=created_group_id,
-                    banned_rights=DEFAULT_BANNED_RIGHTS_VISIBLE_HISTORY
-                ))
-                logger.info(f"History visibility set for regular chat {created_group_id}.")
-                await asyncio.sleep(1)  # Small pause
-            except Exception as e:
-                logger.exception(f"Failed to set history visible for regular chat {created_group_id}: {e}")
+            with GROUP_PHASE_SECONDS.time(phase="create"):
+                # Telethon рекомендує додавати хоча б одного користувача при створенні
+                # Додаємо бота одразу при створенні, якщо можливо
+                try:
+                    # Ініціалізуємо змінну перед використанням
+                    created_group_id = None
+                    group_peer = None
+
+                    async with _title_lock(formatted_group_name):
+                        # Реєструємо очікування update ДО запиту, щоб не пропустити його
+                        with _CreatedChatWaiter(client, formatted_group_name) as waiter:
+                            logger.debug("Creating group '%s' with initial user ID: %s", formatted_group_name, all_users_to_add[0].user_id)
+                            # Створюємо з першим знайденим користувачем (зазвичай ботом)
+                            try:
+                                # Create a supergroup (channel) instead of a regular chat
+                                result = await rate_limiter.call(client, functions.channels.CreateChannelRequest(
+                                    title=formatted_group_name,
+                                    about="",
+                                    megagroup=True  # This makes it a supergroup
+                                ))
+                            except FloodWaitError:
+                                # Ліміт спільний для CreateChannel та CreateChat — fallback не допоможе
+                                raise
+                            except Exception as create_error:
+                                # If creating a supergroup fails, try creating a regular chat
+                                logger.warning("Error during CreateChannelRequest: %s, falling back to CreateChatRequest", create_error)
+                                result = await rate_limiter.call(client, functions.messages.CreateChatRequest(
+                                    users=[all_users_to_add[0]],  # Add at least one user immediately
+                                    title=formatted_group_name
+                                ))
+
+                            logger.debug("Chat creation result type: %s", type(result).__name__)
+
+                            # Основний шлях: чат є прямо у відповіді (Updates.chats)
+                            created_chat = _extract_created_chat(result)
+                            if created_chat is not None:
+                                created_group_id = created_chat.id
+                                group_peer = utils.get_input_peer(created_chat)
+                                is_supergroup = isinstance(created_chat, types.Channel)
+                                logger.debug("Got chat ID %s from creation result, is_supergroup=%s", created_group_id, is_supergroup)
+                            else:
+                                # Fallback: чекаємо на update про створення чату з таймаутом
+                                logger.debug("Creation result has no chats, waiting for update for '%s'...", formatted_group_name)
+                                peer = await waiter.wait(CREATED_CHAT_EVENT_TIMEOUT)
+                                if peer is not None:
+                                    created_group_id = utils.get_peer_id(peer, add_mark=False)
+                                    try:
+                                        # access_hash потрібен для контрольної точки; чат уже є в кеші Telethon з update
+                                        group_peer = await client.get_input_entity(peer)
+                                    except ValueError:
+                                        group_peer = peer
+                                    is_supergroup = isinstance(peer, types.PeerChannel)
+                                    logger.debug("Got chat ID %s from update event, is_supergroup=%s", created_group_id, is_supergroup)
+                    # If we still don't have an ID, this is an error
+                    if not created_group_id:
+                        logger.error("Could not determine ID of newly created chat '%s'", formatted_group_name)
+                        raise ValueError(f"Failed to get chat ID for {formatted_group_name}")
+
+                    logger.info("Group '%s' created with ID: %s", formatted_group_name, created_group_id)
+                    # Зберігаємо ID одразу, щоб після перезапуску не створити дублікат
+                    checkpoint(
+                        chat_id=created_group_id,
+                        is_supergroup=is_supergroup,
+                        access_hash=getattr(group_peer, 'access_hash', None)
+                    )
+
+                except FloodWaitError as e:
+                    # RateLimiter вже повторював запит і зберіг дедлайн; довше не чекаємо
+                    logger.error("Flood wait error during group creation: %s seconds required.", e.seconds)
+                    return False, None, f"Перевищено ліміт запитів при створенні групи. Спробуйте пізніше (через {e.seconds}с)."
+                except Exception as e:
+                    logger.exception("Failed to create group '%s': %s", formatted_group_name, e)
+                    return False, None, f"Не вдалося створити групу '{formatted_group_name}': {e}"
 
-        # --- 5. Add Remaining Members ---
+        # Після створення чату решта кроків утворює граф залежностей:
+        # history разом з промоутом бота та invite не залежать одне від одного,
+        # промоут менеджерів чекає на invite, UID надсилається після history та промоуту бота.
+        chat_kind = "supergroup" if is_supergroup else "regular chat"
+
+        # --- 4. Add Remaining Members ---
         users_to_invite = all_users_to_add[1:]  # Skip the first user (bot) who was already added
-        if users_to_invite:
+
+        async def invite_members() -> None:
+            if not users_to_invite or progress.invited:
+                return
             if is_supergroup:
                 # For supergroups, use InviteToChannelRequest
-                logger.info(f"Inviting {len(users_to_invite)} users to supergroup {created_group_id}...")
+                logger.debug("Inviting %s users to supergroup %s...", len(users_to_invite), created_group_id)
                 try:
-                    await client(functions.channels.InviteToChannelRequest(
-                        channel=created_group_id,
+                    await rate_limiter.call(client, functions.channels.InviteToChannelRequest(
+                        channel=group_peer,
                         users=users_to_invite
                     ))
-                    logger.info(f"Successfully sent invites to {len(users_to_invite)} users for supergroup {created_group_id}.")
-                    await asyncio.sleep(2)  # Pause after invitations
+                    logger.debug("Successfully sent invites to %s users for supergroup %s.", len(users_to_invite), created_group_id)
+                    checkpoint(invited=True)
                 except Exception as e:
-                    logger.exception(f"Failed to invite users to supergroup {created_group_id}: {e}")
+                    logger.exception("Failed to invite users to supergroup %s: %s", created_group_id, e)
             else:
                 # For regular chats, use AddChatUserRequest for each user individually
-                logger.info(f"Adding {len(users_to_invite)} users to regular chat {created_group_id}...")
+                logger.debug("Adding %s users to regular chat %s...", len(users_to_invite), created_group_id)
+                added_count = 0
                 for user in users_to_invite:
                     try:
-                        await client(functions.messages.AddChatUserRequest(
+                        await rate_limiter.call(client, functions.messages.AddChatUserRequest(
                             chat_id=created_group_id,
                             user_id=user,
                             fwd_limit=100  # Forward limit
                         ))
-                        logger.info(f"Added user {getattr(user, 'username', user.id)} to chat {created_group_id}")
-                        await asyncio.sleep(1)  # Small pause between additions
+                        logger.debug("Added user ID %s to chat %s", user.user_id, created_group_id)
+                        added_count += 1
                     except Exception as e:
-                        logger.warning(f"Failed to add user {getattr(user, 'username', user.id)} to chat: {e}")
+                        logger.warning("Failed to add user ID %s to chat: %s", user.user_id, e)
+                if added_count == len(users_to_invite):
+                    checkpoint(invited=True)
 
-        # --- 6. Grant Admin Rights ---
-        users_to_promote = [bot_entity] + manager_entities  # Promote bot and valid managers
-        promoted_count = 0
-        
-        if is_supergroup:
-            # For supergroups, use EditAdminRequest
-            for entity in users_to_promote:
-                if not entity:
-                    continue  # Skip if entity is None
-                try:
-                    logger.info(f"Promoting user ID {entity.id} ({getattr(entity, 'username', 'N/A')}) to admin in supergroup {created_group_id}")
-                    await client(functions.channels.EditAdminRequest(
-                        channel=created_group_id,
-                        user_id=entity,
-                        admin_rights=ADMIN_RIGHTS,
-                        rank=''  # Admin rank (e.g., 'Manager') - optional
-                    ))
-                    promoted_count += 1
-                    logger.info(f"User ID {entity.id} promoted successfully in supergroup.")
-                    await asyncio.sleep(0.5)  # Small delay between promotions
-                except Exception as e:
-                    logger.exception(f"Failed to promote user ID {entity.id} in supergroup {created_group_id}: {e}")
-        else:
+        # --- 5. Grant Admin Rights ---
+        def promote_request(entity: types.InputPeerUser):
+            if is_supergroup:
+                # For supergroups, use EditAdminRequest
+                return functions.channels.EditAdminRequest(
+                    channel=group_peer,
+                    user_id=entity,
+                    admin_rights=ADMIN_RIGHTS,
+                    rank=''  # Admin rank (e.g., 'Manager') - optional
+                )
             # For regular chats, use EditChatAdminRequest
-            for entity in users_to_promote:
-                if not entity:
-                    continue  # Skip if entity is None
-                try:
-                    logger.info(f"Promoting user ID {entity.id} ({getattr(entity, 'username', 'N/A')}) to admin in regular chat {created_group_id}")
-                    await client(functions.messages.EditChatAdminRequest(
-                        chat_id=created_group_id,
-                        user_id=entity,
-                        is_admin=True
-                    ))
-                    promoted_count += 1
-                    logger.info(f"User ID {entity.id} promoted successfully in regular chat.")
-                    await asyncio.sleep(0.5)  # Small delay between promotions
-                except Exception as e:
-                    logger.exception(f"Failed to promote user ID {entity.id} in regular chat {created_group_id}: {e}")
+            return functions.messages.EditChatAdminRequest(
+                chat_id=created_group_id,
+                user_id=entity,
+                is_admin=True
+            )
+
+        def check_promotion(entity: types.InputPeerUser, outcome) -> bool:
+            """Логує результат промоуту одного користувача з пакетного запиту."""
+            if isinstance(outcome, (PeerIdInvalidError, UserIdInvalidError)):
+                # Збережений access_hash більше не дійсний — наступного разу резолвимо заново
+                entity_cache.invalidate_user(entity.user_id)
+            if isinstance(outcome, Exception):
+                logger.error("Failed to promote user ID %s in %s %s: %s", entity.user_id, chat_kind, created_group_id, outcome)
+                return False
+            logger.debug("User ID %s promoted successfully in %s.", entity.user_id, chat_kind)
+            return True
+
+        # --- 6. Set History Visible + promote bot (one container) ---
+        async def set_rights() -> int:
+            requests = []
+            if not progress.history_set:
+                # Для супергруп і звичайних чатів використовується той самий messages.EditChatDefaultBannedRightsRequest
+                requests.append(functions.messages.EditChatDefaultBannedRightsRequest(
+                    peer=group_peer,
+                    banned_rights=DEFAULT_BANNED_RIGHTS_VISIBLE_HISTORY
+                ))
+            if not progress.promoted:
+                # Бот уже в чаті (або додається самим EditAdminRequest), тож запрошень не чекає
+                requests.append(promote_request(bot_entity))
+            if not requests:
+                return 0
+
+            logger.debug("Making history visible and promoting bot ID %s in %s %s", bot_entity.user_id, chat_kind, created_group_id)
+            outcomes = await rate_limiter.call_batch(client, requests)
+            if not progress.history_set:
+                history_outcome = outcomes.pop(0)
+                if isinstance(history_outcome, Exception):
+                    # Not critical, but worth logging
+                    logger.error("Failed to set history visible for %s %s: %s", chat_kind, created_group_id, history_outcome)
+                else:
+                    logger.debug("History visibility set for %s %s.", chat_kind, created_group_id)
+                    checkpoint(history_set=True)
+            if outcomes:
+                return int(check_promotion(bot_entity, outcomes[0]))
+            return 0
 
-        logger.info(f"Promoted {promoted_count} users to admin in group {created_group_id}.")
+        async def promote_managers() -> int:
+            if not manager_entities or progress.promoted:
+                return 0
+            logger.debug("Promoting %s managers to admin in %s %s", len(manager_entities), chat_kind, created_group_id)
+            outcomes = await rate_limiter.call_batch(
+                client, [promote_request(manager) for manager in manager_entities]
+            )
+            return sum(check_promotion(manager, outcome) for manager, outcome in zip(manager_entities, outcomes))
 
         # --- 7. Send UID Code ---
-        try:
-            logger.info(f"Sending UID code '{uid_code}' to group {created_group_id}")
-            # Use the correct way to send messages depending on group type
-            if is_supergroup:
-                await client.send_message(created_group_id, uid_code)
-            else:
-                await client.send_message(created_group_id, uid_code)
-            logger.info(f"UID code sent successfully to group {created_group_id}.")
-        except Exception as e:
-            logger.exception(f"Failed to send UID code to group {created_group_id}: {e}")
+        async def send_uid() -> None:
+            if progress.uid_sent:
+                return
+            logger.debug("Sending UID code '%s' to group %s", uid_code, created_group_id)
+            await rate_limiter.run("message", lambda: client.send_message(group_peer, uid_code), method="SendMessageRequest")
+            logger.debug("UID code sent successfully to group %s.", created_group_id)
+            checkpoint(uid_sent=True)
+
+        step_results = await run_steps([
+            Step("rights", GROUP_PHASE_SECONDS.timed(set_rights, phase="set_rights")),
+            Step("invite", GROUP_PHASE_SECONDS.timed(invite_members, phase="invite")),
+            # Менеджерів можна підвищити лише після того, як їх запрошено
+            Step("promote_managers", GROUP_PHASE_SECONDS.timed(promote_managers, phase="promote"), depends_on=("invite",)),
+            Step("send_uid", GROUP_PHASE_SECONDS.timed(send_uid, phase="send_uid"), depends_on=("rights",)),
+        ])
+
+        for name in ("rights", "promote_managers"):
+            if isinstance(step_results[name], Exception):
+                logger.error("Step '%s' failed for group %s: %s", name, created_group_id, step_results[name])
+        promoted_count = sum(
+            result for name, result in step_results.items()
+            if name in ("rights", "promote_managers") and isinstance(result, int)
+        )
+        logger.info("Promoted %s users to admin in group %s.", promoted_count, created_group_id)
+        if not progress.promoted and promoted_count == 1 + len(manager_entities):
+            checkpoint(promoted=True)
+
+        uid_error = step_results["send_uid"]
+        if isinstance(uid_error, Exception):
+            logger.error("Failed to send UID code to group %s: %s", created_group_id, uid_error)
             # Report the error, but the group has already been created
-            return True, created_group_id, f"Група створена, але не вдалося надіслати UID: {e}"
+            return True, created_group_id, f"Група створена, але не вдалося надіслати UID: {uid_error}"
 
         # --- Success ---
         return True, created_group_id, None
 
     except ConnectionError as e:
-         logger.error(f"Telethon connection failed: {e}")
+         logger.error("Telethon connection failed: %s", e)
          return False, None, "Помилка підключення до Telegram API. Перевірте налаштування та авторизацію."
     except Exception as e:
-        logger.exception(f"An unexpected error occurred during group creation process: {e}")
+        logger.exception("An unexpected error occurred during group creation process: %s", e)
         # Return the group ID if it was created but another error occurred
         error_msg = f"Неочікувана помилка: {e}"
         return False, created_group_id, error_msg
-    finally:
-        if client and client.is_connected():
-            logger.info("Disconnecting Telethon client.")
-            await client.disconnect()
\ No newline at end of file
@@ -0,0 +1,66 @@
+# import_groups.py
+"""
+Разовий імпорт уже існуючих груп з діалогів акаунтів у індекс груп (GROUP_INDEX_PATH),
+щоб перевірка дублікатів знала і про групи, створені до появи індексу.
+
+Запуск з каталогу telegram_group_creator (після authenticate.py):
+    python import_groups.py
+    python import_groups.py --no-uids   # лише назви, без читання повідомлень з UID
+"""
+import argparse
+import asyncio
+from telethon import TelegramClient
+from core.config import API_ID, API_HASH, SESSION_NAMES, GROUP_INDEX_PATH, validate_config
+from core.group_index import GroupIndex, IndexedGroup, SOURCE_IMPORTED, name_from_title
+from core.session_storage import BufferedSession
+
+
+async def find_uid(client: TelegramClient, entity) -> str | None:
+    """UID — перше повідомлення, яке акаунт надіслав у групу (див. send_uid у create_telegram_group)."""
+    async for message in client.iter_messages(entity, from_user="me", reverse=True, limit=1):
+        return (message.message or "").strip() or None
+    return None
+
+
+async def import_session(session_name: str, group_index: GroupIndex, with_uids: bool) -> int:
+    # Сутності з усіх діалогів записуються у файл сесії один раз при відключенні, а не після кожної сторінки
+    client = TelegramClient(BufferedSession(session_name), API_ID, API_HASH)
+    await client.connect()
+    try:
+        if not await client.is_user_authorized():
+            print(f"Session '{session_name}' is not authorized, run authenticate.py first. Skipping.")
+            return 0
+        groups = []
+        async for dialog in client.iter_dialogs():
+            if not dialog.is_group:
+                continue
+            name = name_from_title(dialog.title or "")
+            if name is None:
+                continue
+            uid = await find_uid(client, dialog.entity) if with_uids else None
+            groups.append(IndexedGroup(dialog.entity.id, name, uid, session_name, SOURCE_IMPORTED))
+        # Один executemany на акаунт замість запису кожної групи окремо
+        count = group_index.add_many(groups)
+        print(f"Session '{session_name}': imported {count} groups.")
+        return count
+    finally:
+        await client.disconnect()
+
+
+async def run_import(with_uids: bool) -> None:
+    group_index = GroupIndex(GROUP_INDEX_PATH)
+    try:
+        total = 0
+        for session_name in SESSION_NAMES:
+            total += await import_session(session_name, group_index, with_uids)
+        print(f"Done: {total} groups imported, index {GROUP_INDEX_PATH} now holds {group_index.count()} groups.")
+    finally:
+        group_index.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import existing groups from account dialogs into the group index.")
+    parser.add_argument("--no-uids", action="store_true", help="do not read the UID message of each group")
+    arguments = parser.parse_args()
+    validate_config(require_bot=False)
+    asyncio.run(run_import(not arguments.no_uids))
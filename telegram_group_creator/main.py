@@ -1,48 +1,214 @@
+import asyncio
 import logging
+import time
+from telegram.constants import ParseMode
 from telegram.ext import Application, CommandHandler
-from telegram.error import InvalidToken
+from telegram.error import InvalidToken, TelegramError
 
-from core.config import BOT_TOKEN
+from core.config import (
+    BOT_TOKEN, API_ID, API_HASH, SESSION_NAMES, validate_config, BOT_TO_ADD, PREDEFINED_MANAGERS,
+    ACCOUNT_DAILY_GROUP_LIMIT, FLOOD_MAX_WAIT, JOB_STORE_PATH, JOB_WORKERS, BOT_API_MAX_RETRIES,
+    METRICS_HOST, METRICS_PORT, GROUP_INDEX_PATH, UPDATE_MODE, WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT,
+    WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEBHOOK_MAX_CONNECTIONS
+)
 from core.logging_config import setup_logging
-from bot_logic.handlers import get_conversation_handler, cancel # Імпортуємо cancel для окремого додавання
+from core.client_manager import TelethonClientManager
+from core.bot_rate_limiter import OutboundMessageQueue
+from core.metrics import REGISTRY, MetricsServer
+from core.session_pool import SessionPool, BOT_DATA_KEY as SESSION_POOL_KEY
+from core.job_store import JobStore, BOT_DATA_KEY as JOB_STORE_KEY, ITEM_PENDING
+from core.group_index import GroupIndex, BOT_DATA_KEY as GROUP_INDEX_KEY
+from bot_logic.job_runner import JobRunner, BOT_DATA_KEY as JOB_RUNNER_KEY
+from bot_logic.message_texts import INFO_RESUMING_JOB
+from bot_logic.handlers import get_conversation_handler, cancel, status_command, jobs_command, resume_command # Імпортуємо cancel для окремого додавання
 
 # Налаштовуємо логування на самому початку
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Ключ, під яким ендпоінт метрик зберігається в application.bot_data
+METRICS_SERVER_KEY = "metrics_server"
+# Ключ фонової задачі, що підключає акаунти Telethon після старту
+ACCOUNTS_STARTUP_KEY = "accounts_startup"
+
+async def start_accounts(session_pool: SessionPool) -> None:
+    """Підключає акаунти пулу та прогріває кеш юзернеймів бота й менеджерів за замовчуванням."""
+    started = time.perf_counter()
+    try:
+        await session_pool.start()
+        await session_pool.warm_entities(
+            [BOT_TO_ADD] + [manager["username"] for manager in PREDEFINED_MANAGERS.values()]
+        )
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception("Failed to start Telethon accounts in background: %s", e)
+        return
+    logger.info("Telethon accounts ready in %.2fs.", time.perf_counter() - started)
+
+async def post_init(application: Application) -> None:
+    """Створює та підключає пул Telethon-акаунтів, відкриває сховище задач і продовжує перервані батчі."""
+    session_pool = SessionPool(
+        [TelethonClientManager(API_ID, API_HASH, session_name) for session_name in SESSION_NAMES],
+        daily_group_limit=ACCOUNT_DAILY_GROUP_LIMIT,
+        max_wait=FLOOD_MAX_WAIT
+    )
+    application.bot_data[SESSION_POOL_KEY] = session_pool
+
+    if METRICS_PORT:
+        metrics_server = MetricsServer(REGISTRY, METRICS_HOST, METRICS_PORT, health=lambda: health_report(application))
+        await metrics_server.start()
+        application.bot_data[METRICS_SERVER_KEY] = metrics_server
+
+    # Акаунти підключаються у фоні: бот приймає оновлення одразу, а Telethon завантажується паралельно.
+    # Обробники та батчі, яким потрібен акаунт, дочекаються його через session_pool.ensure_available()
+    application.bot_data[ACCOUNTS_STARTUP_KEY] = asyncio.create_task(start_accounts(session_pool))
+
+    job_store = JobStore(JOB_STORE_PATH)
+    application.bot_data[JOB_STORE_KEY] = job_store
+    # Діалоги не переживають перезапуск, тож непідтверджені чернетки з файлів більше не потрібні
+    purged = job_store.purge_drafts()
+    if purged:
+        logger.info("Removed %s unconfirmed draft jobs.", purged)
+
+    group_index = GroupIndex(GROUP_INDEX_PATH)
+    application.bot_data[GROUP_INDEX_KEY] = group_index
+    logger.info("Group index %s holds %s groups.", GROUP_INDEX_PATH, group_index.count())
+
+    job_runner = JobRunner(application.bot, session_pool, job_store, JOB_WORKERS, group_index)
+    application.bot_data[JOB_RUNNER_KEY] = job_runner
+    job_runner.start()
+    # Перервані батчі стають у чергу першими й продовжуються з контрольних точок
+    for job in job_store.interrupted_jobs():
+        counts = job_store.count_items(job.id)
+        logger.info("Resuming interrupted job %s: %s/%s venues left.", job.id, counts[ITEM_PENDING], sum(counts.values()))
+        try:
+            await application.bot.send_message(
+                chat_id=job.user_id,
+                text=INFO_RESUMING_JOB.format(job_id=job.id, remaining=counts[ITEM_PENDING], total=sum(counts.values())),
+                parse_mode=ParseMode.HTML
+            )
+        except TelegramError as e:
+            # Користувач міг заблокувати бота — батч однаково продовжується
+            logger.warning("Could not notify user %s about resumed job %s: %s", job.user_id, job.id, e)
+        job_runner.submit(job.id)
+
+async def post_shutdown(application: Application) -> None:
+    """Зупиняє фонові батчі, відключає Telethon-клієнти та закриває сховище задач."""
+    accounts_startup = application.bot_data.get(ACCOUNTS_STARTUP_KEY)
+    if accounts_startup and not accounts_startup.done():
+        accounts_startup.cancel()
+        await asyncio.gather(accounts_startup, return_exceptions=True)
+    job_runner = application.bot_data.get(JOB_RUNNER_KEY)
+    if job_runner:
+        await job_runner.stop()
+    session_pool = application.bot_data.get(SESSION_POOL_KEY)
+    if session_pool:
+        await session_pool.stop()
+    job_store = application.bot_data.get(JOB_STORE_KEY)
+    if job_store:
+        job_store.close()
+    group_index = application.bot_data.get(GROUP_INDEX_KEY)
+    if group_index:
+        group_index.close()
+    metrics_server = application.bot_data.get(METRICS_SERVER_KEY)
+    if metrics_server:
+        await metrics_server.stop()
+
+def health_report(application: Application) -> dict:
+    """Стан бота для /healthz: чи обробляються оновлення, акаунти Telethon і черга батчів."""
+    session_pool = application.bot_data.get(SESSION_POOL_KEY)
+    job_runner = application.bot_data.get(JOB_RUNNER_KEY)
+    accounts_startup = application.bot_data.get(ACCOUNTS_STARTUP_KEY)
+    return {
+        "status": "ok" if application.running else "stopped",
+        "mode": UPDATE_MODE,
+        "accounts_authorized": sum(account.is_authorized for account in session_pool.accounts) if session_pool else 0,
+        "accounts_total": len(session_pool.accounts) if session_pool else 0,
+        "accounts_starting": bool(accounts_startup and not accounts_startup.done()),
+        "jobs_running": len(job_runner.running) if job_runner else 0,
+        "jobs_queued": len(job_runner.queued) if job_runner else 0,
+    }
+
+def register_handlers(application: Application) -> None:
+    """Реєструє обробники бота (спільні для polling, webhook та локального відтворення оновлень)."""
+    # 1. Conversation Handler для основного воркфлоу
+    conv_handler = get_conversation_handler()
+    application.add_handler(conv_handler)
+
+    # 2. Додатково реєструємо /cancel, щоб він працював навіть поза діалогом
+    # (хоча fallback у ConversationHandler вже має його обробляти)
+    application.add_handler(CommandHandler('cancel', cancel))
+
+    # 3. Прогрес фонових батчів
+    application.add_handler(CommandHandler('status', status_command))
+    application.add_handler(CommandHandler('jobs', jobs_command))
+    application.add_handler(CommandHandler('resume', resume_command))
+
+    # Можна додати інші обробники тут (наприклад, /help)
+
+def run_webhook(application: Application) -> None:
+    """Приймає оновлення через вбудований webhook-сервер PTB замість long polling."""
+    if not WEBHOOK_URL:
+        logger.critical("UPDATE_MODE=webhook requires WEBHOOK_URL (public HTTPS address of the webhook). Exiting.")
+        return
+    if not WEBHOOK_SECRET_TOKEN:
+        logger.warning("WEBHOOK_SECRET_TOKEN is not set: the webhook accepts updates from anyone who knows its URL.")
+    if METRICS_PORT:
+        logger.info("Health check: GET http://%s:%s/healthz", METRICS_HOST, METRICS_PORT)
+    else:
+        logger.warning("METRICS_PORT=0: there is no /healthz endpoint, set METRICS_PORT to health-check the webhook bot.")
+    logger.info("Starting webhook server on %s:%s/%s for %s...", WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_URL)
+    application.run_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_PATH,
+        webhook_url=WEBHOOK_URL,
+        secret_token=WEBHOOK_SECRET_TOKEN or None,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+    )
+
 def main() -> None:
     """Запускає Telegram бота."""
     logger.info("Starting bot...")
 
-    if not BOT_TOKEN:
-        logger.critical("Bot token not found. Exiting.")
+    try:
+        validate_config()
+    except ValueError as e:
+        logger.critical("Invalid configuration: %s. Exiting.", e)
+        return
+    if UPDATE_MODE not in ("polling", "webhook"):
+        logger.critical("Unknown UPDATE_MODE '%s', expected 'polling' or 'webhook'. Exiting.", UPDATE_MODE)
         return
 
     try:
         # Створюємо Application
-        application = Application.builder().token(BOT_TOKEN).build()
+        application = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            # Усі вихідні запити бота проходять через спільну чергу з лімітами Bot API
+            .rate_limiter(OutboundMessageQueue(max_retries=BOT_API_MAX_RETRIES))
+            .post_init(post_init)
+            .post_shutdown(post_shutdown)
+            .build()
+        )
 
         # --- Реєстрація обробників ---
-        # 1. Conversation Handler для основного воркфлоу
-        conv_handler = get_conversation_handler()
-        application.add_handler(conv_handler)
-
-        # 2. Додатково реєструємо /cancel, щоб він працював навіть поза діалогом
-        # (хоча fallback у ConversationHandler вже має його обробляти)
-        application.add_handler(CommandHandler('cancel', cancel))
-
-        # Можна додати інші обробники тут (наприклад, /help)
+        register_handlers(application)
 
-        logger.info("Bot handlers registered. Starting polling...")
         # Запускаємо бота
-        application.run_polling()
+        if UPDATE_MODE == "webhook":
+            run_webhook(application)
+        else:
+            logger.info("Bot handlers registered. Starting polling...")
+            application.run_polling()
 
     except InvalidToken:
-        logger.critical(f"Invalid Telegram Bot Token provided. Please check your .env file.")
+        logger.critical("Invalid Telegram Bot Token provided. Please check your .env file.")
     except ImportError as e:
-         logger.critical(f"Missing dependencies: {e}. Run 'pip install -r requirements.txt'")
+         logger.critical("Missing dependencies: %s. Run 'pip install -r requirements.txt'", e)
     except Exception as e:
-        logger.exception(f"An unexpected error occurred during bot initialization or runtime: {e}")
+        logger.exception("An unexpected error occurred during bot initialization or runtime: %s", e)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
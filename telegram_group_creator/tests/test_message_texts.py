@@ -0,0 +1,57 @@
+from telegram.constants import MessageLimit
+
+from bot_logic.message_texts import CONFIRMATION_PAGE_SIZE, get_confirmation_message
+from core.group_index import Duplicate, MATCH_NAME, MATCH_UID
+
+
+def _page(name: str, uid: str) -> list[tuple[str, str]]:
+    return [(f"{name} {i}", f"{uid}{i}") for i in range(CONFIRMATION_PAGE_SIZE)]
+
+
+def _duplicates(count: int, name: str) -> list[Duplicate]:
+    return [
+        Duplicate(key=i, name=f"{name} {i}", uid=str(48000 + i), matched=MATCH_UID if i % 2 else MATCH_NAME,
+                  chat_id=-1001000000000 - i, existing_name=name)
+        for i in range(count)
+    ]
+
+
+def test_small_page_shows_every_section():
+    text = get_confirmation_message(
+        ["@margo_knp"], [("DONER MARKET | вул. Лугова, 12", "48390")], 1, 0, 1,
+        unresolved={"@ghost": "not_found", "@slow": "error"}, duplicates=_duplicates(2, "KFC")
+    )
+    assert "1. DONER MARKET | вул. Лугова, 12 — <code>48390</code>" in text
+    assert "@ghost (юзернейм не існує)" in text
+    assert "- @slow" in text
+    assert "KFC 1" in text
+    assert "і ще" not in text
+
+
+def test_full_sections_fit_message_limit():
+    managers = [f"@manager_with_a_long_name_{i:05d}" for i in range(40)]
+    unresolved = {f"@missing_user_long_name_{i:06d}": "not_found" for i in range(40)}
+    unresolved.update({f"@unverified_user_long_name_{i:05d}": "error" for i in range(40)})
+    text = get_confirmation_message(
+        managers, _page("ДУЖЕ ДОВГА НАЗВА ЗАКЛАДУ | " + "вулиця " * 30, "UID-" * 20), 5000, 3, 250,
+        custom_managers=1200, unresolved=unresolved, duplicates=_duplicates(300, "Назва дубліката " * 10)
+    )
+    assert len(text) <= MessageLimit.MAX_TEXT_LENGTH
+    # Заклади сторінки показуються завжди, урізаються лише списки
+    for number in range(61, 61 + CONFIRMATION_PAGE_SIZE):
+        assert f"\n{number}. " in text
+    assert "і ще" in text
+    # Кожен список отримує хоча б кілька рядків
+    for title in ("Не знайдені в Telegram", "Не вдалося перевірити", "Групи вже існують для 300"):
+        assert title in text
+
+
+def test_names_that_grow_when_escaped_fit_message_limit():
+    text = get_confirmation_message(
+        [f"@manager_{i:023d}" for i in range(15)], _page("&<>" * 200, "&" * 100), 20, 0, 1,
+        unresolved={"@ghost": "not_found"}, duplicates=_duplicates(10, "&" * 300)
+    )
+    assert len(text) <= MessageLimit.MAX_TEXT_LENGTH
+    assert "&amp;&lt;&gt;" in text
+    # Сутність HTML ніколи не розрізається посередині
+    assert "&am…" not in text and "&l…" not in text
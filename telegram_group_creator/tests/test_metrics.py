@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.fakes import FakeBackendConfig
+from benchmarks.run_benchmarks import run_batch
+from core.metrics import REGISTRY, MetricsRegistry
+
+# Швидкий фейковий бекенд: метрики не залежать від затримок
+FAST_BACKEND = dict(latency=0.001, bot_latency=0.0)
+# Фази create_telegram_group для нової супергрупи з менеджерами
+GROUP_PHASES = ("resolve", "create", "set_rights", "invite", "promote", "send_uid", "total")
+
+
+def _totals(snapshot: dict) -> dict[tuple, float]:
+    """{(метрика, мітки): значення лічильника або кількість спостережень гістограми}."""
+    totals = {}
+    for name, entries in snapshot.items():
+        for entry in entries:
+            key = (name, tuple(sorted(entry["labels"].items())))
+            totals[key] = entry["value"] if "value" in entry else entry["count"]
+    return totals
+
+
+def _run(size: int, **config) -> tuple[dict, dict[tuple, float]]:
+    """Проганяє батч на фейковому бекенді; повертає результат і прирости метрик REGISTRY."""
+    before = _totals(REGISTRY.snapshot())
+    result = asyncio.run(run_batch(size, 2, FakeBackendConfig(**FAST_BACKEND, **config), real_limits=False))
+    after = _totals(REGISTRY.snapshot())
+    delta = {key: value - before.get(key, 0) for key, value in after.items() if value != before.get(key, 0)}
+    return result, delta
+
+
+def _sum(delta: dict[tuple, float], metric: str) -> float:
+    return sum(value for (name, _), value in delta.items() if name == metric)
+
+
+@pytest.fixture(autouse=True)
+def _workdir(tmp_path, monkeypatch):
+    # Бенчмарк пише сховище задач, кеші сутностей і FloodWait-дедлайни в поточний каталог
+    monkeypatch.chdir(tmp_path)
+
+
+def test_batch_counts_requests_and_groups():
+    result, delta = _run(5)
+    assert result["created"] == 5
+    assert delta[("groups_processed_total", (("result", "created"),))] == 5
+    # Кожен запит до фейкового клієнта зарахований у mtproto_requests_total під своїм методом
+    for method, calls in result["mtproto_calls"].items():
+        assert delta[("mtproto_requests_total", (("method", method),))] == calls
+        assert delta[("mtproto_request_seconds", (("method", method),))] == calls
+    assert _sum(delta, "mtproto_failures_total") == 0
+
+
+def test_batch_records_every_phase_per_group():
+    _, delta = _run(4)
+    for phase in GROUP_PHASES:
+        assert delta[("group_phase_seconds", (("phase", phase),))] == 4
+    phases = {entry["labels"]["phase"]: entry for entry in REGISTRY.snapshot()["group_phase_seconds"]}
+    total = phases["total"]
+    assert total["sum"] > 0
+    assert total["avg"] == pytest.approx(total["sum"] / total["count"], abs=1e-6)
+    # Бакети кумулятивні, останній (+Inf) містить усі спостереження
+    buckets = list(total["buckets"].values())
+    assert buckets == sorted(buckets)
+    assert total["buckets"]["+Inf"] == total["count"]
+
+
+def test_flood_waits_and_failures_are_counted():
+    result, delta = _run(20, flood_rate=0.1, flood_seconds=0, failure_rate=0.05, seed=7)
+    injected = result["injected_errors"]
+    assert injected.get("FloodWaitError", 0) > 0
+    assert _sum(delta, "flood_retries_total") > 0
+    assert _sum(delta, "mtproto_failures_total") == sum(injected.values())
+    processed = _sum(delta, "groups_processed_total")
+    assert processed == result["created"] + result["failed"] == 20
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("method",))
+    seconds = registry.histogram("phase_seconds", "Phases.", ("phase",))
+    requests.inc(method="Create")
+    requests.inc(2, method='Quote"d')
+    seconds.observe(0.07, phase="create")
+    seconds.observe(3.0, phase="create")
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines[:2] == ["# HELP requests_total Requests.", "# TYPE requests_total counter"]
+    assert 'requests_total{method="Create"} 1' in lines
+    assert 'requests_total{method="Quote\\"d"} 2' in lines
+    assert "# TYPE phase_seconds histogram" in lines
+    assert 'phase_seconds_bucket{phase="create",le="0.05"} 0' in lines
+    assert 'phase_seconds_bucket{phase="create",le="0.1"} 1' in lines
+    assert 'phase_seconds_bucket{phase="create",le="5"} 2' in lines
+    assert 'phase_seconds_bucket{phase="create",le="+Inf"} 2' in lines
+    assert 'phase_seconds_sum{phase="create"} 3.07' in lines
+    assert 'phase_seconds_count{phase="create"} 2' in lines
+
+
+def test_json_snapshot_round_trips():
+    registry = MetricsRegistry()
+    registry.counter("groups_total", "Groups.", ("result",)).inc(result="created")
+    registry.histogram("phase_seconds", "Phases.", ("phase",)).observe(0.2, phase="invite")
+
+    snapshot = json.loads(json.dumps(registry.snapshot()))
+    assert snapshot["groups_total"] == [{"labels": {"result": "created"}, "value": 1}]
+    histogram = snapshot["phase_seconds"][0]
+    assert histogram["labels"] == {"phase": "invite"}
+    assert (histogram["count"], histogram["sum"], histogram["avg"]) == (1, 0.2, 0.2)
+    assert histogram["buckets"]["0.1"] == 0 and histogram["buckets"]["0.25"] == 1
+    assert list(histogram["buckets"])[-1] == "+Inf"
@@ -20,4 +20,23 @@ def format_list_html(items: list[str], numbered: bool = False) -> str:
         return "\n".join(f"{i+1}. {item}" for i, item in enumerate(escaped_items))
     else:
         # Використовуємо тире для ненумерованого списку
-        return "\n".join(f"- {item}" for item in escaped_items)
\ No newline at end of file
+        return "\n".join(f"- {item}" for item in escaped_items)
+
+def format_duration(seconds: float) -> str:
+    """
+    Форматує тривалість для повідомлень користувачу.
+
+    Args:
+        seconds: Тривалість у секундах.
+
+    Returns:
+        Рядок на кшталт "1 год 5 хв", "3 хв 20 с" або "45 с".
+    """
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours} год {minutes} хв"
+    if minutes:
+        return f"{minutes} хв {secs} с"
+    return f"{secs} с"